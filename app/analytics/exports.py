@@ -0,0 +1,126 @@
+"""
+Streaming export of orders and their lines.
+"""
+
+import csv
+import json
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import Order
+
+CSV_COLUMNS = [
+    'order_id',
+    'date',
+    'status',
+    'payment_method',
+    'user_email',
+    'line_id',
+    'food_item_id',
+    'food_item_name',
+    'price',
+    'quantity',
+]
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def filter_orders(start=None, end=None, status=None):
+    """Return the orders to export, filtered by day range and statuses."""
+    orders = Order.objects.all()
+    if start:
+        orders = orders.filter(date__gte=_day_start(start))
+    if end:
+        orders = orders.filter(date__lt=_day_start(end + timedelta(days=1)))
+    if status:
+        orders = orders.filter(status__in=status)
+
+    return orders
+
+
+def iter_orders(orders, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield one dict per order with its lines.
+
+    Orders are read through a server-side cursor and the lines of each chunk
+    of orders are fetched with a single query, so memory use only depends on
+    the chunk size.
+    """
+    rows = orders.order_by('id').values(
+        'id', 'date', 'status', 'payment_method', 'user__email',
+    ).iterator(chunk_size=chunk_size)
+    lines = Order.order_items.through.objects.order_by('orderfooditem_id').values(
+        'order_id',
+        line_id=F('orderfooditem_id'),
+        food_item_id=F('orderfooditem__food_item_id'),
+        food_item_name=F('orderfooditem__food_item__name'),
+        placed_price=F('orderfooditem__price'),
+        price=F('orderfooditem__food_item__price'),
+        quantity=F('orderfooditem__quantity'),
+    )
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+
+        chunk_lines = {}
+        for line in lines.filter(order_id__in=[row['id'] for row in chunk]):
+            # Lines placed before their price was stored are taken at the current price.
+            placed_price = line.pop('placed_price')
+            if placed_price is not None:
+                line['price'] = placed_price
+            chunk_lines.setdefault(line.pop('order_id'), []).append(line)
+
+        for row in chunk:
+            order_lines = chunk_lines.get(row['id'], [])
+            yield {
+                'order_id': row['id'],
+                'date': row['date'],
+                'status': row['status'],
+                'payment_method': row['payment_method'],
+                'user_email': row['user__email'],
+                'total_price': sum(
+                    (line['price'] * line['quantity'] for line in order_lines if line['price'] is not None),
+                    0,
+                ),
+                'total_items': sum(line['quantity'] for line in order_lines),
+                'lines': order_lines,
+            }
+
+
+class _Echo:
+    """File-like object that returns what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(orders):
+    """Yield CSV lines with one row per order line."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for order in orders:
+        for line in order['lines'] or [{}]:
+            row = {**order, **line}
+            yield writer.writerow([row.get(column) for column in CSV_COLUMNS])
+
+
+def jsonl_lines(orders):
+    """Yield one JSON document per order."""
+    for order in orders:
+        yield json.dumps(order, cls=DjangoJSONEncoder) + '\n'
+
+
+FORMATS = {
+    'csv': (csv_lines, 'text/csv'),
+    'jsonl': (jsonl_lines, 'application/x-ndjson'),
+}
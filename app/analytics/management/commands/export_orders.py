@@ -0,0 +1,42 @@
+'''
+Stream orders and their lines to a CSV or JSON lines file.
+'''
+
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from analytics.exports import DEFAULT_CHUNK_SIZE, FORMATS, filter_orders, iter_orders
+from core.models import ORDER_STATUS
+
+
+class Command(BaseCommand):
+    help = 'Export orders with their lines as CSV or JSON lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=parse_date, help='First day to export (YYYY-MM-DD).')
+        parser.add_argument('--end', type=parse_date, help='Last day to export (YYYY-MM-DD).')
+        parser.add_argument(
+            '--status',
+            action='append',
+            choices=[value for value, _ in ORDER_STATUS],
+            help='Only export orders in this status. Can be repeated.',
+        )
+        parser.add_argument('--format', choices=list(FORMATS), default='csv')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--output', help='File to write to. Defaults to stdout.')
+
+    def handle(self, *args, **options):
+        render, _ = FORMATS[options['format']]
+        orders = filter_orders(
+            start=options['start'],
+            end=options['end'],
+            status=options['status'],
+        )
+        lines = render(iter_orders(orders, chunk_size=options['chunk_size']))
+
+        if options['output']:
+            with open(options['output'], 'w', newline='') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
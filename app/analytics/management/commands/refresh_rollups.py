@@ -0,0 +1,22 @@
+'''
+Refresh the sales rollups from the orders changed since the last run.
+'''
+
+from django.core.management.base import BaseCommand
+
+from analytics.rollups import refresh_sales_rollups
+
+
+class Command(BaseCommand):
+    help = 'Refresh the daily sales rollups.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild every day instead of only the days with changed orders.',
+        )
+
+    def handle(self, *args, **options):
+        days = refresh_sales_rollups(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(days)} day(s) of sales rollups.'))
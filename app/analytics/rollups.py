@@ -0,0 +1,210 @@
+"""
+Incrementally maintained sales rollups.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from core.models import (
+    ArchivedOrder,
+    ArchivedOrderFoodItem,
+    DailyFoodItemSales,
+    DailySales,
+    Order,
+    Watermark,
+)
+from menu.archive import archived_until
+
+# Orders in these statuses count as sales.
+SALES_STATUSES = ['PENDING', 'CONFIRMED', 'PREPARING', 'READY', 'DELIVERED']
+
+WATERMARK_NAME = 'sales_rollups'
+
+# Re-scan a short window before the watermark so that orders committed
+# out of order are not missed. Rebuilding a day is idempotent.
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+
+
+def _line_revenue(prefix):
+    # Lines placed before their price was stored are counted at the current price.
+    return ExpressionWrapper(
+        F(f'{prefix}quantity') * Coalesce(f'{prefix}price', f'{prefix}food_item__price'),
+        output_field=MONEY,
+    )
+
+
+def _money_sum(expression):
+    return Coalesce(Sum(expression), Value(Decimal('0')), output_field=MONEY)
+
+
+def changed_days(since=None):
+    """Return the days with orders changed since the given time."""
+    orders = Order.objects.all()
+    if since is not None:
+        orders = orders.filter(updated__gt=since - WATERMARK_OVERLAP)
+
+    days = orders.annotate(day=TruncDate('date')).values_list('day', flat=True)
+    return set(days.order_by().distinct())
+
+
+def frozen_days(days):
+    """
+    Return the days whose rollups are frozen among the given days.
+
+    Days before the day of the archive cutoff without live orders left only
+    have archived orders, which no longer change, so they are not rebuilt.
+    """
+    cutoff = archived_until()
+    if cutoff is None:
+        return set()
+
+    cutoff_day = timezone.localtime(cutoff).date()
+    before = {day for day in days if day < cutoff_day}
+    live = Order.objects.annotate(day=TruncDate('date')).filter(day__in=before).values_list('day', flat=True)
+    return before - set(live.order_by().distinct())
+
+
+def rebuild_days(days):
+    """Recompute the rollup rows for the given days from the live and archived orders, return the days rebuilt."""
+    days = sorted(set(days) - frozen_days(days))
+    if not days:
+        return days
+
+    daily = defaultdict(lambda: {'order_count': 0, 'item_count': 0, 'revenue': Decimal('0')})
+    for orders, items, price in [
+        (Order.objects, 'cached_total_items', 'cached_total_price'),
+        (ArchivedOrder.objects, 'total_items', 'total_price'),
+    ]:
+        rows = orders.filter(status__in=SALES_STATUSES).annotate(
+            day=TruncDate('date'),
+        ).filter(day__in=days).values('day', 'payment_method').annotate(
+            order_count=Count('id'),
+            # Totals are kept at the prices the orders were placed at.
+            item_count=Coalesce(Sum(items), Value(0)),
+            revenue=_money_sum(price),
+        ).order_by()
+        for row in rows:
+            totals = daily[row['day'], row['payment_method']]
+            for name in totals:
+                totals[name] += row[name]
+
+    per_item = defaultdict(lambda: {'quantity': 0, 'revenue': Decimal('0')})
+    for lines, prefix in [
+        (Order.order_items.through.objects, 'orderfooditem__'),
+        (ArchivedOrderFoodItem.objects, ''),
+    ]:
+        rows = lines.filter(**{
+            'order__status__in': SALES_STATUSES, f'{prefix}food_item__isnull': False,
+        }).annotate(
+            day=TruncDate('order__date'),
+        ).filter(day__in=days).values(
+            'day',
+            food_item_ref=F(f'{prefix}food_item'),
+            food_type=F(f'{prefix}food_item__type'),
+        ).annotate(
+            # Named apart from the quantity field of archived lines.
+            sold=Sum(f'{prefix}quantity'),
+            sold_revenue=Sum(_line_revenue(prefix)),
+        ).order_by()
+        for row in rows:
+            totals = per_item[row['day'], row['food_item_ref'], row['food_type']]
+            totals['quantity'] += row['sold']
+            totals['revenue'] += row['sold_revenue']
+
+    with transaction.atomic():
+        DailySales.objects.filter(day__in=days).delete()
+        DailyFoodItemSales.objects.filter(day__in=days).delete()
+        DailySales.objects.bulk_create([
+            DailySales(day=day, payment_method=payment_method, **totals)
+            for (day, payment_method), totals in daily.items()
+        ])
+        DailyFoodItemSales.objects.bulk_create([
+            DailyFoodItemSales(day=day, food_item_id=food_item_id, type=food_type, **totals)
+            for (day, food_item_id, food_type), totals in per_item.items()
+        ])
+
+    return days
+
+
+def refresh_sales_rollups(full=False):
+    """
+    Bring the rollups up to date with the orders changed since the last run.
+    Return the list of days that were rebuilt.
+    """
+    started = timezone.now()
+    watermark, _ = Watermark.objects.get_or_create(name=WATERMARK_NAME)
+
+    if full:
+        days = changed_days()
+        cutoff = archived_until()
+        if cutoff:
+            # Its orders placed before the cutoff may all be archived.
+            days.add(timezone.localtime(cutoff).date())
+        rolled_up = set(DailySales.objects.values_list('day', flat=True).order_by().distinct())
+        rolled_up.update(DailyFoodItemSales.objects.values_list('day', flat=True).order_by().distinct())
+        frozen = frozen_days(rolled_up)
+        DailySales.objects.exclude(day__in=frozen).delete()
+        DailyFoodItemSales.objects.exclude(day__in=frozen).delete()
+    else:
+        days = changed_days(watermark.value)
+
+    days = rebuild_days(days)
+
+    watermark.value = started
+    watermark.save(update_fields=['value'])
+
+    return days
+
+
+def sales_summary(start, end, top=10):
+    """Return revenue, item counts and top items between two days."""
+    daily = DailySales.objects.filter(day__gte=start, day__lte=end)
+    per_item = DailyFoodItemSales.objects.filter(day__gte=start, day__lte=end)
+
+    totals = daily.aggregate(
+        revenue=_money_sum('revenue'),
+        order_count=Coalesce(Sum('order_count'), Value(0)),
+        item_count=Coalesce(Sum('item_count'), Value(0)),
+    )
+
+    return {
+        'start': start,
+        'end': end,
+        **totals,
+        'daily': list(
+            daily.values('day').annotate(
+                revenue=Sum('revenue'),
+                order_count=Sum('order_count'),
+                item_count=Sum('item_count'),
+            ).order_by('day')
+        ),
+        'payment_methods': list(
+            daily.values('payment_method').annotate(
+                revenue=Sum('revenue'),
+                order_count=Sum('order_count'),
+            ).order_by('payment_method')
+        ),
+        'food_types': list(
+            per_item.values('type').annotate(
+                revenue=Sum('revenue'),
+                quantity=Sum('quantity'),
+            ).order_by('type')
+        ),
+        'top_items': list(
+            per_item.values(
+                'food_item',
+                name=F('food_item__name'),
+            ).annotate(
+                revenue=Sum('revenue'),
+                quantity=Sum('quantity'),
+            ).order_by('-quantity', '-revenue', 'food_item')[:top]
+        ),
+    }
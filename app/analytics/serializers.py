@@ -0,0 +1,65 @@
+from rest_framework import serializers
+from django.utils.translation import gettext as _
+
+from analytics.exports import FORMATS
+from core.models import ORDER_STATUS
+
+
+class SalesQuerySerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    top = serializers.IntegerField(default=10, min_value=1, max_value=100)
+
+    def validate(self, attrs):
+        if attrs['start'] > attrs['end']:
+            raise serializers.ValidationError(_('Start date must not be after end date.'))
+
+        return attrs
+
+
+class DailySalesSerializer(serializers.Serializer):
+    day = serializers.DateField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    order_count = serializers.IntegerField()
+    item_count = serializers.IntegerField()
+
+
+class PaymentMethodSalesSerializer(serializers.Serializer):
+    payment_method = serializers.CharField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    order_count = serializers.IntegerField()
+
+
+class FoodTypeSalesSerializer(serializers.Serializer):
+    type = serializers.CharField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    quantity = serializers.IntegerField()
+
+
+class FoodItemSalesSerializer(serializers.Serializer):
+    food_item = serializers.IntegerField()
+    name = serializers.CharField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    quantity = serializers.IntegerField()
+
+
+class SalesSummarySerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    order_count = serializers.IntegerField()
+    item_count = serializers.IntegerField()
+    daily = DailySalesSerializer(many=True)
+    payment_methods = PaymentMethodSalesSerializer(many=True)
+    food_types = FoodTypeSalesSerializer(many=True)
+    top_items = FoodItemSalesSerializer(many=True)
+
+
+class OrderExportQuerySerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    status = serializers.ListField(
+        child=serializers.ChoiceField(choices=ORDER_STATUS),
+        required=False,
+    )
+    output = serializers.ChoiceField(choices=list(FORMATS), default='csv')
@@ -0,0 +1,105 @@
+"""
+Tests for the orders export.
+"""
+
+import csv
+import json
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from analytics.exports import iter_orders
+from core import models
+
+EXPORT_URL = reverse('analytics:order-export')
+
+
+def create_order(user, items, **params):
+    """Create and return an order with (food_item, quantity) lines."""
+    order = models.Order.objects.create(user=user, **params)
+    for food_item, quantity in items:
+        order.order_items.add(
+            models.OrderFoodItem.objects.create(food_item=food_item, quantity=quantity)
+        )
+
+    return order
+
+
+def streamed(res):
+    return b''.join(res.streaming_content).decode()
+
+
+class OrderExportTests(TestCase):
+    """Test exporting orders."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_superuser('admin@example.com', 'pass123')
+        self.client.force_authenticate(self.user)
+        self.soup = models.FoodItem.objects.create(name='Soup', price=Decimal('10.00'))
+        self.steak = models.FoodItem.objects.create(name='Steak', price=Decimal('30.00'))
+
+    def test_staff_required(self):
+        user = get_user_model().objects.create_user(email='user@example.com', password='pass123')
+        self.client.force_authenticate(user)
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_csv(self):
+        """Test the CSV export has one row per line."""
+        order = create_order(self.user, [(self.soup, 2), (self.steak, 1)], status='DELIVERED')
+        create_order(self.user, [], status='DELIVERED')
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        rows = list(csv.DictReader(StringIO(streamed(res))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['order_id'], str(order.id))
+        self.assertEqual(rows[0]['food_item_name'], 'Soup')
+        self.assertEqual(rows[0]['quantity'], '2')
+        self.assertEqual(rows[2]['line_id'], '')
+
+    def test_export_jsonl_filtered_by_status(self):
+        """Test the JSON lines export only contains the requested statuses."""
+        order = create_order(self.user, [(self.soup, 2), (self.steak, 1)], status='DELIVERED')
+        create_order(self.user, [(self.soup, 1)])
+
+        res = self.client.get(EXPORT_URL, {'output': 'jsonl', 'status': 'DELIVERED'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        documents = [json.loads(line) for line in streamed(res).splitlines()]
+        self.assertEqual(len(documents), 1)
+        self.assertEqual(documents[0]['order_id'], order.id)
+        self.assertEqual(documents[0]['total_price'], '50.00')
+        self.assertEqual(len(documents[0]['lines']), 2)
+
+    def test_export_lines_fetched_per_chunk(self):
+        """Test the number of queries depends on the chunks, not the orders."""
+        for _ in range(6):
+            create_order(self.user, [(self.soup, 1), (self.steak, 1)])
+
+        with self.assertNumQueries(3):
+            orders = list(iter_orders(models.Order.objects.all(), chunk_size=3))
+
+        self.assertEqual(len(orders), 6)
+        self.assertTrue(all(len(order['lines']) == 2 for order in orders))
+
+    def test_export_command(self):
+        create_order(self.user, [(self.soup, 1)], status='READY')
+        out = StringIO()
+
+        call_command('export_orders', '--format', 'jsonl', '--status', 'READY', stdout=out)
+
+        documents = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(documents), 1)
+        self.assertEqual(documents[0]['total_items'], 1)
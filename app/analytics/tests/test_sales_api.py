@@ -0,0 +1,152 @@
+"""
+Tests for the sales rollups and the sales API.
+"""
+
+import io
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from analytics.rollups import refresh_sales_rollups
+from core import models
+from menu.inventory import place_cart
+
+SALES_URL = reverse('analytics:sales')
+
+
+def create_order(user, items, **params):
+    """Create and return an order with (food_item, quantity) lines."""
+    order = models.Order.objects.create(user=user, **params)
+    for food_item, quantity in items:
+        order.order_items.add(
+            models.OrderFoodItem.objects.create(food_item=food_item, quantity=quantity)
+        )
+    order.update_totals()
+
+    return order
+
+
+class SalesRollupTests(TestCase):
+    """Test refreshing the sales rollups."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(email='user@example.com', password='pass123')
+        self.soup = models.FoodItem.objects.create(name='Soup', price=Decimal('10.00'), type='STARTER')
+        self.steak = models.FoodItem.objects.create(name='Steak', price=Decimal('30.00'))
+
+    def test_refresh_builds_rollups(self):
+        """Test placed orders are rolled up by day, payment method and item."""
+        create_order(self.user, [(self.soup, 2), (self.steak, 1)], status='DELIVERED')
+        create_order(self.user, [(self.soup, 1)], status='PENDING', payment_method='CARD')
+        create_order(self.user, [(self.steak, 5)])
+        create_order(self.user, [(self.steak, 5)], status='CANCELLED')
+
+        call_command('refresh_rollups', stdout=io.StringIO())
+
+        today = timezone.now().date()
+        cash = models.DailySales.objects.get(day=today, payment_method='CASH')
+        self.assertEqual(cash.order_count, 1)
+        self.assertEqual(cash.item_count, 3)
+        self.assertEqual(cash.revenue, Decimal('50.00'))
+        card = models.DailySales.objects.get(day=today, payment_method='CARD')
+        self.assertEqual(card.revenue, Decimal('10.00'))
+        soup = models.DailyFoodItemSales.objects.get(day=today, food_item=self.soup)
+        self.assertEqual(soup.quantity, 3)
+        self.assertEqual(soup.type, 'STARTER')
+        self.assertEqual(models.DailyFoodItemSales.objects.get(food_item=self.steak).quantity, 1)
+
+    def test_refresh_only_rebuilds_changed_days(self):
+        """Test an incremental refresh skips days without changed orders."""
+        order = create_order(self.user, [(self.soup, 1)], status='DELIVERED')
+        refresh_sales_rollups()
+
+        models.Order.objects.filter(id=order.id).update(
+            updated=timezone.now() - timedelta(days=1),
+        )
+        self.assertEqual(refresh_sales_rollups(), [])
+
+        order.status = 'CANCELLED'
+        order.save()
+        days = refresh_sales_rollups()
+
+        self.assertEqual(days, [timezone.now().date()])
+        self.assertFalse(models.DailySales.objects.exists())
+
+    def test_revenue_at_placed_prices(self):
+        """Test price changes after an order was placed leave its revenue as it was."""
+        order = create_order(self.user, [(self.soup, 2)])
+        place_cart(order)
+        order.status = 'DELIVERED'
+        order.save()
+        models.FoodItem.objects.filter(id=self.soup.id).update(price=Decimal('12.00'))
+
+        refresh_sales_rollups(full=True)
+
+        self.assertEqual(models.DailySales.objects.get().revenue, Decimal('20.00'))
+        self.assertEqual(models.DailyFoodItemSales.objects.get().revenue, Decimal('20.00'))
+
+
+class PublicSalesApiTests(TestCase):
+    """Test the sales API for non-staff users."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_required(self):
+        res = self.client.get(SALES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_staff_required(self):
+        user = get_user_model().objects.create_user(email='user@example.com', password='pass123')
+        self.client.force_authenticate(user)
+
+        res = self.client.get(SALES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class StaffSalesApiTests(TestCase):
+    """Test the sales API for staff users."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_superuser('admin@example.com', 'pass123')
+        self.client.force_authenticate(self.user)
+
+    def test_sales_summary(self):
+        """Test the summary is read from the rollups."""
+        soup = models.FoodItem.objects.create(name='Soup', price=Decimal('10.00'), type='STARTER')
+        steak = models.FoodItem.objects.create(name='Steak', price=Decimal('30.00'))
+        create_order(self.user, [(soup, 4), (steak, 1)], status='DELIVERED')
+        refresh_sales_rollups()
+        today = timezone.now().date()
+
+        res = self.client.get(SALES_URL, {'start': today, 'end': today, 'top': 1})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['revenue'], '70.00')
+        self.assertEqual(res.data['order_count'], 1)
+        self.assertEqual(res.data['item_count'], 5)
+        self.assertEqual(len(res.data['top_items']), 1)
+        self.assertEqual(res.data['top_items'][0]['name'], soup.name)
+        self.assertEqual(res.data['top_items'][0]['quantity'], 4)
+
+    def test_empty_range(self):
+        res = self.client.get(SALES_URL, {'start': '2020-01-01', 'end': '2020-01-31'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['revenue'], '0.00')
+        self.assertEqual(res.data['top_items'], [])
+
+    def test_invalid_range(self):
+        res = self.client.get(SALES_URL, {'start': '2020-02-01', 'end': '2020-01-01'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
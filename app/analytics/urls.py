@@ -0,0 +1,9 @@
+from django.urls import path
+from analytics import views
+
+app_name = 'analytics'
+
+urlpatterns = [
+    path('sales/', views.SalesView.as_view(), name='sales'),
+    path('orders/export/', views.OrderExportView.as_view(), name='order-export'),
+]
@@ -0,0 +1,52 @@
+from django.http import StreamingHttpResponse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema
+from rest_framework import authentication, permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from analytics import serializers
+from analytics.exports import FORMATS, filter_orders, iter_orders
+from analytics.rollups import sales_summary
+from core.replicas import ReplicaReadMixin, iterate_on
+
+
+class SalesView(ReplicaReadMixin, APIView):
+    """Sales totals for a date range, read from the precomputed rollups."""
+    authentication_classes = [authentication.TokenAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(
+        parameters=[serializers.SalesQuerySerializer],
+        responses=serializers.SalesSummarySerializer,
+    )
+    def get(self, request):
+        query = serializers.SalesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        summary = sales_summary(**query.validated_data)
+
+        return Response(serializers.SalesSummarySerializer(summary).data)
+
+
+class OrderExportView(ReplicaReadMixin, APIView):
+    """Stream orders and their lines as CSV or JSON lines."""
+    authentication_classes = [authentication.TokenAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    @extend_schema(
+        parameters=[serializers.OrderExportQuerySerializer],
+        responses={(200, 'text/csv'): OpenApiTypes.STR, (200, 'application/x-ndjson'): OpenApiTypes.STR},
+    )
+    def get(self, request):
+        query = serializers.OrderExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        output = query.validated_data.pop('output')
+        render, content_type = FORMATS[output]
+
+        orders = filter_orders(**query.validated_data)
+        # The stream is consumed after the view returns, so bind it to the database now.
+        stream = iterate_on(self.read_db, render(iter_orders(orders)))
+        response = StreamingHttpResponse(stream, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="orders.{output}"'
+
+        return response
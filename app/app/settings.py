@@ -44,16 +44,23 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core',
     'rest_framework',
     'rest_framework.authtoken',
     'drf_spectacular',
     'user',
     'menu',
+    'analytics',
     'corsheaders',
 ]
 
+# The benchmark suite is an offline development tool, left out of production.
+if DEBUG or os.environ.get('DB_ENGINE') == 'sqlite':
+    INSTALLED_APPS.append('benchmarks')
+
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -62,6 +69,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.replicas.ReadYourWritesMiddleware',
 ]
 
 ROOT_URLCONF = 'app.urls'
@@ -94,10 +102,66 @@ DATABASES = {
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
-        'PASSWORD': os.environ.get('DB_PASS')
+        'PASSWORD': os.environ.get('DB_PASS'),
+        # Keep connections open between requests so the warm-up connections are reused.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
     }
 }
 
+# DB_ENGINE=sqlite runs the app, tests and benchmarks offline.
+if os.environ.get('DB_ENGINE') == 'sqlite':
+    DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('DB_NAME') or BASE_DIR / 'db.sqlite3',
+    }
+
+# Read replicas of the primary, e.g. DB_REPLICA_HOSTS=replica-1,replica-2.
+# They share the primary's credentials and mirror it in tests.
+for index, host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+
+# Replicas lagging further behind than this many seconds are skipped.
+DB_REPLICA_MAX_LAG = float(os.environ.get('DB_REPLICA_MAX_LAG', 5))
+
+# Reads by a user stay on the primary for this many seconds after a write.
+DB_READ_YOUR_WRITES = float(os.environ.get('DB_READ_YOUR_WRITES', 10))
+
+# Delivered and cancelled orders older than this many days are archived.
+ORDER_ARCHIVE_AFTER_DAYS = int(os.environ.get('ORDER_ARCHIVE_AFTER_DAYS', 180))
+
+# OpenAPI schema precomputed by manage.py build_schema.
+SCHEMA_FILE = BASE_DIR / 'schema.yml'
+
+# Carts not changed for this many days are deleted.
+CART_EXPIRE_AFTER_DAYS = int(os.environ.get('CART_EXPIRE_AFTER_DAYS', 30))
+
+# Number of favourite food items in the order summary of a user.
+ORDER_SUMMARY_FAVOURITES = int(os.environ.get('ORDER_SUMMARY_FAVOURITES', 5))
+
+# Number of food items stored as recommended with each food item.
+RECOMMENDATIONS_PER_FOOD_ITEM = int(os.environ.get('RECOMMENDATIONS_PER_FOOD_ITEM', 10))
+
+# Preparation times: observations per statistics window, seconds assumed
+# before any order was prepared, and orders the kitchen prepares at once.
+PREP_TIME_WINDOW = int(os.environ.get('PREP_TIME_WINDOW', 200))
+PREP_TIME_DEFAULT = int(os.environ.get('PREP_TIME_DEFAULT', 900))
+KITCHEN_CAPACITY = int(os.environ.get('KITCHEN_CAPACITY', 4))
+
+# Number of recent orders returned by the bootstrap endpoint.
+BOOTSTRAP_HISTORY_LENGTH = int(os.environ.get('BOOTSTRAP_HISTORY_LENGTH', 10))
+
+# Seconds the order gauges of the metrics endpoint are reused for.
+METRICS_GAUGE_INTERVAL = int(os.environ.get('METRICS_GAUGE_INTERVAL', 30))
+
+# Seconds a cached cart is served for, bounding staleness if a write is missed.
+CART_CACHE_TIMEOUT = int(os.environ.get('CART_CACHE_TIMEOUT', 300))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -150,6 +214,29 @@ AUTH_USER_MODEL = 'core.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # One throttle, so each request updates a single counter: views with a
+    # throttle_scope are limited by its rate instead of the user or anon rate.
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.RateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': os.environ.get('THROTTLE_RATE_ANON', '300/min'),
+        'user': os.environ.get('THROTTLE_RATE_USER', '600/min'),
+        'auth': os.environ.get('THROTTLE_RATE_AUTH', '10/min'),
+        'orders': os.environ.get('THROTTLE_RATE_ORDERS', '120/min'),
+    },
+    # Requests reach uwsgi through nginx, which passes the client address as
+    # REMOTE_ADDR. X-Forwarded-For is set by clients and must not be trusted.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+}
+
+# Throttle counters must be shared by every worker, so production should
+# point this at memcached.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
 }
 
 CORS_ALLOWED_ORIGINS = [
@@ -168,3 +255,10 @@ CORS_ALLOW_METHODS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+CORS_EXPOSE_HEADERS = [
+    'Retry-After',
+    'X-RateLimit-Limit',
+    'X-RateLimit-Remaining',
+    'X-RateLimit-Scope',
+]
+
@@ -16,23 +16,26 @@ Including another URLconf
 
 from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularSwaggerView,
-)
+from drf_spectacular.views import SpectacularSwaggerView
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core import views as core_views
+
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
+    path('health/live/', core_views.liveness, name='health-live'),
+    path('health/ready/', core_views.readiness, name='health-ready'),
+    path('metrics/', core_views.metrics, name='metrics'),
+    path('api/schema/', core_views.schema, name='api-schema'),
     path(
          'api/docs/',
          SpectacularSwaggerView.as_view(url_name='api-schema'),
          name='api-docs',
     ),
     path('api/user/', include('user.urls')),
-    path('api/menu/', include('menu.urls'))
+    path('api/menu/', include('menu.urls')),
+    path('api/analytics/', include('analytics.urls')),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,95 @@
+"""
+Warm up a worker before it serves its first request.
+
+The code warm-up runs once in the uwsgi master, before the workers are
+forked, so every worker shares its work. Connections are opened after the
+fork, since sockets must not be shared between processes.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, connections
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import translation
+
+from core.schema import load_schema
+
+logger = logging.getLogger(__name__)
+
+
+def _patterns(resolver):
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _patterns(pattern)
+        elif isinstance(pattern, URLPattern):
+            yield pattern
+
+
+def resolve_urls():
+    """Compile every URL pattern and build the reverse lookup tables."""
+    resolver = get_resolver()
+    patterns = list(_patterns(resolver))
+    for pattern in patterns:
+        pattern.pattern.regex
+    resolver.reverse_dict
+
+    return patterns
+
+
+def build_serializers(patterns):
+    """Build the fields of the serializers of every API view."""
+    serializer_classes = set()
+    for pattern in patterns:
+        view_class = getattr(pattern.callback, 'cls', None)
+        if view_class is None or not hasattr(view_class, 'get_serializer_class'):
+            continue
+        actions = getattr(pattern.callback, 'actions', None) or {}
+        for action in set(actions.values()) or [None]:
+            view = view_class(**getattr(pattern.callback, 'initkwargs', {}))
+            view.action, view.request, view.format_kwarg, view.kwargs = action, None, None, {}
+            try:
+                serializer_classes.add(view.get_serializer_class())
+            except Exception:
+                # Some views need a real request to pick a serializer.
+                continue
+
+    for serializer_class in serializer_classes:
+        serializer_class(context={}).fields
+
+    return serializer_classes
+
+
+def warm_code():
+    """Import, compile and build everything the first requests would otherwise pay for."""
+    started = time.perf_counter()
+    translation.activate(settings.LANGUAGE_CODE)
+    import drf_spectacular.openapi  # noqa: F401
+
+    patterns = resolve_urls()
+    serializers = build_serializers(patterns)
+    load_schema('yaml')
+    translation.deactivate()
+    logger.info(
+        'Warmed up %d URL patterns and %d serializers in %.0fms.',
+        len(patterns), len(serializers), (time.perf_counter() - started) * 1000,
+    )
+
+
+def open_connections(*args):
+    """Connect to every database and the cache."""
+    started = time.perf_counter()
+    for alias in connections:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            logger.warning('Could not connect to database %s during warm-up.', alias)
+    caches['default'].get('warmup')
+    logger.info('Opened connections in %.0fms.', (time.perf_counter() - started) * 1000)
+
+
+def warm_up():
+    warm_code()
+    open_connections()
@@ -14,3 +14,15 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+if os.environ.get('WARM_UP', '1') == '1':
+    from app.warmup import open_connections, warm_code
+
+    warm_code()
+    try:
+        # Only importable when running under uwsgi.
+        from uwsgidecorators import postfork
+    except ImportError:
+        pass
+    else:
+        postfork(open_connections)
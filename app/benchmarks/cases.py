@@ -0,0 +1,143 @@
+"""
+Benchmark cases for the hot paths of the API.
+
+Each case takes a data size, creates its data and returns the callable to
+time. Setup is never timed.
+"""
+
+import itertools
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.models import FoodItem, Order, OrderFoodItem
+from menu.serializers import FoodItemSerializer, OrderDetailSerializer, OrderSerializer
+
+CASES = {}
+
+_sequence = itertools.count()
+
+
+def case(name):
+    """Register a benchmark case."""
+    def register(setup):
+        CASES[name] = setup
+        return setup
+
+    return register
+
+
+def create_user():
+    return get_user_model().objects.create_user(
+        email=f'benchmark-{next(_sequence)}@example.com',
+        password='benchmark',
+    )
+
+
+def create_food_items(count):
+    # Not bulk_create, which does not set primary keys on SQLite.
+    return [
+        FoodItem.objects.create(
+            name=f'Dish {index}',
+            description='A benchmark dish. ' * 10,
+            price=Decimal('10.00') + index,
+            available=True,
+        )
+        for index in range(count)
+    ]
+
+
+def create_order(user, food_items, status='NOT_PLACED'):
+    order = Order.objects.create(user=user, status=status)
+    lines = [OrderFoodItem.objects.create(food_item=food_item, quantity=2) for food_item in food_items]
+    order.order_items.add(*lines)
+    order.update_totals()
+
+    return order
+
+
+@case('order.total_price')
+def order_total_price(size):
+    """Order.total_price on a freshly loaded order with `size` lines."""
+    order = create_order(create_user(), create_food_items(size))
+
+    def run():
+        return Order.objects.get(id=order.id).total_price
+
+    return run
+
+
+@case('serializer.food_item_list')
+def food_item_list(size):
+    """FoodItemSerializer rendering `size` food items."""
+    create_food_items(size)
+    renderer = JSONRenderer()
+
+    def run():
+        food_items = FoodItem.objects.order_by('-id')[:size]
+        return renderer.render(FoodItemSerializer(food_items, many=True).data)
+
+    return run
+
+
+@case('serializer.order_detail')
+def order_detail(size):
+    """OrderDetailSerializer rendering an order with `size` lines."""
+    order = create_order(create_user(), create_food_items(size))
+    renderer = JSONRenderer()
+
+    def run():
+        return renderer.render(OrderDetailSerializer(Order.objects.get(id=order.id)).data)
+
+    return run
+
+
+@case('serializer.order_create')
+def order_create(size):
+    """OrderSerializer.create adding `size` lines to the cart."""
+    user = create_user()
+    food_items = create_food_items(size)
+    request = APIRequestFactory().post('/')
+    request.user = user
+    payload = {'order_items': [{'food_item': food_item.id, 'quantity': 1} for food_item in food_items]}
+
+    def run():
+        serializer = OrderSerializer(data=payload, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        return serializer.save()
+
+    return run
+
+
+@case('view.menu_list')
+def menu_list_view(size):
+    """GET the menu with `size` food items."""
+    FoodItem.objects.all().delete()
+    create_food_items(size)
+    client = APIClient()
+    url = reverse('menu:fooditem-list')
+
+    def run():
+        return client.get(url)
+
+    return run
+
+
+@case('view.order_history')
+def order_history_view(size):
+    """GET the order history of a user with `size` orders of 3 lines."""
+    user = create_user()
+    food_items = create_food_items(3)
+    for _ in range(size):
+        create_order(user, food_items, status='DELIVERED')
+    client = APIClient()
+    client.force_authenticate(user)
+    url = reverse('menu:order-history')
+
+    def run():
+        return client.get(url)
+
+    return run
@@ -0,0 +1,53 @@
+'''
+Time the hot paths of the API in a throwaway database.
+'''
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks import runner
+from benchmarks.cases import CASES
+
+
+def sizes(value):
+    return [int(size) for size in value.split(',')]
+
+
+class Command(BaseCommand):
+    help = 'Run the benchmarks and optionally compare them with a baseline.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--case', action='append', choices=list(CASES), help='Only run this case.')
+        parser.add_argument('--sizes', type=sizes, default=runner.DEFAULT_SIZES, help='e.g. 1,10,100')
+        parser.add_argument('--repeat', type=int, default=runner.DEFAULT_REPEAT)
+        parser.add_argument('--output', help='Write the JSON results to this file.')
+        parser.add_argument('--compare', help='Baseline JSON results to compare against.')
+        parser.add_argument('--threshold', type=float, default=runner.DEFAULT_THRESHOLD)
+
+    def handle(self, *args, **options):
+        # Benchmarks write data, so they run in a test database like the tests.
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            results = runner.run(options['case'], options['sizes'], options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+        if options['compare']:
+            with open(options['compare']) as baseline:
+                regressions = runner.compare(results, json.load(baseline), options['threshold'])
+            for regression in regressions:
+                self.stderr.write(
+                    '{case} [{size}] {metric}: {baseline} -> {current}'.format(**regression)
+                )
+            if regressions:
+                raise CommandError(f'{len(regressions)} regression(s) against {options["compare"]}.')
+            self.stdout.write(self.style.SUCCESS('No regressions.'))
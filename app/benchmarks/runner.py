@@ -0,0 +1,112 @@
+"""
+Run benchmark cases and compare results against a baseline.
+"""
+
+import gc
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from unittest.mock import patch
+
+import django
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.views import APIView
+
+from benchmarks.cases import CASES
+
+DEFAULT_SIZES = [1, 10, 100]
+
+DEFAULT_REPEAT = 20
+
+DEFAULT_THRESHOLD = 0.2
+
+
+def measure(run, repeat):
+    """Time a callable and record its queries and allocations."""
+    run()  # Warm up caches and lazy imports.
+
+    with CaptureQueriesContext(connection) as queries:
+        run()
+
+    gc.collect()
+    tracemalloc.start()
+    run()
+    allocated, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+
+    return {
+        'median_ms': round(statistics.median(timings) * 1000, 3),
+        'min_ms': round(min(timings) * 1000, 3),
+        'queries': len(queries),
+        'allocated_kb': round(allocated / 1024, 1),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def run(names=None, sizes=DEFAULT_SIZES, repeat=DEFAULT_REPEAT):
+    """Run the benchmark cases at each size and return the results."""
+    results = {}
+    # Throttling would turn repeated requests into 429 responses.
+    with patch.object(APIView, 'get_throttles', return_value=[]):
+        for name in names or CASES:
+            results[name] = {}
+            for size in sizes:
+                results[name][str(size)] = measure(CASES[name](size), repeat)
+
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Return the regressions of the current results against a baseline.
+
+    The fastest time, which is the least noisy, and allocations regress when
+    they grow by more than the threshold. Query counts regress when they grow
+    at all.
+    """
+    regressions = []
+    for name, sizes in current['results'].items():
+        for size, result in sizes.items():
+            before = baseline['results'].get(name, {}).get(size)
+            if not before:
+                continue
+            for metric in ['min_ms', 'allocated_kb']:
+                if result[metric] > before[metric] * (1 + threshold):
+                    regressions.append({
+                        'case': name, 'size': size, 'metric': metric,
+                        'baseline': before[metric], 'current': result[metric],
+                    })
+            if result['queries'] > before['queries']:
+                regressions.append({
+                    'case': name, 'size': size, 'metric': 'queries',
+                    'baseline': before['queries'], 'current': result['queries'],
+                })
+
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,29 @@
+"""
+Tests for the benchmark runner.
+"""
+
+from django.test import TestCase
+
+from benchmarks import runner
+from benchmarks.cases import CASES
+
+
+class BenchmarkRunnerTests(TestCase):
+    """Test running and comparing benchmarks."""
+
+    def test_run_all_cases(self):
+        """Test every case runs and records time, queries and memory."""
+        results = runner.run(sizes=[1, 2], repeat=1)
+
+        self.assertEqual(set(results['results']), set(CASES))
+        result = results['results']['order.total_price']['2']
+        self.assertEqual(set(result), {'median_ms', 'min_ms', 'queries', 'allocated_kb', 'peak_kb'})
+        self.assertGreater(result['queries'], 0)
+
+    def test_compare_flags_regressions(self):
+        baseline = {'results': {'case': {'10': {'min_ms': 10, 'allocated_kb': 100, 'queries': 2}}}}
+        current = {'results': {'case': {'10': {'min_ms': 11, 'allocated_kb': 150, 'queries': 3}}}}
+
+        regressions = runner.compare(current, baseline, threshold=0.2)
+
+        self.assertEqual([regression['metric'] for regression in regressions], ['allocated_kb', 'queries'])
@@ -0,0 +1,35 @@
+'''
+Precompute the OpenAPI schema, or check that it matches the code.
+'''
+
+import hashlib
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.schema import generate_schema, read_schema
+
+
+class Command(BaseCommand):
+    help = 'Write the OpenAPI schema of the API to SCHEMA_FILE.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Fail if SCHEMA_FILE does not match the code instead of writing it.',
+        )
+
+    def handle(self, *args, **options):
+        content = generate_schema()
+        digest = hashlib.sha256(content).hexdigest()[:12]
+
+        if options['check']:
+            if read_schema() != content:
+                raise CommandError(f'{settings.SCHEMA_FILE} is out of date, run manage.py build_schema.')
+            self.stdout.write(self.style.SUCCESS(f'{settings.SCHEMA_FILE} is up to date ({digest}).'))
+            return
+
+        with open(settings.SCHEMA_FILE, 'wb') as schema_file:
+            schema_file.write(content)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {settings.SCHEMA_FILE} ({digest}).'))
@@ -0,0 +1,59 @@
+'''
+Collect static files and migrate only when something changed.
+'''
+
+import hashlib
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.finders import get_finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+STATIC_STAMP = '.collectstatic.sha256'
+
+
+def static_fingerprint():
+    """Hash the paths, sizes and modification times of every static source file."""
+    digest = hashlib.sha256()
+    for finder in get_finders():
+        for path, storage in finder.list([]):
+            stat = os.stat(storage.path(path))
+            digest.update(f'{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n'.encode())
+
+    return digest.hexdigest()
+
+
+def pending_migrations():
+    executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+    return executor.migration_plan(executor.loader.graph.leaf_nodes())
+
+
+class Command(BaseCommand):
+    help = 'Run collectstatic and migrate if the static files or the migrations changed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Run both even if nothing changed.')
+
+    def handle(self, *args, **options):
+        stamp = os.path.join(settings.STATIC_ROOT, STATIC_STAMP)
+        fingerprint = static_fingerprint()
+        try:
+            with open(stamp) as stamp_file:
+                collected = stamp_file.read().strip()
+        except OSError:
+            collected = None
+
+        if options['force'] or fingerprint != collected:
+            call_command('collectstatic', interactive=False, verbosity=options['verbosity'])
+            with open(stamp, 'w') as stamp_file:
+                stamp_file.write(fingerprint)
+        else:
+            self.stdout.write('Static files unchanged, skipping collectstatic.')
+
+        if options['force'] or pending_migrations():
+            call_command('migrate', interactive=False, verbosity=options['verbosity'])
+        else:
+            self.stdout.write('No pending migrations, skipping migrate.')
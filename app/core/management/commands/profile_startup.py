@@ -0,0 +1,97 @@
+'''
+Report where worker startup time goes and what the warm-up saves.
+'''
+
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+COLD_START = '''
+import json, os, time
+started = time.perf_counter()
+from app.wsgi import application
+imported = time.perf_counter()
+if os.environ['WARM_UP'] == '1':
+    # uwsgi opens the connections right after forking the worker.
+    from app.warmup import open_connections
+    open_connections()
+warmed = time.perf_counter()
+from django.test import Client
+client = Client()
+first_status = client.get(os.environ['PROFILE_PATH']).status_code
+first = time.perf_counter()
+client.get(os.environ['PROFILE_PATH'])
+second = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'warm_up_ms': (warmed - imported) * 1000,
+    'first_request_ms': (first - warmed) * 1000,
+    'second_request_ms': (second - first) * 1000,
+    'status': first_status,
+}))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Profile the imports of a worker and its cold start with and without warm-up.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15, help='Number of packages and modules to list.')
+        parser.add_argument('--path', default='/api/menu/food-item/', help='First request of the cold start.')
+
+    def run_python(self, args, warm_up, path=''):
+        env = {
+            **os.environ,
+            'WARM_UP': '1' if warm_up else '0',
+            'PROFILE_PATH': path,
+            'ALLOWED_HOSTS': ','.join([*settings.ALLOWED_HOSTS, 'testserver']),
+        }
+        result = subprocess.run(
+            [sys.executable, *args], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr)
+
+        return result
+
+    def handle(self, *args, **options):
+        self.report_imports(options['top'])
+        self.report_cold_start(options['path'])
+
+    def report_imports(self, top):
+        result = self.run_python(['-X', 'importtime', '-c', 'import app.wsgi'], warm_up=False)
+        packages = defaultdict(int)
+        modules = []
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            name = name.strip()
+            packages[name.split('.')[0]] += int(self_us)
+            modules.append((int(cumulative_us), name))
+
+        total = sum(packages.values())
+        self.stdout.write(f'Imports of app.wsgi: {total / 1000:.0f}ms')
+        self.stdout.write('Slowest packages (self time):')
+        for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+            self.stdout.write(f'  {self_us / 1000:8.1f}ms  {package}')
+        self.stdout.write('Slowest modules (cumulative time):')
+        for cumulative_us, name in sorted(modules, reverse=True)[:top]:
+            self.stdout.write(f'  {cumulative_us / 1000:8.1f}ms  {name}')
+
+    def report_cold_start(self, path):
+        self.stdout.write(f'Cold start of a worker serving GET {path}:')
+        self.stdout.write(f'  {"":10} {"import":>10} {"warm-up":>10} {"1st req":>10} {"2nd req":>10}')
+        for warm_up in (False, True):
+            timings = json.loads(self.run_python(['-c', COLD_START], warm_up, path).stdout)
+            self.stdout.write(
+                f'  {"warm" if warm_up else "cold":10} '
+                + ' '.join(f'{timings[key]:8.1f}ms' for key in [
+                    'import_ms', 'warm_up_ms', 'first_request_ms', 'second_request_ms',
+                ])
+            )
@@ -0,0 +1,306 @@
+'''
+Generate a large, deterministic synthetic dataset for benchmarks.
+'''
+
+import bisect
+import csv
+import io
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.models import Address, Counter, FoodItem, Order, OrderFoodItem, User
+
+ADJECTIVES = [
+    'Spicy', 'Smoked', 'Grilled', 'Crispy', 'Roasted', 'Garlic', 'Lemon', 'Honey',
+    'Classic', 'Vegan', 'Truffle', 'Sweet', 'Braised', 'Fresh', 'Hot', 'Iced',
+]
+DISHES = {
+    'STARTER': ['Soup', 'Salad', 'Bruschetta', 'Wings', 'Dumplings', 'Croquettes'],
+    'MAIN_COURSE': ['Burger', 'Steak', 'Risotto', 'Pasta', 'Curry', 'Salmon', 'Pizza'],
+    'DESSERT': ['Cake', 'Brownie', 'Pudding', 'Ice Cream', 'Tart', 'Mousse'],
+    'DRINK': ['Lemonade', 'Tea', 'Coffee', 'Juice', 'Soda', 'Smoothie'],
+}
+PRICE_RANGES = {
+    'STARTER': (5, 18),
+    'MAIN_COURSE': (14, 60),
+    'DESSERT': (6, 16),
+    'DRINK': (3, 9),
+}
+TYPE_WEIGHTS = {'STARTER': 25, 'MAIN_COURSE': 40, 'DESSERT': 20, 'DRINK': 15}
+CITIES = [
+    ('São Paulo', 'SP'), ('Rio de Janeiro', 'RJ'), ('Belo Horizonte', 'MG'),
+    ('Curitiba', 'PR'), ('Porto Alegre', 'RS'), ('Salvador', 'BA'),
+]
+STREETS = ['Rua das Flores', 'Avenida Paulista', 'Rua Augusta', 'Rua XV de Novembro', 'Avenida Brasil']
+IN_PROGRESS_STATUSES = ['PENDING', 'CONFIRMED', 'PREPARING', 'READY']
+
+# Orders placed within this window are still being processed.
+IN_PROGRESS_WINDOW = timedelta(hours=2)
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create keep the generated auto_now and auto_now_add values."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Writer:
+    """
+    Write rows in chunks with COPY on PostgreSQL and bulk_create elsewhere.
+
+    Columns left out of the rows are written with their model default, as
+    COPY does not fill them in. Columns without a default must be given.
+    """
+
+    def __init__(self, model, columns, chunk_size, use_copy):
+        self.model = model
+        self.defaults = {}
+        for field in model._meta.concrete_fields:
+            if field.attname in columns or field.name in columns or field.auto_created:
+                continue
+            if not (field.has_default() or field.null):
+                raise ValueError(f'{model.__name__}.{field.name} has no default and must be written.')
+            self.defaults[field.attname] = field.get_default()
+        self.columns = [*columns, *self.defaults]
+        self.chunk_size = chunk_size
+        self.use_copy = use_copy
+        self.rows = []
+        self.count = 0
+
+    def add(self, *row):
+        self.rows.append((*row, *self.defaults.values()))
+        if len(self.rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.use_copy:
+            self._copy()
+        else:
+            self.model.objects.bulk_create(
+                [self.model(**dict(zip(self.columns, row))) for row in self.rows],
+                batch_size=self.chunk_size,
+            )
+        self.count += len(self.rows)
+        self.rows = []
+
+    def _copy(self):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in self.rows:
+            writer.writerow(['' if value is None else value for value in row])
+        buffer.seek(0)
+
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        columns = ', '.join(
+            connection.ops.quote_name(self.model._meta.get_field(column).column) for column in self.columns
+        )
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f'COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)', buffer)
+
+
+class Command(BaseCommand):
+    help = 'Generate users, addresses, food items, orders and order lines for benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--food-items', type=int, default=200)
+        parser.add_argument('--orders', type=int, default=20000)
+        parser.add_argument('--days', type=int, default=365, help='Spread the orders over this many days.')
+        parser.add_argument('--seed', type=int, default=42, help='Same seed, same data.')
+        parser.add_argument('--chunk-size', type=int, default=10000)
+        parser.add_argument('--password', default='seedpass123', help='Password of every generated user.')
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Use bulk_create even on PostgreSQL.',
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.chunk_size = options['chunk_size']
+        self.use_copy = connection.vendor == 'postgresql' and not options['no_copy']
+        self.prefix = f'seed{options["seed"]}'
+        if User.objects.filter(email__startswith=f'{self.prefix}-').exists():
+            raise CommandError(f'Data for seed {options["seed"]} already exists, use another --seed.')
+
+        started = time.monotonic()
+        models = [User, Address, FoodItem, OrderFoodItem, Order]
+        with transaction.atomic(), explicit_timestamps(Order):
+            users = self.create_users(options['users'], options['password'])
+            food_items = self.create_food_items(options['food_items'])
+            written = self.create_orders(users, food_items, options['orders'], options['days'])
+            self.reset_sequences(models)
+            # COPY sends no signals, so the delivered orders are summarized at once.
+            call_command('rebuild_order_summaries', stdout=io.StringIO())
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(users)} users, {len(food_items)} food items, '
+            f'{written["orders"]} orders and {written["lines"]} order lines '
+            f'in {time.monotonic() - started:.1f}s.'
+        ))
+
+    def writer(self, model, columns):
+        return Writer(model, columns, self.chunk_size, self.use_copy)
+
+    def next_id(self, model):
+        return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+    def reset_sequences(self, models):
+        """Move the id sequences past the explicitly assigned ids."""
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    def create_users(self, count, password):
+        """Create users and their addresses, return (user id, address ids, weight) tuples."""
+        rng = self.rng
+        hashed = make_password(password)
+        users_out = self.writer(User, ['id', 'email', 'name', 'password', 'is_active', 'is_staff', 'is_superuser'])
+        addresses_out = self.writer(
+            Address, ['id', 'user_id', 'city', 'state', 'CEP', 'street', 'number', 'complement'],
+        )
+
+        users = []
+        user_id, address_id = self.next_id(User), self.next_id(Address)
+        for index in range(count):
+            users_out.add(
+                user_id, f'{self.prefix}-{index}@example.com', f'Seed User {index}', hashed, True, False, False,
+            )
+            address_ids = []
+            for _ in range(rng.choice([1, 1, 1, 2, 2, 3])):
+                city, state = rng.choice(CITIES)
+                addresses_out.add(
+                    address_id, user_id, city, state, rng.randint(1000000, 99999999),
+                    rng.choice(STREETS), rng.randint(1, 3000), rng.choice(['', '', 'Apt 12', 'Casa 2']),
+                )
+                address_ids.append(address_id)
+                address_id += 1
+            # Pareto weights give a heavy tail of users with thousands of orders.
+            users.append((user_id, address_ids, rng.paretovariate(1.1)))
+            user_id += 1
+
+        users_out.flush()
+        addresses_out.flush()
+        return users
+
+    def create_food_items(self, count):
+        """Create food items, return (id, price) tuples ordered by popularity."""
+        rng = self.rng
+        types, weights = zip(*TYPE_WEIGHTS.items())
+        food_items_out = self.writer(
+            FoodItem, ['id', 'name', 'description', 'price', 'available', 'type', 'stock_shards', 'version'],
+        )
+        version = Counter.objects.next('menu')
+
+        food_items = []
+        food_item_id = self.next_id(FoodItem)
+        for index in range(count):
+            food_type = rng.choices(types, weights)[0]
+            low, high = PRICE_RANGES[food_type]
+            price = Decimal(rng.randint(low * 100, high * 100)) / 100
+            name = f'{rng.choice(ADJECTIVES)} {rng.choice(DISHES[food_type])} #{index}'
+            description = ' '.join(rng.choices(ADJECTIVES, k=rng.randint(4, 20))).lower()
+            food_items_out.add(food_item_id, name, description, price, rng.random() < 0.9, food_type, 1, version)
+            food_items.append((food_item_id, price))
+            food_item_id += 1
+
+        food_items_out.flush()
+        return food_items
+
+    def create_orders(self, users, food_items, count, days):
+        """Create orders spread over time with realistic statuses and baskets."""
+        rng = self.rng
+        now = timezone.now()
+        start = now - timedelta(days=days)
+        span = (now - start).total_seconds()
+
+        user_weights = []
+        total = 0
+        for _, _, weight in users:
+            total += weight
+            user_weights.append(total)
+        # Zipf-like popularity: a few dishes make most of the sales.
+        item_weights = []
+        total_items = 0
+        for rank in range(1, len(food_items) + 1):
+            total_items += 1 / rank
+            item_weights.append(total_items)
+
+        orders_out = self.writer(Order, [
+            'id', 'user_id', 'date', 'updated', 'status', 'payment_method', 'delivery_address_id',
+            'cached_total_price', 'cached_total_items', 'summarized', 'paired',
+        ])
+        lines_out = self.writer(OrderFoodItem, ['id', 'food_item_id', 'quantity'])
+        links_out = self.writer(Order.order_items.through, ['order_id', 'orderfooditem_id'])
+
+        order_id, line_id = self.next_id(Order), self.next_id(OrderFoodItem)
+
+        def add_order(user, date, status):
+            nonlocal order_id, line_id
+            user_id, address_ids, _ = user
+            payment_method = 'CARD' if rng.random() < 0.65 else 'CASH'
+            address_id = rng.choice(address_ids)
+            basket = min(len(food_items), 1 + int(rng.expovariate(0.6)))
+            chosen = set()
+            order_price, order_quantity = Decimal(0), 0
+            for _ in range(basket):
+                food_item_id, price = food_items[bisect.bisect(item_weights, rng.random() * total_items)]
+                if food_item_id in chosen:
+                    continue
+                chosen.add(food_item_id)
+                quantity = rng.choices([1, 2, 3, 4], [70, 20, 7, 3])[0]
+                lines_out.add(line_id, food_item_id, quantity)
+                links_out.add(order_id, line_id)
+                order_price += price * quantity
+                order_quantity += quantity
+                line_id += 1
+            orders_out.add(
+                order_id, user_id, date, date, status, payment_method, address_id, order_price, order_quantity,
+                False, False,
+            )
+            order_id += 1
+
+        if food_items and users:
+            for index in range(count):
+                date = start + timedelta(seconds=span * (index + rng.random()) / count)
+                user = users[bisect.bisect(user_weights, rng.random() * total)]
+                if now - date < IN_PROGRESS_WINDOW:
+                    status = rng.choice(IN_PROGRESS_STATUSES)
+                else:
+                    status = 'CANCELLED' if rng.random() < 0.08 else 'DELIVERED'
+                add_order(user, date, status)
+
+            # About a fifth of the users left something in their cart.
+            for user in users:
+                if rng.random() < 0.2:
+                    add_order(user, now - timedelta(seconds=rng.randint(0, days * 86400)), 'NOT_PLACED')
+
+        for writer in (orders_out, lines_out, links_out):
+            writer.flush()
+
+        return {'orders': orders_out.count, 'lines': lines_out.count}
@@ -2,24 +2,46 @@
 Make Django wait for the database to be available.
 '''
 
+import random
 import time
 from psycopg2 import OperationalError as Psycopg2Error
+from django.db import connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 
 class Command(BaseCommand):
+    help = 'Wait for the database to accept connections, backing off exponentially.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timeout', type=float, default=60, help='Give up after this many seconds.')
+        parser.add_argument('--initial-delay', type=float, default=0.1)
+        parser.add_argument('--max-delay', type=float, default=5)
+
+    def ping(self):
+        '''
+        Open a connection to the database, without running the system checks.
+        '''
+        connection = connections['default']
+        connection.ensure_connection()
+        connection.close()
+
     def handle(self, *args, **options):
         # Write a message to the screen while waiting for the database to be available.
         self.stdout.write('Waiting for database...')
-        db_up = False
-        while db_up is False:
+        deadline = time.monotonic() + options['timeout']
+        delay = options['initial_delay']
+        while True:
             try:
-                # Try to execute a simple query against the database.
-                # If it fails, an exception will be raised.
-                self.check(databases=['default'])
-                db_up = True
+                self.ping()
+                break
             except (Psycopg2Error, OperationalError):
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(f'Database unavailable after {options["timeout"]:g} seconds.')
+                # Jitter keeps many containers starting together from retrying in lockstep.
+                wait = min(remaining, delay * random.uniform(0.5, 1))
+                self.stdout.write(f'Database unavailable, waiting {wait:.1f} seconds...')
+                time.sleep(wait)
+                delay = min(delay * 2, options['max_delay'])
         self.stdout.write(self.style.SUCCESS('Database available!'))
@@ -0,0 +1,131 @@
+"""
+Prometheus metrics of requests, database queries, caches and orders.
+
+Under uwsgi, set PROMETHEUS_MULTIPROC_DIR before the workers start, and each
+worker records into memory mapped files of that directory which the metrics
+endpoint adds up. Recording a value takes a few microseconds.
+"""
+
+import os
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Count
+from prometheus_client import CollectorRegistry, Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+
+from core.models import ORDER_STATUS, Order
+
+# Other methods share a label, like unresolved paths.
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+registry = CollectorRegistry()
+
+REQUESTS = Counter(
+    'sherpa_requests_total', 'Requests by view, method and status.',
+    ['view', 'method', 'status'], registry=registry,
+)
+REQUEST_DURATION = Histogram(
+    'sherpa_request_duration_seconds', 'Time spent answering requests.',
+    ['view', 'method'], registry=registry,
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_QUERIES = Histogram(
+    'sherpa_request_db_queries', 'Database queries run per request.',
+    ['view'], registry=registry,
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+)
+QUERY_DURATION = Histogram(
+    'sherpa_db_query_duration_seconds', 'Time spent in database queries.',
+    ['alias'], registry=registry,
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+CACHE_REQUESTS = Counter(
+    'sherpa_cache_requests_total', 'Cache lookups by cache and result.',
+    ['cache', 'result'], registry=registry,
+)
+
+
+def record_cache(name, hit):
+    """Count a lookup of the named cache."""
+    CACHE_REQUESTS.labels(name, 'hit' if hit else 'miss').inc()
+
+
+def order_gauges():
+    """Return the number of orders by status, computed at most once per interval by any worker."""
+    counts = cache.get('metrics:orders')
+    if counts is None:
+        counts = dict.fromkeys((status for status, _ in ORDER_STATUS), 0)
+        counts.update(Order.objects.order_by().values_list('status').annotate(count=Count('id')))
+        cache.set('metrics:orders', counts, settings.METRICS_GAUGE_INTERVAL)
+
+    return counts
+
+
+class OrderCollector:
+    """Business gauges, computed when the metrics are scraped."""
+
+    def collect(self):
+        counts = order_gauges()
+        open_carts = GaugeMetricFamily('sherpa_open_carts', 'Carts not placed yet.')
+        open_carts.add_metric([], counts['NOT_PLACED'])
+        yield open_carts
+
+        orders = GaugeMetricFamily('sherpa_orders', 'Orders by status.', labels=['status'])
+        for status, count in counts.items():
+            orders.add_metric([status], count)
+        yield orders
+
+
+registry.register(OrderCollector())
+
+
+def exposition_registry():
+    """Return the registry to expose, adding up the workers in multiprocess mode."""
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return registry
+
+    combined = CollectorRegistry()
+    MultiProcessCollector(combined)
+    combined.register(OrderCollector())
+    return combined
+
+
+class MetricsMiddleware:
+    """Record the duration and the database queries of every request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = 0
+
+        def record_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                QUERY_DURATION.labels(context['connection'].alias).observe(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record_query))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        # Unresolved paths share a label, so scanners cannot add label values.
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        method = request.method if request.method in METHODS else 'other'
+        REQUESTS.labels(view, method, response.status_code).inc()
+        REQUEST_DURATION.labels(view, method).observe(duration)
+        REQUEST_QUERIES.labels(view).observe(queries)
+
+        return response
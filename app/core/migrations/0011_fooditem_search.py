@@ -0,0 +1,60 @@
+# Generated by Django 3.2.25 on 2026-10-19 09:56
+
+from django.contrib.postgres.operations import TrigramExtension
+import django.contrib.postgres.search
+from django.db import migrations
+
+SEARCH_SQL = '''
+CREATE FUNCTION core_fooditem_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('pg_catalog.english', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.english', coalesce(NEW.description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER core_fooditem_search_vector_update
+    BEFORE INSERT OR UPDATE OF name, description, search_vector ON core_fooditem
+    FOR EACH ROW EXECUTE FUNCTION core_fooditem_search_vector();
+
+UPDATE core_fooditem SET search_vector = NULL;
+
+CREATE INDEX core_fooditem_search_vector_idx ON core_fooditem USING gin (search_vector);
+CREATE INDEX core_fooditem_name_trgm_idx ON core_fooditem USING gin (name gin_trgm_ops);
+'''
+
+DROP_SEARCH_SQL = '''
+DROP INDEX IF EXISTS core_fooditem_name_trgm_idx;
+DROP INDEX IF EXISTS core_fooditem_search_vector_idx;
+DROP TRIGGER IF EXISTS core_fooditem_search_vector_update ON core_fooditem;
+DROP FUNCTION IF EXISTS core_fooditem_search_vector();
+'''
+
+
+def create_search(apps, schema_editor):
+    # Other databases search with the in-process index of menu.search.
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(SEARCH_SQL)
+
+
+def drop_search(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEARCH_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_archived_orders'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='fooditem',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search, drop_search),
+    ]
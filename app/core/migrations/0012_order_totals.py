@@ -0,0 +1,46 @@
+# Generated by Django 3.2.25 on 2026-10-19 10:04
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_totals(apps, schema_editor):
+    Order = apps.get_model('core', 'Order')
+    lines = Order.order_items.through.objects.filter(order_id=OuterRef('pk')).values('order_id')
+    price = lines.annotate(total=Sum(
+        F('orderfooditem__food_item__price') * F('orderfooditem__quantity'),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+    )).values('total')
+    items = lines.annotate(total=Sum('orderfooditem__quantity')).values('total')
+    Order.objects.update(
+        cached_total_price=Coalesce(Subquery(price), Value(Decimal(0))),
+        cached_total_items=Coalesce(Subquery(items), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_fooditem_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='cached_total_items',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='cached_total_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'status'], name='core_order_user_id_4407f8_idx'),
+        ),
+        migrations.RunPython(fill_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.25 on 2026-10-19 10:21
+
+from django.db import migrations, models
+
+
+def fill_versions(apps, schema_editor):
+    # Existing food items are the first version, so clients syncing from 0 get them.
+    apps.get_model('core', 'FoodItem').objects.update(version=1)
+    apps.get_model('core', 'Counter').objects.create(name='menu', value=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_food_item_stock'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='FoodItemTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('food_item_id', models.BigIntegerField()),
+                ('version', models.BigIntegerField(db_index=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='fooditem',
+            name='version',
+            field=models.BigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(fill_versions, migrations.RunPython.noop),
+    ]
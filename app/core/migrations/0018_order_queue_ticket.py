@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:02
+
+from django.db import migrations, models
+
+
+def ticket_queued_orders(apps, schema_editor):
+    """Give the orders already in the kitchen their tickets, in the order they were confirmed."""
+    Counter = apps.get_model('core', 'Counter')
+    Order = apps.get_model('core', 'Order')
+    queued = Order.objects.filter(status__in=['CONFIRMED', 'PREPARING']).order_by('confirmed_at', 'id')
+    tickets = 0
+    for tickets, order_id in enumerate(queued.values_list('id', flat=True).iterator(), start=1):
+        Order.objects.filter(id=order_id).update(queue_ticket=tickets)
+    Counter.objects.update_or_create(name='kitchen:tickets', defaults={'value': tickets})
+    Counter.objects.update_or_create(name='kitchen:served', defaults={'value': 0})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_prep_times'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='queue_ticket',
+            field=models.BigIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(ticket_queued_orders, migrations.RunPython.noop),
+    ]
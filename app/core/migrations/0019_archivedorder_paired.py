@@ -0,0 +1,24 @@
+# Generated by Django 3.2.25 on 2026-10-19 11:00
+
+from django.db import migrations, models
+
+
+def mark_archived_paired(apps, schema_editor):
+    # Whether orders archived so far were counted is unknown, refresh_recommendations --full counts them.
+    apps.get_model('core', 'ArchivedOrder').objects.update(paired=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_order_queue_ticket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedorder',
+            name='paired',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(mark_archived_paired, migrations.RunPython.noop),
+    ]
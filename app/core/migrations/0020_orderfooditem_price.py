@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_archivedorder_paired'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderfooditem',
+            name='price',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=5, null=True),
+        ),
+    ]
@@ -1,4 +1,11 @@
-from django.db import models
+from contextlib import nullcontext
+from decimal import Decimal
+
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from django.contrib.auth.models import (
     AbstractBaseUser,
@@ -19,6 +26,22 @@ ORDER_STATUS = (
     ('NOT_PLACED', 'Not Placed'),
 )
 
+# Time stamped on an order when it first reaches each kitchen status.
+STATUS_TIMESTAMPS = {
+    'CONFIRMED': 'confirmed_at',
+    'PREPARING': 'preparing_at',
+    'READY': 'ready_at',
+}
+
+# Statuses of the orders queued in the kitchen, each holding a queue ticket.
+QUEUE_STATUSES = ['CONFIRMED', 'PREPARING']
+QUEUE_TICKETS = 'kitchen:tickets'
+QUEUE_SERVED = 'kitchen:served'
+
+# Fields of an order set by conditional updates only. Saves of existing
+# orders leave them out, so a stale instance never writes them back.
+CONDITIONAL_FIELDS = {'summarized', 'paired', 'queue_ticket'}
+
 PAYMENT_METHOD = (
     ('CASH', 'Cash'),
     ('CARD', 'Card'),
@@ -78,11 +101,46 @@ class FoodItem(models.Model):
     available = models.BooleanField(default=False)
     image = models.ImageField(null=True, upload_to=food_item_image_file_path)
     type = models.CharField(max_length=20, choices=FOOD_TYPE, default='MAIN_COURSE')
+    external_id = models.CharField(max_length=64, unique=True, null=True, blank=True)
+    # Kept up to date by a database trigger on PostgreSQL.
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Units left, or null when stock is not tracked. With more than one
+    # shard, the units are spread over the stock shards instead.
+    stock = models.PositiveIntegerField(null=True, blank=True)
+    stock_shards = models.PositiveSmallIntegerField(default=1)
+    # Menu change version of the last change, for clients syncing the menu.
+    version = models.BigIntegerField(default=0, db_index=True, editable=False)
 
     def __str__(self):
         return self.name
 
 
+class FoodItemTombstone(models.Model):
+    """Deleted food item, kept so clients syncing the menu drop it."""
+    food_item_id = models.BigIntegerField()
+    version = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f'{self.food_item_id} - {self.version}'
+
+
+class StockShard(models.Model):
+    """Part of the stock of a food item, so concurrent orders update different rows."""
+    food_item = models.ForeignKey(
+        FoodItem,
+        related_name='shards',
+        on_delete=models.CASCADE,
+    )
+    shard = models.PositiveSmallIntegerField()
+    stock = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['food_item', 'shard']
+
+    def __str__(self):
+        return f'{self.food_item} - {self.shard}'
+
+
 class Address(models.Model):
     """Address object."""
     user = models.ForeignKey(
@@ -109,11 +167,31 @@ class OrderFoodItem(models.Model):
         null=True,
     )
     quantity = models.PositiveIntegerField(default=1)
+    # Price of the food item when the order was placed, null while in the cart.
+    price = models.DecimalField(max_digits=5, decimal_places=2, null=True, editable=False)
 
     def __str__(self):
         return f"{self.food_item} - {self.quantity}"
 
 
+class OrderQuerySet(models.QuerySet):
+
+    def update_totals(self, **fields):
+        """Store the totals of the lines of the orders in one UPDATE, with extra fields."""
+        lines = self.model.order_items.through.objects.filter(order_id=OuterRef('pk')).values('order_id')
+        price = lines.annotate(total=Sum(
+            F('orderfooditem__food_item__price') * F('orderfooditem__quantity'),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        )).values('total')
+        items = lines.annotate(total=Sum('orderfooditem__quantity')).values('total')
+
+        return self.update(
+            cached_total_price=Coalesce(Subquery(price), Value(Decimal(0))),
+            cached_total_items=Coalesce(Subquery(items), Value(0)),
+            **fields,
+        )
+
+
 class Order(models.Model):
     """Order object."""
     user = models.ForeignKey(
@@ -123,9 +201,84 @@ class Order(models.Model):
     )
     order_items = models.ManyToManyField(OrderFoodItem, default=None, blank=True)
     date = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True, db_index=True)
     status = models.CharField(max_length=20, choices=ORDER_STATUS, default='NOT_PLACED')
     payment_method = models.CharField(max_length=20, choices=PAYMENT_METHOD, default='CASH')
     delivery_address = models.ForeignKey(Address, on_delete=models.SET_NULL, null=True)
+    # Totals of the lines, kept up to date by the writes to the lines so
+    # listings need not load them. Price changes only reach open carts.
+    cached_total_price = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    cached_total_items = models.PositiveIntegerField(default=0, editable=False)
+    # Set once the delivered order is added to the order summary of its user, see CONDITIONAL_FIELDS.
+    summarized = models.BooleanField(default=False, editable=False)
+    # Set once the food items of the placed order are counted in the pairings, see CONDITIONAL_FIELDS.
+    paired = models.BooleanField(default=False, editable=False)
+    confirmed_at = models.DateTimeField(null=True, editable=False)
+    preparing_at = models.DateTimeField(null=True, editable=False)
+    ready_at = models.DateTimeField(null=True, editable=False)
+    # Seconds the kitchen is expected to take, estimated when the order is placed.
+    prep_seconds = models.FloatField(null=True, editable=False)
+    # Place in the kitchen queue, taken when the order enters it and cleared when it leaves, see update_queue.
+    queue_ticket = models.BigIntegerField(null=True, editable=False)
+
+    objects = OrderQuerySet.as_manager()
+
+    # Off for changes made by customers, so only the kitchen times its transitions.
+    timed = True
+
+    class Meta:
+        indexes = [models.Index(fields=['user', 'status'])]
+
+    def save(self, *args, **kwargs):
+        changed = []
+        # Name of the timestamp set by this save, if any, for the receivers.
+        self._stamped = STATUS_TIMESTAMPS.get(self.status) if self.timed else None
+        if self._stamped and getattr(self, self._stamped) is None:
+            setattr(self, self._stamped, timezone.now())
+            changed.append(self._stamped)
+        else:
+            self._stamped = None
+
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], *changed}
+        elif not self._state.adding:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in CONDITIONAL_FIELDS and field.attname not in deferred
+            ]
+
+        # New orders outside the kitchen cannot hold a ticket yet.
+        queueing = not self._state.adding or self.status in QUEUE_STATUSES
+        with transaction.atomic() if queueing else nullcontext():
+            super().save(*args, **kwargs)
+            # Set when the order entered or left the kitchen queue, for the receivers.
+            self._queued = queueing and self.update_queue()
+
+    def update_queue(self):
+        """
+        Give the order a queue ticket or take it back as its stored status
+        says, and return whether it did. The order row stays locked until the
+        transaction commits, so concurrent saves of stale copies change it once.
+        """
+        stored = Order.objects.select_for_update().filter(id=self.id)
+        status, self.queue_ticket = stored.values_list('status', 'queue_ticket').get()
+        if (status in QUEUE_STATUSES) == (self.queue_ticket is not None):
+            return False
+
+        if self.queue_ticket is None:
+            self.queue_ticket = Counter.objects.next(QUEUE_TICKETS)
+        else:
+            Counter.objects.next(QUEUE_SERVED)
+            self.queue_ticket = None
+        stored.update(queue_ticket=self.queue_ticket)
+
+        return True
+
+    def update_totals(self, **fields):
+        """Store the totals of the lines of this order and reload them."""
+        Order.objects.filter(id=self.id).update_totals(**fields)
+        self.refresh_from_db(fields=['cached_total_price', 'cached_total_items', *fields])
 
     @property
     def total_price(self):
@@ -147,3 +300,218 @@ class Order(models.Model):
 
     def __str__(self):
         return f'{self.user} - {self.date}'
+
+
+class ArchivedOrder(models.Model):
+    """Finished order moved out of the order tables, grouped by month."""
+    id = models.BigIntegerField(primary_key=True)
+    month = models.DateField(db_index=True)
+    user = models.ForeignKey(
+        User,
+        related_name='archived_orders',
+        on_delete=models.CASCADE,
+    )
+    date = models.DateTimeField()
+    updated = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=ORDER_STATUS)
+    payment_method = models.CharField(max_length=20, choices=PAYMENT_METHOD)
+    delivery_address = models.ForeignKey(Address, on_delete=models.SET_NULL, null=True)
+    total_price = models.DecimalField(max_digits=12, decimal_places=2)
+    total_items = models.PositiveIntegerField()
+    # Carried over from the order, so orders archived before they were counted still are.
+    paired = models.BooleanField(default=False, editable=False)
+
+    class Meta:
+        indexes = [models.Index(fields=['user', '-id'])]
+
+    def __str__(self):
+        return f'{self.user} - {self.date}'
+
+
+class ArchivedOrderFoodItem(models.Model):
+    """Line of an archived order with the price it was sold at."""
+    id = models.BigIntegerField(primary_key=True)
+    month = models.DateField(db_index=True)
+    order = models.ForeignKey(
+        ArchivedOrder,
+        related_name='order_items',
+        on_delete=models.CASCADE,
+    )
+    food_item = models.ForeignKey(
+        FoodItem,
+        related_name='archived_order_items',
+        on_delete=models.SET_NULL,
+        null=True,
+    )
+    price = models.DecimalField(max_digits=5, decimal_places=2, null=True)
+    quantity = models.PositiveIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.food_item} - {self.quantity}"
+
+
+class OrderSummary(models.Model):
+    """Lifetime totals of the delivered orders of a user."""
+    user = models.OneToOneField(
+        User,
+        related_name='order_summary',
+        on_delete=models.CASCADE,
+        primary_key=True,
+    )
+    order_count = models.PositiveIntegerField(default=0)
+    total_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # The most ordered food items, as food_item, name and quantity.
+    favourites = models.JSONField(default=list)
+
+    def __str__(self):
+        return f'{self.user} - {self.order_count}'
+
+
+class UserFoodItemCount(models.Model):
+    """Quantity of a food item in the delivered orders of a user."""
+    user = models.ForeignKey(
+        User,
+        related_name='food_item_counts',
+        on_delete=models.CASCADE,
+    )
+    food_item = models.ForeignKey(
+        FoodItem,
+        related_name='user_counts',
+        on_delete=models.CASCADE,
+    )
+    quantity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['user', 'food_item']
+        indexes = [models.Index(fields=['user', '-quantity'])]
+
+    def __str__(self):
+        return f'{self.user} - {self.food_item} - {self.quantity}'
+
+
+class FoodItemPairing(models.Model):
+    """Number of placed orders holding both food items, stored in both directions."""
+    food_item = models.ForeignKey(
+        FoodItem,
+        related_name='pairings',
+        on_delete=models.CASCADE,
+    )
+    other = models.ForeignKey(
+        FoodItem,
+        related_name='+',
+        on_delete=models.CASCADE,
+    )
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['food_item', 'other']
+
+    def __str__(self):
+        return f'{self.food_item} - {self.other} - {self.count}'
+
+
+class Recommendation(models.Model):
+    """Food item often ordered together with another, among the top ones of that food item."""
+    food_item = models.ForeignKey(
+        FoodItem,
+        related_name='recommendations',
+        on_delete=models.CASCADE,
+    )
+    recommended = models.ForeignKey(
+        FoodItem,
+        related_name='recommended_with',
+        on_delete=models.CASCADE,
+    )
+    count = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ['food_item', 'recommended']
+
+    def __str__(self):
+        return f'{self.food_item} - {self.recommended}'
+
+
+class PrepTimeStats(models.Model):
+    """Streaming estimate of the preparation time of a food item, a food type or the kitchen."""
+    scope = models.CharField(max_length=20, choices=(
+        ('food_item', 'Food item'),
+        ('type', 'Food type'),
+        ('kitchen', 'Kitchen'),
+    ))
+    key = models.CharField(max_length=64, blank=True)
+    # Quantile sketch of the observations of the current window.
+    sketch = models.JSONField(default=dict)
+    # Median in seconds, from the last window with enough observations.
+    median = models.FloatField(null=True)
+
+    class Meta:
+        unique_together = ['scope', 'key']
+
+    def __str__(self):
+        return f'{self.scope} {self.key} - {self.median}'
+
+
+class DailySales(models.Model):
+    """Sales totals for one day and payment method."""
+    day = models.DateField()
+    payment_method = models.CharField(max_length=20, choices=PAYMENT_METHOD)
+    order_count = models.PositiveIntegerField(default=0)
+    item_count = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ['day', 'payment_method']
+
+    def __str__(self):
+        return f'{self.day} - {self.payment_method}'
+
+
+class DailyFoodItemSales(models.Model):
+    """Sales totals for one day and food item."""
+    day = models.DateField()
+    food_item = models.ForeignKey(
+        FoodItem,
+        related_name='daily_sales',
+        on_delete=models.CASCADE,
+    )
+    type = models.CharField(max_length=20, choices=FOOD_TYPE)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ['day', 'food_item']
+
+    def __str__(self):
+        return f'{self.day} - {self.food_item}'
+
+
+class Watermark(models.Model):
+    """Last point in time processed by an incremental job."""
+    name = models.CharField(max_length=255, unique=True)
+    value = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return f'{self.name} - {self.value}'
+
+
+class CounterQuerySet(models.QuerySet):
+
+    def next(self, name):
+        """Return the next value of a counter, which stays locked until the transaction commits."""
+        counter = self.filter(name=name)
+        if not counter.update(value=F('value') + 1):
+            self.get_or_create(name=name)
+            counter.update(value=F('value') + 1)
+
+        return counter.values_list('value', flat=True).get()
+
+
+class Counter(models.Model):
+    """Named counter handing out increasing numbers."""
+    name = models.CharField(max_length=255, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    objects = CounterQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.name} - {self.value}'
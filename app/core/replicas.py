@@ -0,0 +1,175 @@
+"""
+Route read-only API traffic to read replicas of the primary database.
+
+Replicas are configured with DB_REPLICA_HOSTS and named ``replica_<n>``.
+Queries go to the primary unless a view opts in with ``ReplicaReadMixin``,
+and even then a user who just wrote something reads from the primary for a
+few seconds so they see their own changes. Replicas lagging too far behind,
+or unreachable, are skipped until the next lag check.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICA_PREFIX = 'replica_'
+
+# Seconds a measured replica lag is reused before measuring again.
+LAG_CHECK_INTERVAL = 5
+
+LAG_SQL = '''
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+'''
+
+_read_db = ContextVar('read_db', default=None)
+
+_lags = {}
+
+
+def replicas():
+    return [alias for alias in settings.DATABASES if alias.startswith(REPLICA_PREFIX)]
+
+
+def replica_lag(alias):
+    """Return how many seconds a replica is behind, or None if unreachable."""
+    checked = _lags.get(alias)
+    if checked and time.monotonic() - checked[0] < LAG_CHECK_INTERVAL:
+        return checked[1]
+
+    connection = connections[alias]
+    try:
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(LAG_SQL)
+                lag = float(cursor.fetchone()[0] or 0)
+        else:
+            connection.ensure_connection()
+            lag = 0.0
+    except DatabaseError:
+        lag = None
+
+    _lags[alias] = (time.monotonic(), lag)
+    return lag
+
+
+def choose_replica():
+    """Return a replica within the allowed lag, or the primary if there is none."""
+    healthy = []
+    for alias in replicas():
+        lag = replica_lag(alias)
+        if lag is not None and lag <= settings.DB_REPLICA_MAX_LAG:
+            healthy.append(alias)
+
+    return random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+
+
+@contextmanager
+def use_replica(alias=None):
+    """Send the reads of the block to a replica."""
+    token = _read_db.set(alias or choose_replica())
+    try:
+        yield _read_db.get()
+    finally:
+        _read_db.reset(token)
+
+
+def iterate_on(alias, iterable):
+    """Read from the given database while a lazy iterable, such as a stream, is consumed."""
+    iterator = iter(iterable)
+    while True:
+        with use_replica(alias):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def _pin_key(user):
+    return f'db:primary:{user.pk}'
+
+
+def pin_to_primary(user):
+    """Serve the reads of a user from the primary for a while."""
+    cache.set(_pin_key(user), True, settings.DB_READ_YOUR_WRITES)
+
+
+def is_pinned(user):
+    return bool(user and user.is_authenticated and cache.get(_pin_key(user)))
+
+
+class ReplicaRouter:
+    """Read from the replica chosen for the current request, write to the primary."""
+
+    def db_for_read(self, model, **hints):
+        return _read_db.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db.startswith(REPLICA_PREFIX):
+            return False
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    Serve safe requests from a replica.
+
+    Limit it to some actions of a viewset with `replica_actions`.
+    Authentication and permission checks still read from the primary.
+    """
+    replica_actions = None
+    read_db = DEFAULT_DB_ALIAS
+
+    def reads_from_replica(self, request):
+        if request.method not in SAFE_METHODS or not replicas():
+            return False
+        if self.replica_actions is not None and getattr(self, 'action', None) not in self.replica_actions:
+            return False
+
+        return not is_pinned(request.user)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.reads_from_replica(request):
+            self.read_db = choose_replica()
+            self._read_db_token = _read_db.set(self.read_db)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_read_db_token', None)
+        if token is not None:
+            _read_db.reset(token)
+            self._read_db_token = None
+
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReadYourWritesMiddleware:
+    """Pin users to the primary after a successful write."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400 and replicas():
+            user = getattr(request, 'user', None)
+            if user and user.is_authenticated:
+                pin_to_primary(user)
+
+        return response
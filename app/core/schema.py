@@ -0,0 +1,61 @@
+"""
+Precomputed OpenAPI schema.
+
+Generating the schema introspects every view and serializer, so it is
+generated once with ``manage.py build_schema`` and served from memory.
+In DEBUG, the schema is generated once per process instead, so it follows
+code changes picked up by the autoreloader.
+"""
+
+import hashlib
+import logging
+
+import yaml
+from django.conf import settings
+from drf_spectacular.generators import SchemaGenerator
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+
+logger = logging.getLogger(__name__)
+
+_documents = {}
+
+
+def generate_schema():
+    """Return the OpenAPI schema of the API, rendered as YAML."""
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+    return OpenApiYamlRenderer().render(schema, renderer_context={})
+
+
+def read_schema():
+    """Return the precomputed schema, or None if it was never built."""
+    try:
+        with open(settings.SCHEMA_FILE, 'rb') as schema_file:
+            return schema_file.read()
+    except FileNotFoundError:
+        return None
+
+
+class SchemaDocument:
+    """A rendering of the schema with its ETag."""
+
+    def __init__(self, content, content_type):
+        self.content = content
+        self.content_type = content_type
+        self.etag = f'"{hashlib.sha256(content).hexdigest()[:32]}"'
+
+
+def load_schema(file_format):
+    """Return the schema document in the 'yaml' or 'json' format."""
+    if not _documents:
+        content = None if settings.DEBUG else read_schema()
+        if content is None:
+            if not settings.DEBUG:
+                logger.warning('%s is missing, run manage.py build_schema.', settings.SCHEMA_FILE)
+            content = generate_schema()
+        json_content = OpenApiJsonRenderer().render(yaml.safe_load(content), renderer_context={})
+        _documents.update(
+            yaml=SchemaDocument(content, OpenApiYamlRenderer.media_type),
+            json=SchemaDocument(json_content, OpenApiJsonRenderer.media_type),
+        )
+
+    return _documents[file_format]
@@ -1,31 +1,164 @@
+import tempfile
+from datetime import timedelta
+from io import StringIO
 from unittest.mock import patch
 
 from psycopg2 import OperationalError as Psycopg2Error
 
-from django.core.management import call_command
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
 from django.db.utils import OperationalError
-from django.test import SimpleTestCase
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
 
+from core import models
+from core.management.commands.seed_data import Writer
 
-@patch('core.management.commands.wait_for_db.Command.check')
+
+@patch('core.management.commands.wait_for_db.Command.ping')
 class CommandTests(SimpleTestCase):
-    def test_wait_for_db_ready(self, patched_check):
+    def test_wait_for_db_ready(self, patched_ping):
         '''
         Test waiting for the database when it is available.
         '''
-        patched_check.return_value = True
+        call_command('wait_for_db', stdout=StringIO())
+
+        patched_ping.assert_called_once_with()
 
-        call_command('wait_for_db')
+    @patch('time.sleep')
+    def test_wait_for_db_delay(self, patched_sleep, patched_ping):
+        '''
+        Test waiting for the database to be available, backing off exponentially.
+        '''
+        patched_ping.side_effect = [Psycopg2Error] * 2 + [OperationalError] * 3 + [None]
+        call_command('wait_for_db', '--max-delay', '1', stdout=StringIO())
 
-        patched_check.assert_called_once_with(databases=['default'])
+        self.assertEqual(patched_ping.call_count, 6)
+        delays = [call.args[0] for call in patched_sleep.call_args_list]
+        for delay, limit in zip(delays, [0.1, 0.2, 0.4, 0.8, 1]):
+            self.assertGreaterEqual(delay, limit / 2)
+            self.assertLessEqual(delay, limit)
 
     @patch('time.sleep')
-    def test_wait_for_db_delay(self, patched_sleep, patched_check):
+    @patch('time.monotonic')
+    def test_wait_for_db_timeout(self, patched_monotonic, patched_sleep, patched_ping):
+        '''
+        Test giving up when the database is not available in time.
+        '''
+        patched_ping.side_effect = OperationalError
+        patched_monotonic.side_effect = [0, 5, 11]
+
+        with self.assertRaises(CommandError):
+            call_command('wait_for_db', '--timeout', '10', stdout=StringIO())
+
+        self.assertEqual(patched_ping.call_count, 2)
+
+
+class SeedDataTests(TestCase):
+    def seed(self, seed=1):
+        call_command(
+            'seed_data', '--users', '20', '--food-items', '15', '--orders', '300', '--seed', str(seed),
+            stdout=StringIO(),
+        )
+
+    def snapshot(self):
+        return list(models.Order.objects.order_by('id').values_list(
+            'user__email', 'status', 'payment_method', 'order_items__food_item__name', 'order_items__quantity',
+        ))
+
+    def test_seed_data(self):
+        '''
+        Test seeding creates the requested volumes with realistic statuses.
+        '''
+        self.seed()
+
+        self.assertEqual(get_user_model().objects.count(), 20)
+        self.assertEqual(models.FoodItem.objects.count(), 15)
+        orders = models.Order.objects.exclude(status='NOT_PLACED')
+        self.assertEqual(orders.count(), 300)
+        self.assertGreater(orders.filter(status='DELIVERED').count(), 200)
+        self.assertTrue(models.OrderFoodItem.objects.exists())
+        self.assertFalse(models.Order.objects.filter(order_items__isnull=True).exists())
+        self.assertLess(models.Order.objects.order_by('date').first().date, timezone.now() - timedelta(days=300))
+        self.assertTrue(get_user_model().objects.first().check_password('seedpass123'))
+        self.assertEqual(
+            sum(models.OrderSummary.objects.values_list('order_count', flat=True)),
+            orders.filter(status='DELIVERED').count(),
+        )
+
+    def test_seed_data_is_deterministic(self):
+        self.seed()
+        first = self.snapshot()
+        get_user_model().objects.all().delete()
+        models.FoodItem.objects.all().delete()
+        models.OrderFoodItem.objects.all().delete()
+
+        self.seed()
+
+        self.assertEqual(self.snapshot(), first)
+
+    def test_writers_cover_non_null_columns(self):
+        """Test every non null column is written, so COPY never leaves one out."""
+        writers = []
+        init = Writer.__init__
+
+        def record(writer, *args, **kwargs):
+            init(writer, *args, **kwargs)
+            writers.append(writer)
+
+        with patch.object(Writer, '__init__', record):
+            self.seed()
+
+        self.assertEqual({writer.model for writer in writers}, {
+            get_user_model(), models.Address, models.FoodItem, models.Order, models.OrderFoodItem,
+            models.Order.order_items.through,
+        })
+        for writer in writers:
+            non_null = {
+                field.attname for field in writer.model._meta.concrete_fields
+                if not field.null and not field.auto_created
+            }
+            self.assertLessEqual(non_null, set(writer.columns), writer.model)
+
+    def test_writer_requires_columns_without_default(self):
+        """Test leaving out a column without default is refused."""
+        with self.assertRaises(ValueError):
+            Writer(models.FoodItem, ['id', 'name'], 100, use_copy=True)
+
+    def test_seed_data_twice_fails(self):
+        self.seed()
+
+        with self.assertRaises(CommandError):
+            self.seed()
+
+
+@patch('core.management.commands.prepare_startup.call_command')
+class PrepareStartupTests(TestCase):
+    def test_skips_unchanged_steps(self, patched_call_command):
+        '''
+        Test collectstatic only runs when the static files changed and migrate when migrations are pending.
+        '''
+        with override_settings(STATIC_ROOT=tempfile.mkdtemp()):
+            call_command('prepare_startup', stdout=StringIO())
+            self.assertEqual([call.args[0] for call in patched_call_command.call_args_list], ['collectstatic'])
+
+            patched_call_command.reset_mock()
+            out = StringIO()
+            call_command('prepare_startup', stdout=out)
+
+        patched_call_command.assert_not_called()
+        self.assertIn('skipping collectstatic', out.getvalue())
+        self.assertIn('skipping migrate', out.getvalue())
+
+    def test_force(self, patched_call_command):
         '''
-        Test waiting for the database to be available.
+        Test both steps run when forced.
         '''
-        patched_check.side_effect = [Psycopg2Error] * 2 + [OperationalError] * 3 + [True]
-        call_command('wait_for_db')
+        with override_settings(STATIC_ROOT=tempfile.mkdtemp()):
+            call_command('prepare_startup', stdout=StringIO())
+            call_command('prepare_startup', '--force', stdout=StringIO())
 
-        self.assertEqual(patched_check.call_count, 6)
-        patched_check.assert_called_with(databases=['default'])
+        self.assertEqual(
+            [call.args[0] for call in patched_call_command.call_args_list],
+            ['collectstatic', 'collectstatic', 'migrate'],
+        )
@@ -0,0 +1,59 @@
+"""
+Tests for the health endpoints.
+"""
+
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.urls import reverse
+
+from core import views
+
+LIVE_URL = reverse('health-live')
+READY_URL = reverse('health-ready')
+
+
+class HealthTests(TestCase):
+    """Test the liveness and readiness endpoints."""
+
+    def setUp(self):
+        views._checks.clear()
+
+    def test_liveness(self):
+        """Test liveness does not touch the database."""
+        with self.assertNumQueries(0):
+            res = self.client.get(LIVE_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {'status': 'ok'})
+
+    def test_readiness(self):
+        """Test readiness checks the database and migrations once, then reuses the result."""
+        res = self.client.get(READY_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {'status': 'ok', 'database': True, 'migrations': True})
+        with self.assertNumQueries(0):
+            self.client.get(READY_URL)
+
+    @patch('core.views._database_ok', return_value=False)
+    def test_database_unavailable(self, patched_database):
+        """Test readiness fails while the database is unavailable."""
+        res = self.client.get(READY_URL)
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res.json()['database'], False)
+
+    @patch('core.views._migrations_ok', return_value=False)
+    def test_pending_migrations(self, patched_migrations):
+        """Test readiness fails while migrations are pending."""
+        res = self.client.get(READY_URL)
+
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res.json()['migrations'], False)
+
+    def test_post_not_allowed(self):
+        """Test probes are read only."""
+        res = self.client.post(LIVE_URL)
+
+        self.assertEqual(res.status_code, 405)
@@ -0,0 +1,63 @@
+"""
+Tests for the metrics endpoint.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core import models
+from core.metrics import registry
+
+METRICS_URL = reverse('metrics')
+FOOD_ITEM_URL = reverse('menu:fooditem-list')
+
+
+def sample(name, **labels):
+    return registry.get_sample_value(name, labels) or 0
+
+
+class MetricsTests(TestCase):
+    """Test requests, queries and orders are measured."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_request_recorded(self):
+        """Test requests are counted and timed by view."""
+        labels = {'view': 'menu:fooditem-list', 'method': 'GET'}
+        requests = sample('sherpa_requests_total', status='200', **labels)
+        timed = sample('sherpa_request_duration_seconds_count', **labels)
+        queries = sample('sherpa_db_query_duration_seconds_count', alias='default')
+
+        self.client.get(FOOD_ITEM_URL)
+
+        self.assertEqual(sample('sherpa_requests_total', status='200', **labels), requests + 1)
+        self.assertEqual(sample('sherpa_request_duration_seconds_count', **labels), timed + 1)
+        self.assertGreater(sample('sherpa_db_query_duration_seconds_count', alias='default'), queries)
+
+    def test_unresolved_paths_share_label(self):
+        """Test unknown paths are counted under a single label."""
+        requests = sample('sherpa_requests_total', view='unresolved', method='GET', status='404')
+
+        self.client.get('/no-such-page/')
+        self.client.get('/another-page/')
+
+        self.assertEqual(sample('sherpa_requests_total', view='unresolved', method='GET', status='404'), requests + 2)
+
+    def test_metrics_endpoint(self):
+        """Test the metrics are exposed with the order gauges."""
+        user = get_user_model().objects.create_user('user@example.com', 'pass123')
+        models.Order.objects.create(user=user)
+        models.Order.objects.create(user=user, status='DELIVERED')
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        content = res.content.decode()
+        self.assertIn('sherpa_open_carts 1.0', content)
+        self.assertIn('sherpa_orders{status="DELIVERED"} 1.0', content)
+        self.assertIn('sherpa_orders{status="PENDING"} 0.0', content)
+        self.assertIn('# TYPE sherpa_request_duration_seconds histogram', content)
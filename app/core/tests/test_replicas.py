@@ -0,0 +1,136 @@
+"""
+Tests for the read replica routing.
+"""
+
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import replicas
+from core.models import FoodItem
+
+FOOD_ITEM_URL = reverse('menu:fooditem-list')
+ORDERS_URL = reverse('menu:order-list')
+HISTORY_URL = reverse('menu:order-history')
+
+
+@override_settings(DB_REPLICA_MAX_LAG=5)
+class ReplicaRouterTests(TestCase):
+    """Test replicas are chosen by lag and reads follow the chosen replica."""
+
+    def setUp(self):
+        cache.clear()
+        self.router = replicas.ReplicaRouter()
+        patcher = patch('core.replicas.replicas', return_value=['replica_1', 'replica_2'])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_from_primary_by_default(self):
+        """Test reads use the default routing outside of a replica block."""
+        self.assertIsNone(self.router.db_for_read(FoodItem))
+        self.assertEqual(self.router.db_for_write(FoodItem), 'default')
+
+    def test_reads_from_chosen_replica(self):
+        """Test reads in a replica block go to the replica and writes do not."""
+        with patch('core.replicas.replica_lag', return_value=0):
+            with replicas.use_replica('replica_2'):
+                self.assertEqual(self.router.db_for_read(FoodItem), 'replica_2')
+                self.assertEqual(self.router.db_for_write(FoodItem), 'default')
+
+        self.assertIsNone(self.router.db_for_read(FoodItem))
+
+    def test_skips_lagging_and_unreachable_replicas(self):
+        """Test replicas behind by more than the allowed lag are skipped."""
+        lags = {'replica_1': 30, 'replica_2': 1}
+
+        with patch('core.replicas.replica_lag', side_effect=lags.get):
+            self.assertEqual(replicas.choose_replica(), 'replica_2')
+
+        lags['replica_2'] = None
+        with patch('core.replicas.replica_lag', side_effect=lags.get):
+            self.assertEqual(replicas.choose_replica(), 'default')
+
+    def test_no_migrations_on_replicas(self):
+        """Test migrations only run on the primary."""
+        self.assertFalse(self.router.allow_migrate('replica_1', 'core'))
+        self.assertIsNone(self.router.allow_migrate('default', 'core'))
+
+    def test_pin_to_primary(self):
+        """Test a user is pinned to the primary after a write."""
+        user = get_user_model().objects.create_user('test@example.com', 'testpass')
+
+        self.assertFalse(replicas.is_pinned(user))
+        replicas.pin_to_primary(user)
+
+        self.assertTrue(replicas.is_pinned(user))
+
+    def test_write_pins_user(self):
+        """Test a successful write through the API pins the user."""
+        user = get_user_model().objects.create_user('test@example.com', 'testpass')
+        food_item = FoodItem.objects.create(name='Soup', price='5.00', type='STARTER')
+        client = APIClient()
+        client.force_authenticate(user)
+
+        res = client.post(ORDERS_URL, {'order_items': [{'food_item': food_item.id, 'quantity': 1}]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(replicas.is_pinned(user))
+
+
+@skipUnless('replica_1' in settings.DATABASES, 'Set DB_REPLICA_HOSTS to test against a replica.')
+class ReplicaQueryTests(TransactionTestCase):
+    """Test API reads hit the replica, which mirrors the primary in tests.
+
+    Committed rows are visible through the mirror connection, so this is a
+    TransactionTestCase.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        cache.clear()
+        replicas._lags.clear()
+        self.user = get_user_model().objects.create_user('test@example.com', 'testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_menu_reads_from_replica(self):
+        """Test the menu is read from the replica."""
+        with CaptureQueriesContext(connections['replica_1']) as queries:
+            res = self.client.get(FOOD_ITEM_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(any('core_fooditem' in query['sql'] for query in queries))
+
+    def test_cart_reads_from_primary(self):
+        """Test the cart is never read from a replica."""
+        with CaptureQueriesContext(connections['replica_1']) as queries:
+            self.client.get(ORDERS_URL)
+
+        self.assertFalse(any('core_order' in query['sql'] for query in queries))
+
+    def test_history_after_write_reads_from_primary(self):
+        """Test the history is read from the primary right after a write."""
+        replicas.pin_to_primary(self.user)
+
+        with CaptureQueriesContext(connections['replica_1']) as queries:
+            self.client.get(HISTORY_URL)
+
+        self.assertFalse(any('core_order' in query['sql'] for query in queries))
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        """Test reads go to the primary when the replica lags behind."""
+        with patch('core.replicas.replica_lag', return_value=60), \
+                CaptureQueriesContext(connections['replica_1']) as queries:
+            res = self.client.get(FOOD_ITEM_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('core_fooditem' in query['sql'] for query in queries))
@@ -0,0 +1,63 @@
+"""
+Tests for the precomputed OpenAPI schema.
+"""
+
+import json
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from core import schema
+
+SCHEMA_URL = reverse('api-schema')
+
+
+class SchemaTests(SimpleTestCase):
+    """Test the schema is served from the precomputed file."""
+
+    def setUp(self):
+        schema._documents.clear()
+        self.addCleanup(schema._documents.clear)
+
+    def test_schema_up_to_date(self):
+        """Test the precomputed schema matches the code, run manage.py build_schema if not."""
+        call_command('build_schema', '--check', stdout=StringIO(), stderr=StringIO())
+
+    def test_check_fails_when_outdated(self):
+        """Test the check fails when the schema does not match the code."""
+        with tempfile.NamedTemporaryFile(suffix='.yml') as outdated:
+            with override_settings(SCHEMA_FILE=outdated.name), self.assertRaises(CommandError):
+                call_command('build_schema', '--check', stdout=StringIO(), stderr=StringIO())
+
+    def test_serve_schema(self):
+        """Test the schema is served with an ETag and revalidated."""
+        res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Content-Type'], 'application/vnd.oai.openapi')
+        self.assertEqual(res.content, schema.read_schema())
+        self.assertIn('max-age=300', res['Cache-Control'])
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, 304)
+
+    def test_serve_json(self):
+        """Test the schema is served as JSON with its own ETag."""
+        yaml_res = self.client.get(SCHEMA_URL)
+        res = self.client.get(SCHEMA_URL, {'format': 'json'})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('/api/menu/food-item/', json.loads(res.content)['paths'])
+        self.assertNotEqual(res['ETag'], yaml_res['ETag'])
+
+    def test_missing_schema_generated(self):
+        """Test the schema is generated once when it was not precomputed."""
+        with override_settings(SCHEMA_FILE='/nonexistent/schema.yml'), self.assertLogs('core.schema', 'WARNING'):
+            res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.content.startswith(b'openapi:'))
@@ -0,0 +1,132 @@
+"""
+Tests for the cache backed throttles.
+"""
+
+from contextlib import ExitStack
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework.throttling import SimpleRateThrottle
+
+from core.throttling import CounterRateThrottle
+
+TOKEN_URL = reverse('user:token')
+FOOD_ITEM_URL = reverse('menu:fooditem-list')
+ORDERS_URL = reverse('menu:order-list')
+
+RATES = {'anon': '5/min', 'user': '100/min', 'auth': '2/min', 'orders': '3/min'}
+
+
+@patch.object(SimpleRateThrottle, 'THROTTLE_RATES', RATES)
+class ThrottleTests(TestCase):
+    """Test requests are throttled per scope and client."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_auth_scope_throttled_per_ip(self):
+        """Test the token endpoint is throttled before checking credentials."""
+        payload = {'email': 'test@example.com', 'password': 'wrong'}
+
+        responses = [self.client.post(TOKEN_URL, payload) for _ in range(3)]
+
+        self.assertEqual([res.status_code for res in responses[:2]], [status.HTTP_400_BAD_REQUEST] * 2)
+        self.assertEqual(responses[2].status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', responses[2])
+
+        other = self.client.post(TOKEN_URL, payload, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(other.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_forwarded_for_is_ignored(self):
+        """Test clients cannot pick their own throttling key."""
+        payload = {'email': 'test@example.com', 'password': 'wrong'}
+        for address in ['1.1.1.1', '2.2.2.2']:
+            self.client.post(TOKEN_URL, payload, HTTP_X_FORWARDED_FOR=address)
+
+        res = self.client.post(TOKEN_URL, payload, HTTP_X_FORWARDED_FOR='3.3.3.3')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_remaining_budget_headers(self):
+        res = self.client.get(FOOD_ITEM_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['X-RateLimit-Limit'], '5')
+        self.assertEqual(res['X-RateLimit-Remaining'], '4')
+        self.assertEqual(res['X-RateLimit-Scope'], 'anon')
+
+    def test_orders_scope_throttled_per_user(self):
+        """Test the tightest throttle is reported and users are isolated."""
+        user = get_user_model().objects.create_user(email='user@example.com', password='pass123')
+        other = get_user_model().objects.create_user(email='other@example.com', password='pass123')
+        self.client.force_authenticate(user)
+
+        responses = [self.client.get(ORDERS_URL) for _ in range(4)]
+
+        self.assertEqual(responses[0]['X-RateLimit-Scope'], 'orders')
+        self.assertEqual(responses[2]['X-RateLimit-Remaining'], '0')
+        self.assertEqual(responses[3].status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(ORDERS_URL).status_code, status.HTTP_200_OK)
+
+    def test_one_counter_per_request(self):
+        """Test a request is counted in its view's scope only, with one increment and one read."""
+        user = get_user_model().objects.create_user(email='user@example.com', password='pass123')
+        self.client.force_authenticate(user)
+        self.client.get(ORDERS_URL)
+
+        with ExitStack() as stack, patch('menu.views.cached_cart', return_value=[]):
+            calls = {
+                method: stack.enter_context(patch.object(cache, method, wraps=getattr(cache, method)))
+                for method in ['get', 'get_many', 'incr', 'add', 'decr']
+            }
+            res = self.client.get(ORDERS_URL)
+
+        self.assertEqual(res['X-RateLimit-Scope'], 'orders')
+        self.assertEqual({method: mock.call_count for method, mock in calls.items()}, {
+            'get': 1, 'get_many': 0, 'incr': 1, 'add': 0, 'decr': 0,
+        })
+
+
+class FixedKeyThrottle(CounterRateThrottle):
+    rate = '3/min'
+    scope = 'test'
+
+    def get_cache_key(self, request, view):
+        return 'throttle_test'
+
+
+class SlidingWindowTests(TestCase):
+    """Test the sliding window arithmetic."""
+
+    def setUp(self):
+        cache.clear()
+        self.throttle = FixedKeyThrottle()
+
+    def allow(self, now):
+        self.throttle.timer = lambda: now
+        return self.throttle.allow_request(None, None)
+
+    def test_previous_window_slides_out(self):
+        """Test the previous window only counts for the part still overlapping."""
+        self.assertEqual([self.allow(119) for _ in range(4)], [True, True, True, False])
+
+        # Half of the previous window still counts 30 seconds into the next one.
+        self.assertTrue(self.allow(150))
+        self.assertFalse(self.allow(150))
+        self.assertAlmostEqual(self.throttle.wait(), 10)
+        self.assertTrue(self.allow(160))
+
+    def test_wait_for_next_window(self):
+        self.assertEqual([self.allow(0) for _ in range(4)], [True, True, True, False])
+
+        self.assertAlmostEqual(self.throttle.wait(), 80)
+        self.assertFalse(self.allow(79))
+        self.assertTrue(self.allow(80))
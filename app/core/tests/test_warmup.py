@@ -0,0 +1,21 @@
+"""
+Tests for the worker warm-up.
+"""
+
+from django.test import SimpleTestCase
+
+from app import warmup
+from menu import serializers
+
+
+class WarmUpTests(SimpleTestCase):
+    """Test the warm-up covers the URLs and serializers of the API."""
+
+    def test_warm_code(self):
+        """Test URL patterns are compiled and serializers of the API views are built."""
+        patterns = warmup.resolve_urls()
+        serializer_classes = warmup.build_serializers(patterns)
+
+        self.assertIn('fooditem-list', [pattern.name for pattern in patterns])
+        self.assertIn(serializers.FoodItemSerializer, serializer_classes)
+        self.assertIn(serializers.OrderDetailSerializer, serializer_classes)
@@ -0,0 +1,108 @@
+"""
+Rate limiting backed by atomic counters in the shared cache.
+
+DRF's throttles keep a list of request timestamps per client and rewrite it
+on every request, which is a read-modify-write that races across workers.
+These throttles only use ``cache.incr``, which is atomic on shared backends
+such as memcached, so limits hold across every uwsgi worker.
+
+RateThrottle counts each request in one scope, so a request costs one
+counter increment and one read of the previous window, whatever the view.
+"""
+
+import math
+
+from rest_framework import throttling
+
+
+class CounterRateThrottle(throttling.SimpleRateThrottle):
+    """
+    Sliding window rate limit built from two fixed window counters.
+
+    The request budget refills continuously: the count of the previous
+    window is weighted by how much of it still overlaps the sliding window.
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window, offset = divmod(self.now, self.duration)
+        current_key = f'{self.key}_{int(window)}'
+
+        self.count = self._increment(current_key)
+        self.previous = self.cache.get(f'{self.key}_{int(window) - 1}', 0)
+        self.used = self.previous * (1 - offset / self.duration) + self.count
+        allowed = self.used <= self.num_requests
+        if not allowed:
+            # Rejected requests do not use up the budget.
+            self.cache.decr(current_key)
+            self.used -= 1
+        self._set_headers(view)
+
+        return allowed
+
+    def _increment(self, key):
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # First request of the window, or the counter just expired.
+            if self.cache.add(key, 1, self.duration * 2):
+                return 1
+            return self.cache.incr(key)
+
+    def _set_headers(self, view):
+        remaining = max(0, math.floor(self.num_requests - self.used))
+        headers = getattr(view, 'headers', None)
+        if headers is None:
+            return
+
+        # With several throttles on a view, report the tightest budget.
+        if int(headers.get('X-RateLimit-Remaining', remaining + 1)) <= remaining:
+            return
+        headers['X-RateLimit-Limit'] = str(self.num_requests)
+        headers['X-RateLimit-Remaining'] = str(remaining)
+        headers['X-RateLimit-Scope'] = self.scope
+
+    def wait(self):
+        offset = self.now % self.duration
+        if self.count <= self.num_requests:
+            # Wait for enough of the previous window to slide out.
+            spare = (self.num_requests - self.count) / self.previous
+            return max(0, self.duration * (1 - spare) - offset)
+
+        # Wait for the next window and for enough of this one to slide out.
+        spare = (self.num_requests - 1) / (self.count - 1)
+        return self.duration - offset + self.duration * (1 - spare)
+
+
+class RateThrottle(CounterRateThrottle):
+    """
+    Limit requests per user, or per IP address for anonymous requests, in the
+    `throttle_scope` of the view, or in the 'user' or 'anon' scope without one.
+    """
+
+    def __init__(self):
+        # The scope, and so the rate, depends on the request.
+        pass
+
+    def allow_request(self, request, view):
+        authenticated = request.user and request.user.is_authenticated
+        self.scope = getattr(view, 'throttle_scope', None) or ('user' if authenticated else 'anon')
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
@@ -0,0 +1,115 @@
+"""
+Health endpoints for the orchestrator, metrics and the precomputed API schema.
+
+Plain Django views, so requests skip DRF, authentication and throttling.
+Readiness results are cached in process so frequent probes stay cheap.
+"""
+
+import time
+
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.cache import cache_control, never_cache
+from django.views.decorators.http import condition, require_safe
+from django.views.decorators.vary import vary_on_headers
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from core.metrics import exposition_registry
+from core.schema import load_schema
+
+# Seconds a database check is reused by the following probes.
+DATABASE_CHECK_INTERVAL = 5
+
+# Seconds before pending migrations are checked again.
+MIGRATION_CHECK_INTERVAL = 10
+
+_checks = {}
+
+
+def _cached(name, interval, check):
+    checked = _checks.get(name)
+    if checked and time.monotonic() - checked[0] < interval:
+        return checked[1]
+
+    result = check()
+    _checks[name] = (time.monotonic(), result)
+    return result
+
+
+def _database_ok():
+    connection = connections[DEFAULT_DB_ALIAS]
+    try:
+        # Reuse the persistent connection of this worker when it is still usable.
+        if connection.connection is None or not connection.is_usable():
+            connection.close()
+            connection.ensure_connection()
+    except DatabaseError:
+        return False
+
+    return True
+
+
+def _migrations_ok():
+    try:
+        executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+        targets = executor.loader.graph.leaf_nodes()
+        return not executor.migration_plan(targets)
+    except DatabaseError:
+        return False
+
+
+def database_ready():
+    return _cached('database', DATABASE_CHECK_INTERVAL, _database_ok)
+
+
+def migrations_applied():
+    # Once applied, migrations stay applied for the life of the process.
+    if _checks.get('migrations', (None, False))[1]:
+        return True
+
+    return _cached('migrations', MIGRATION_CHECK_INTERVAL, _migrations_ok)
+
+
+@never_cache
+@require_safe
+def liveness(request):
+    """Report that the process is up, without touching the database."""
+    return JsonResponse({'status': 'ok'})
+
+
+@never_cache
+@require_safe
+def readiness(request):
+    """Report whether the database is reachable and fully migrated."""
+    database = database_ready()
+    migrations = database and migrations_applied()
+    ready = database and migrations
+
+    return JsonResponse(
+        {'status': 'ok' if ready else 'unavailable', 'database': database, 'migrations': migrations},
+        status=200 if ready else 503,
+    )
+
+
+@never_cache
+@require_safe
+def metrics(request):
+    """Expose the metrics of every worker in the Prometheus text format."""
+    return HttpResponse(generate_latest(exposition_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+def schema_format(request):
+    if request.GET.get('format') == 'json' or 'json' in request.headers.get('Accept', ''):
+        return 'json'
+    return 'yaml'
+
+
+@require_safe
+@vary_on_headers('Accept')
+@cache_control(public=True, max_age=300)
+@condition(etag_func=lambda request: load_schema(schema_format(request)).etag)
+def schema(request):
+    """Serve the precomputed OpenAPI schema as YAML, or JSON if asked for."""
+    document = load_schema(schema_format(request))
+    return HttpResponse(document.content, content_type=document.content_type)
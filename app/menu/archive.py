@@ -0,0 +1,134 @@
+"""
+Archive old, finished orders out of the order tables.
+
+Each batch is moved in its own transaction and archived orders are removed
+from the order tables, so an interrupted run resumes where it stopped.
+"""
+
+import time
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import ArchivedOrder, ArchivedOrderFoodItem, Order, OrderFoodItem, Watermark
+
+ARCHIVE_STATUSES = ['DELIVERED', 'CANCELLED']
+
+WATERMARK_NAME = 'order_archive'
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def month_of(value):
+    return timezone.localtime(value).date().replace(day=1)
+
+
+def archived_until():
+    """Return the cutoff of the latest archive run, orders placed before it may be archived."""
+    return Watermark.objects.filter(name=WATERMARK_NAME).values_list('value', flat=True).first()
+
+
+def _advance_watermark(cutoff):
+    watermark, _ = Watermark.objects.get_or_create(name=WATERMARK_NAME)
+    if watermark.value is None or watermark.value < cutoff:
+        watermark.value = cutoff
+        watermark.save(update_fields=['value'])
+
+
+def archive_batch(cutoff, batch_size=DEFAULT_BATCH_SIZE):
+    """Archive one batch of finished orders placed before the cutoff, return how many were moved."""
+    with transaction.atomic():
+        orders = list(
+            Order.objects.select_for_update(skip_locked=True).filter(
+                status__in=ARCHIVE_STATUSES, date__lt=cutoff,
+            ).order_by('id').values(
+                'id', 'user_id', 'date', 'updated', 'status', 'payment_method', 'delivery_address_id', 'paired',
+            )[:batch_size]
+        )
+        if not orders:
+            return 0
+
+        order_ids = [order['id'] for order in orders]
+        lines = Order.order_items.through.objects.filter(order_id__in=order_ids).values(
+            'order_id',
+            line_id=F('orderfooditem_id'),
+            food_item_id=F('orderfooditem__food_item_id'),
+            placed_price=F('orderfooditem__price'),
+            price=F('orderfooditem__food_item__price'),
+            quantity=F('orderfooditem__quantity'),
+        )
+        order_lines = {}
+        for line in lines:
+            # Lines placed before their price was stored are taken at the current price.
+            placed_price = line.pop('placed_price')
+            if placed_price is not None:
+                line['price'] = placed_price
+            order_lines.setdefault(line['order_id'], []).append(line)
+
+        archived_orders, archived_lines = [], []
+        for order in orders:
+            month = month_of(order['date'])
+            lines = order_lines.get(order['id'], [])
+            archived_orders.append(ArchivedOrder(
+                **order,
+                month=month,
+                # Lines of deleted food items no longer have a price.
+                total_price=sum(line['price'] * line['quantity'] for line in lines if line['price'] is not None),
+                total_items=sum(line['quantity'] for line in lines),
+            ))
+            archived_lines.extend(
+                ArchivedOrderFoodItem(
+                    id=line['line_id'],
+                    month=month,
+                    order_id=order['id'],
+                    food_item_id=line['food_item_id'],
+                    price=line['price'],
+                    quantity=line['quantity'],
+                )
+                for line in lines
+            )
+
+        ArchivedOrder.objects.bulk_create(archived_orders)
+        ArchivedOrderFoodItem.objects.bulk_create(archived_lines)
+        Order.order_items.through.objects.filter(order_id__in=order_ids).delete()
+        OrderFoodItem.objects.filter(id__in=[line.id for line in archived_lines]).delete()
+        Order.objects.filter(id__in=order_ids).delete()
+
+    return len(orders)
+
+
+def archive_orders(cutoff, batch_size=DEFAULT_BATCH_SIZE, max_batches=None, pause=0):
+    """Archive finished orders placed before the cutoff in batches, yield the size of each batch."""
+    _advance_watermark(cutoff)
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(cutoff, batch_size)
+        if not moved:
+            return
+        batches += 1
+        yield moved
+        if pause:
+            time.sleep(pause)
+
+
+def history_page(user, orders, offset=0, limit=None, archived=None):
+    """
+    Return a page of the order history of a user as (orders, archived orders).
+
+    The history lists the orders first and the archived orders after them, so
+    the archive is only read when a page reaches past the orders. The archived
+    orders can be given as a queryset to load only some of their fields.
+    """
+    end = offset + limit if limit is not None else None
+    page = list(orders[offset:end])
+    if limit is not None and len(page) == limit:
+        return page, []
+
+    skip = offset - orders.count() if offset and not page else 0
+    if archived is None:
+        archived = ArchivedOrder.objects.filter(user=user).prefetch_related('order_items__food_item')
+    archived = archived.order_by('-id')
+    end = skip + limit - len(page) if limit is not None else None
+
+    return page, list(archived[skip:end])
@@ -0,0 +1,73 @@
+"""
+Everything the app loads at launch, in a single response.
+
+Every section carries an ETag of its data. Sections whose ETag the client
+sends back are returned without their data. The ETA of orders is left out
+of the ETag, as it is computed from the clock on every request.
+"""
+
+import hashlib
+
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+from core.metrics import record_cache
+from core.models import FoodItem
+from menu.cache import menu_key
+from menu.serializers import FoodItemSerializer
+from menu.sparse import optimize_queryset
+
+SECTIONS = ['user', 'addresses', 'menu', 'cart', 'history']
+
+# Fields computed on every request, which would change the ETag each time.
+VOLATILE_FIELDS = {'eta'}
+
+
+def stable(data):
+    """Return the data without its volatile fields."""
+    if isinstance(data, list):
+        return [stable(item) for item in data]
+    if isinstance(data, dict):
+        return {name: stable(value) for name, value in data.items() if name not in VOLATILE_FIELDS}
+
+    return data
+
+
+def etag_of(data):
+    """Return the ETag of the data of a section."""
+    return f'"{hashlib.sha256(JSONRenderer().render(stable(data))).hexdigest()[:32]}"'
+
+
+def parse_etags(value):
+    """Parse 'section:etag' pairs separated by commas into a dict."""
+    etags = {}
+    for pair in value.split(','):
+        name, _, etag = pair.strip().partition(':')
+        if name in SECTIONS and etag:
+            etags[name] = etag
+
+    return etags
+
+
+def menu_section(request):
+    """Return the ETag and the data of the menu, shared by every user through the cache."""
+    # Image URLs are absolute, so they depend on the host.
+    key = menu_key(f'bootstrap:{request.get_host()}')
+    section = cache.get(key)
+    record_cache('bootstrap_menu', section is not None)
+    if section is None:
+        food_items = optimize_queryset(FoodItem.objects.order_by('id'), FoodItemSerializer())
+        data = list(FoodItemSerializer(food_items, many=True, context={'request': request}).data)
+        section = (etag_of(data), data)
+        cache.set(key, section)
+
+    return section
+
+
+def section(data, known_etag=None, etag=None):
+    """Return a section of the response, without its data if the client has it."""
+    etag = etag or etag_of(data)
+    if etag == known_etag:
+        return {'etag': etag}
+
+    return {'etag': etag, 'data': data}
@@ -0,0 +1,59 @@
+"""
+Cached menu and cart representations.
+
+Cache keys embed a menu version which is replaced whenever the menu changes,
+so every cached representation is dropped at once. Carts are cached per user
+and replaced whenever the cart changes.
+"""
+
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.metrics import record_cache
+
+MENU_VERSION_KEY = 'menu:version'
+
+
+def menu_version():
+    """Return the current menu version, creating one if needed."""
+    version = cache.get(MENU_VERSION_KEY)
+    if version is None:
+        cache.add(MENU_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(MENU_VERSION_KEY)
+
+    return version
+
+
+def menu_key(name):
+    """Return the cache key for a menu representation."""
+    return f'menu:{menu_version()}:{name}'
+
+
+def invalidate_menu():
+    """Drop every cached menu representation."""
+    cache.set(MENU_VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def cart_key(user_id):
+    """Return the cache key for the open cart of a user."""
+    return f'cart:{user_id}'
+
+
+def cached_cart(user_id):
+    """Return the cached representation of the open cart of a user, or None."""
+    data = cache.get(cart_key(user_id))
+    record_cache('cart', data is not None)
+
+    return data
+
+
+def cache_cart(user_id, data):
+    """Cache the representation of the open cart of a user."""
+    cache.set(cart_key(user_id), data, settings.CART_CACHE_TIMEOUT)
+
+
+def invalidate_carts(user_ids):
+    """Drop the cached carts of the users."""
+    cache.delete_many([cart_key(user_id) for user_id in user_ids])
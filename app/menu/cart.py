@@ -0,0 +1,63 @@
+"""
+Changes to the open cart of a user.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+
+from core.models import Order, OrderFoodItem
+from menu.cache import invalidate_carts
+
+
+def bulk_update_cart(user, updates, deletions):
+    """
+    Change the quantities of and delete lines of the open cart of a user.
+
+    Every line must belong to the cart. Return the cart.
+    """
+    with transaction.atomic():
+        cart = Order.objects.select_for_update().filter(user=user, status='NOT_PLACED').first()
+        if cart is None:
+            raise NotFound('There is no open cart.')
+
+        ids = [change['id'] for change in updates] + list(deletions)
+        lines = OrderFoodItem.objects.filter(id__in=ids, order=cart).in_bulk()
+        unknown = sorted(set(ids) - lines.keys())
+        if unknown:
+            raise ValidationError({'id': [f'Line {line_id} is not in the cart.' for line_id in unknown]})
+
+        changed = []
+        for change in updates:
+            line = lines[change['id']]
+            if line.quantity != change['quantity']:
+                line.quantity = change['quantity']
+                changed.append(line)
+        OrderFoodItem.objects.bulk_update(changed, ['quantity'])
+        if deletions:
+            OrderFoodItem.objects.filter(id__in=deletions).delete()
+        Order.objects.filter(id=cart.id).update_totals(updated=timezone.now())
+
+    return cart
+
+
+def carts_holding(food_items):
+    """Return (id, user id) pairs of the open carts holding the food items."""
+    return list(
+        Order.objects.filter(status='NOT_PLACED', order_items__food_item__in=food_items)
+        .values_list('id', 'user_id').distinct()
+    )
+
+
+def refresh_carts(carts):
+    """
+    Recompute the totals of carts after their food items changed.
+
+    Takes (id, user id) pairs, and drops the cached carts once committed.
+    """
+    if not carts:
+        return
+
+    cart_ids, user_ids = zip(*carts)
+    Order.objects.filter(id__in=cart_ids).update_totals()
+    transaction.on_commit(lambda: invalidate_carts(user_ids))
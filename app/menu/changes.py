@@ -0,0 +1,51 @@
+"""
+Change versions of the menu, so clients can sync a local copy.
+
+Every change to a food item stamps it with the next menu version, and
+deleted food items leave a tombstone with theirs. The counter row handing
+out versions stays locked until the change commits, so versions become
+visible in order and a client holding a version never misses a change
+below it.
+"""
+
+from django.db import transaction
+
+from core.models import Counter, FoodItem, FoodItemTombstone
+
+COUNTER = 'menu'
+
+
+def next_version():
+    """Return the next menu version, locking the counter until the transaction commits."""
+    return Counter.objects.next(COUNTER)
+
+
+def current_version():
+    """Return the last menu version handed out."""
+    return Counter.objects.filter(name=COUNTER).values_list('value', flat=True).first() or 0
+
+
+def stamp(food_item_ids):
+    """Stamp the food items with a new menu version and return it."""
+    with transaction.atomic():
+        version = next_version()
+        FoodItem.objects.filter(id__in=food_item_ids).update(version=version)
+
+    return version
+
+
+def bury(food_item_ids):
+    """Leave tombstones for deleted food items."""
+    with transaction.atomic():
+        version = next_version()
+        FoodItemTombstone.objects.bulk_create([
+            FoodItemTombstone(food_item_id=food_item_id, version=version) for food_item_id in food_item_ids
+        ])
+
+
+def changes_since(version):
+    """Return the food items changed and the ids of those deleted after a version."""
+    changed = FoodItem.objects.filter(version__gt=version).order_by('version', 'id')
+    deleted = FoodItemTombstone.objects.filter(version__gt=version).values_list('food_item_id', flat=True)
+
+    return changed, list(deleted)
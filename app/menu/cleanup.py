@@ -0,0 +1,57 @@
+"""
+Delete abandoned carts and order lines that no longer belong to an order.
+
+Rows are deleted in short transactions over consecutive id ranges, so no
+statement holds locks for long and a run can be stopped at any point.
+"""
+
+import time
+
+from django.db import transaction
+
+from core.models import Order, OrderFoodItem
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _id_ranges(queryset, batch_size):
+    """Yield the first and last id of consecutive chunks of a queryset."""
+    last_id = 0
+    while True:
+        ids = list(queryset.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return
+        yield ids[0], ids[-1]
+        last_id = ids[-1]
+
+
+def expire_carts(cutoff, batch_size=DEFAULT_BATCH_SIZE, pause=0):
+    """Delete carts not changed since the cutoff with their lines, return (carts, lines) deleted."""
+    carts = Order.objects.filter(status='NOT_PLACED', updated__lt=cutoff)
+    deleted_carts = deleted_lines = 0
+    for first, last in _id_ranges(carts, batch_size):
+        with transaction.atomic():
+            # Check again under lock, the cart may have been used meanwhile.
+            cart_ids = list(carts.select_for_update().filter(id__range=(first, last)).values_list('id', flat=True))
+            line_ids = list(
+                Order.order_items.through.objects.filter(order_id__in=cart_ids).values_list(
+                    'orderfooditem_id', flat=True,
+                )
+            )
+            deleted_carts += Order.objects.filter(id__in=cart_ids).delete()[1].get(Order._meta.label, 0)
+            deleted_lines += OrderFoodItem.objects.filter(id__in=line_ids).delete()[0]
+        if pause:
+            time.sleep(pause)
+
+    return deleted_carts, deleted_lines
+
+
+def delete_orphaned_lines(batch_size=DEFAULT_BATCH_SIZE, pause=0):
+    """Delete order lines that belong to no order, return how many were deleted."""
+    deleted = 0
+    for first, last in _id_ranges(OrderFoodItem.objects.all(), batch_size):
+        deleted += OrderFoodItem.objects.filter(id__range=(first, last), order__isnull=True).delete()[0]
+        if pause:
+            time.sleep(pause)
+
+    return deleted
@@ -0,0 +1,144 @@
+"""
+Stock of food items, taken when orders are placed.
+
+Stock is only changed with conditional UPDATEs, so concurrent orders never
+read a stock level and write it back. The stock of very popular food items
+can be spread over shards, so concurrent orders lock different rows.
+"""
+
+import random
+
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q, Subquery, Sum
+from rest_framework.exceptions import PermissionDenied, ValidationError
+
+from core.models import FoodItem, Order, StockShard
+from menu.cache import invalidate_menu
+from menu.cart import carts_holding, refresh_carts
+from menu.changes import next_version
+from menu.kitchen import estimate_prep
+
+MAX_STOCK_SHARDS = 64
+
+
+class OutOfStock(Exception):
+    """Raised with the ids of the food items short of stock."""
+
+    def __init__(self, food_item_ids):
+        super().__init__(food_item_ids)
+        self.food_item_ids = food_item_ids
+
+
+def set_stock(food_item, stock, shards=1):
+    """Set the units left of a food item, spread over shards, or stop tracking them with None."""
+    with transaction.atomic():
+        StockShard.objects.filter(food_item=food_item).delete()
+        if stock is not None and shards > 1:
+            share, extra = divmod(stock, shards)
+            StockShard.objects.bulk_create([
+                StockShard(food_item=food_item, shard=shard, stock=share + (shard < extra))
+                for shard in range(shards)
+            ])
+            stock = None
+        else:
+            shards = 1
+        FoodItem.objects.filter(id=food_item.id).update(stock=stock, stock_shards=shards)
+        food_item.stock, food_item.stock_shards = stock, shards
+
+
+def total_stock(food_item):
+    """Return the units left of a food item, or None when they are not tracked."""
+    if food_item.stock_shards > 1:
+        return food_item.shards.aggregate(total=Sum('stock'))['total'] or 0
+
+    return food_item.stock
+
+
+def _take_from_shards(food_item_id, quantity, shards):
+    # Start at a random shard so that concurrent orders spread over the rows.
+    start = random.randrange(shards)
+    for offset in range(shards):
+        shard = StockShard.objects.filter(food_item_id=food_item_id, shard=(start + offset) % shards)
+        if shard.filter(stock__gte=quantity).update(stock=F('stock') - quantity):
+            return True
+
+    # No shard holds enough on its own: take from several, locked in order.
+    locked = list(StockShard.objects.select_for_update().filter(food_item_id=food_item_id).order_by('shard'))
+    if sum(shard.stock for shard in locked) < quantity:
+        return False
+    for shard in locked:
+        taken = min(shard.stock, quantity)
+        if taken:
+            StockShard.objects.filter(id=shard.id).update(stock=F('stock') - taken)
+            quantity -= taken
+
+    return True
+
+
+def reserve_stock(quantities):
+    """
+    Take quantities of food items, by id, out of stock, all or nothing.
+
+    Raise OutOfStock when some are short. Food items whose stock runs out
+    become unavailable once the transaction commits.
+    """
+    tracked = FoodItem.objects.filter(id__in=quantities).filter(Q(stock__isnull=False) | Q(stock_shards__gt=1))
+    shards = dict(tracked.values_list('id', 'stock_shards'))
+
+    short = []
+    with transaction.atomic():
+        # Food items are taken in id order, so concurrent orders cannot deadlock.
+        for food_item_id in sorted(shards):
+            quantity = quantities[food_item_id]
+            if shards[food_item_id] > 1:
+                taken = _take_from_shards(food_item_id, quantity, shards[food_item_id])
+            else:
+                taken = FoodItem.objects.filter(id=food_item_id, stock__gte=quantity).update(
+                    stock=F('stock') - quantity,
+                )
+            if not taken:
+                short.append(food_item_id)
+        if short:
+            raise OutOfStock(short)
+
+    if shards:
+        # Checked after commit, so the last order to commit sees every unit taken.
+        transaction.on_commit(lambda: mark_sold_out(list(shards)))
+
+
+def place_cart(cart):
+    """
+    Lock an open cart about to be placed, take its food items out of stock
+    and estimate how long the kitchen needs for it.
+    """
+    if not Order.objects.select_for_update().filter(id=cart.id, status='NOT_PLACED').exists():
+        raise PermissionDenied('The order has already been placed.')
+
+    lines = list(cart.order_items.filter(food_item__isnull=False).values('food_item', 'food_item__type').annotate(
+        total=Sum('quantity'),
+    ))
+    cart.prep_seconds = estimate_prep((line['food_item'], line['food_item__type']) for line in lines)
+    try:
+        reserve_stock({line['food_item']: line['total'] for line in lines})
+    except OutOfStock as exc:
+        names = FoodItem.objects.filter(id__in=exc.food_item_ids).values_list('name', flat=True)
+        raise ValidationError({'order_items': [f'{name} is sold out.' for name in names]})
+    # Sales are counted at the prices the order was placed at.
+    cart.order_items.update(price=Subquery(FoodItem.objects.filter(id=OuterRef('food_item')).values('price')))
+
+
+def mark_sold_out(food_item_ids):
+    """Make the food items without stock left unavailable, return their ids."""
+    stocked_shards = StockShard.objects.filter(food_item=OuterRef('pk'), stock__gt=0)
+    sold_out = list(
+        FoodItem.objects.filter(id__in=food_item_ids, available=True).filter(
+            Q(stock_shards=1, stock=0) | Q(Q(stock_shards__gt=1) & ~Exists(stocked_shards)),
+        ).values_list('id', flat=True)
+    )
+    if sold_out:
+        with transaction.atomic():
+            FoodItem.objects.filter(id__in=sold_out).update(available=False, version=next_version())
+            refresh_carts(carts_holding(sold_out))
+            transaction.on_commit(invalidate_menu)
+
+    return sold_out
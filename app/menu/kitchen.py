@@ -0,0 +1,209 @@
+"""
+Preparation time statistics of the kitchen and the ETA of orders.
+
+When an order becomes READY, the time since it started PREPARING is added
+to the statistics of its food items, of their food types and of the whole
+kitchen. Each keeps a P² sketch of the median of a window of observations,
+five markers whatever the number of orders, and starts a new window after
+PREP_TIME_WINDOW observations so the estimates follow the kitchen.
+
+Orders get their expected preparation time when they are placed. Orders
+entering the kitchen take a queue ticket, and a counter adds up those that
+left it, so the orders ahead of a ticket are those handed out before it
+less those served. Their ETA adds the time the orders ahead need, from the
+cached counters, so rendering an ETA runs no query.
+"""
+
+import bisect
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import QUEUE_SERVED, QUEUE_TICKETS, Counter, PrepTimeStats
+
+STATS_KEY = 'kitchen:stats'
+QUEUE_KEY = 'kitchen:queue'
+
+# Observations of a new window before its median replaces the previous one.
+MIN_OBSERVATIONS = 10
+
+KITCHEN_STATUSES = ['PENDING', 'CONFIRMED', 'PREPARING']
+
+
+class P2Quantile:
+    """
+    P² estimate of a quantile of a stream, after Jain and Chlamtac (1985).
+
+    Keeps the heights and positions of five markers, the middle one tracking
+    the quantile. The state is a dict, so it can be stored as JSON.
+    """
+
+    def __init__(self, p, state=None):
+        self.p = p
+        state = state or {}
+        self.count = state.get('count', 0)
+        self.heights = list(state.get('heights', []))
+        self.positions = list(state.get('positions', [1, 2, 3, 4, 5]))
+
+    def state(self):
+        return {'count': self.count, 'heights': self.heights, 'positions': self.positions}
+
+    def desired(self, index):
+        return 1 + (self.count - 1) * (0, self.p / 2, self.p, (1 + self.p) / 2, 1)[index]
+
+    def add(self, value):
+        self.count += 1
+        heights, positions = self.heights, self.positions
+        if self.count <= 5:
+            bisect.insort(heights, value)
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+        elif value > heights[4]:
+            heights[4] = value
+        for index in range(bisect.bisect_right(heights, value, 1, 4), 5):
+            positions[index] += 1
+
+        for index in range(1, 4):
+            offset = self.desired(index) - positions[index]
+            if (
+                (offset >= 1 and positions[index + 1] - positions[index] > 1)
+                or (offset <= -1 and positions[index - 1] - positions[index] < -1)
+            ):
+                step = 1 if offset > 0 else -1
+                height = self.parabolic(index, step)
+                if not heights[index - 1] < height < heights[index + 1]:
+                    height = heights[index] + step * (
+                        (heights[index + step] - heights[index]) / (positions[index + step] - positions[index])
+                    )
+                heights[index] = height
+                positions[index] += step
+
+    def parabolic(self, index, step):
+        heights, positions = self.heights, self.positions
+        below, here, above = positions[index - 1], positions[index], positions[index + 1]
+        return heights[index] + step / (above - below) * (
+            (here - below + step) * (heights[index + 1] - heights[index]) / (above - here)
+            + (above - here - step) * (heights[index] - heights[index - 1]) / (here - below)
+        )
+
+    def value(self):
+        if not self.count:
+            return None
+        if self.count <= 5:
+            return self.heights[round(self.p * (self.count - 1))]
+        return self.heights[2]
+
+
+def stats_keys(food_items):
+    """Return the scope and key of the statistics of (food item id, food type) pairs."""
+    keys = {('kitchen', '')}
+    for food_item_id, food_type in food_items:
+        keys.update({('food_item', str(food_item_id)), ('type', food_type)})
+
+    return sorted(keys)
+
+
+def record_prep_time(order):
+    """Add the preparation time of an order that became ready to the statistics."""
+    if order.preparing_at is None or order.ready_at is None:
+        return
+    seconds = (order.ready_at - order.preparing_at).total_seconds()
+    food_items = order.order_items.filter(food_item__isnull=False).values_list('food_item', 'food_item__type')
+    keys = stats_keys(food_items)
+
+    with transaction.atomic():
+        PrepTimeStats.objects.bulk_create(
+            [PrepTimeStats(scope=scope, key=key) for scope, key in keys], ignore_conflicts=True,
+        )
+        # Locked in key order, so concurrent orders cannot deadlock.
+        rows = PrepTimeStats.objects.select_for_update().filter(
+            scope__in={scope for scope, _ in keys}, key__in={key for _, key in keys},
+        ).order_by('scope', 'key')
+        changed = []
+        for stats in rows:
+            if (stats.scope, stats.key) not in keys:
+                continue
+            sketch = P2Quantile(0.5, stats.sketch)
+            if sketch.count >= settings.PREP_TIME_WINDOW:
+                sketch = P2Quantile(0.5)
+            sketch.add(seconds)
+            stats.sketch = sketch.state()
+            if sketch.count >= MIN_OBSERVATIONS or stats.median is None:
+                stats.median = sketch.value()
+            changed.append(stats)
+        PrepTimeStats.objects.bulk_update(changed, ['sketch', 'median'])
+        transaction.on_commit(lambda: cache.delete(STATS_KEY))
+
+
+def prep_medians():
+    """Return the median preparation times by scope and key, cached until they change."""
+    medians = cache.get(STATS_KEY)
+    if medians is None:
+        medians = {
+            (scope, key): median
+            for scope, key, median in PrepTimeStats.objects.filter(median__isnull=False).values_list(
+                'scope', 'key', 'median',
+            )
+        }
+        cache.set(STATS_KEY, medians, None)
+
+    return medians
+
+
+def estimate_prep(food_items):
+    """Return the seconds the kitchen needs for (food item id, food type) pairs, the slowest one."""
+    medians = prep_medians()
+    default = medians.get(('kitchen', ''), settings.PREP_TIME_DEFAULT)
+    estimates = [
+        medians.get(('food_item', str(food_item_id)), medians.get(('type', food_type), default))
+        for food_item_id, food_type in food_items
+    ]
+
+    return max(estimates, default=default)
+
+
+def kitchen_queue():
+    """Return the queue tickets handed out and the orders served, cached until they change."""
+    queue = cache.get(QUEUE_KEY)
+    if queue is None:
+        queue = dict.fromkeys([QUEUE_TICKETS, QUEUE_SERVED], 0)
+        queue.update(Counter.objects.filter(name__in=list(queue)).values_list('name', 'value'))
+        cache.set(QUEUE_KEY, queue, None)
+
+    return queue
+
+
+def invalidate_queue():
+    """Drop the cached queue counters once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete(QUEUE_KEY))
+
+
+def order_eta(order):
+    """Return when an order should be ready, or None when it is not in the kitchen."""
+    if order.status == 'READY':
+        return order.ready_at
+    if order.status not in KITCHEN_STATUSES:
+        return None
+
+    medians = prep_medians()
+    kitchen = medians.get(('kitchen', ''), settings.PREP_TIME_DEFAULT)
+    prep = order.prep_seconds if order.prep_seconds is not None else kitchen
+    if order.status == 'PREPARING' and order.preparing_at:
+        return max(order.preparing_at + timedelta(seconds=prep), timezone.now())
+
+    queue = kitchen_queue()
+    if order.queue_ticket is None:
+        # Not confirmed yet, so behind every order in the kitchen.
+        ahead = queue[QUEUE_TICKETS] - queue[QUEUE_SERVED]
+    else:
+        # Orders served before older ones can take the count below zero.
+        ahead = max(order.queue_ticket - 1 - queue[QUEUE_SERVED], 0)
+    # The kitchen prepares KITCHEN_CAPACITY orders at once, in turns.
+    waiting = ahead // settings.KITCHEN_CAPACITY * kitchen
+
+    return timezone.now() + timedelta(seconds=waiting + prep)
@@ -0,0 +1,41 @@
+'''
+Move old delivered and cancelled orders to the archive tables.
+'''
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from analytics.rollups import refresh_sales_rollups
+from menu.archive import DEFAULT_BATCH_SIZE, archive_orders
+
+
+class Command(BaseCommand):
+    help = 'Archive delivered and cancelled orders older than a number of days.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=settings.ORDER_ARCHIVE_AFTER_DAYS,
+            help='Archive orders placed more than this many days ago.',
+        )
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches, run again to resume.')
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between batches.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        # Archived orders are no longer counted when rollups are rebuilt, so
+        # bring them up to date before their days are frozen.
+        refresh_sales_rollups()
+
+        total = 0
+        batches = archive_orders(cutoff, options['batch_size'], options['max_batches'], options['sleep'])
+        for moved in batches:
+            total += moved
+            self.stdout.write(f'Archived {total} order(s)...')
+
+        self.stdout.write(self.style.SUCCESS(f'Archived {total} order(s) placed before {cutoff:%Y-%m-%d}.'))
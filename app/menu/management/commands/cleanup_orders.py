@@ -0,0 +1,44 @@
+'''
+Delete abandoned carts and orphaned order lines.
+'''
+
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from menu.cleanup import DEFAULT_BATCH_SIZE, delete_orphaned_lines, expire_carts
+
+
+class Command(BaseCommand):
+    help = 'Delete carts idle for a number of days and order lines that belong to no order.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cart-idle-days',
+            type=int,
+            default=settings.CART_EXPIRE_AFTER_DAYS,
+            help='Delete carts not changed for this many days.',
+        )
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--sleep', type=float, default=0.05, help='Seconds to pause between batches.')
+        parser.add_argument('--every', type=float, help='Keep running, starting a pass every this many seconds.')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.monotonic()
+            self.clean(options)
+            if not options['every']:
+                return
+            time.sleep(max(0, options['every'] - (time.monotonic() - started)))
+
+    def clean(self, options):
+        cutoff = timezone.now() - timedelta(days=options['cart_idle_days'])
+        carts, cart_lines = expire_carts(cutoff, options['batch_size'], options['sleep'])
+        orphans = delete_orphaned_lines(options['batch_size'], options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {carts} abandoned cart(s) with {cart_lines} line(s) and {orphans} orphaned line(s).'
+        ))
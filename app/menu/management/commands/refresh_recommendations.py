@@ -0,0 +1,26 @@
+'''
+Count the orders placed since the last run into the food item pairings.
+
+Archived orders are counted too, so --full rebuilds the pairings from every
+live and archived order.
+'''
+
+from django.core.management.base import BaseCommand
+
+from menu.recommendations import DEFAULT_BATCH_SIZE, refresh_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Refresh the food items recommended with each other.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Count every live and archived order again instead of only the orders placed since the last run.',
+        )
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        count = refresh_recommendations(full=options['full'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Counted {count} order(s) into the recommendations.'))
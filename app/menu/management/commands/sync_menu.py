@@ -0,0 +1,48 @@
+'''
+Synchronise the menu with a CSV or JSON lines export from the point of sale.
+'''
+
+from django.core.management.base import BaseCommand, CommandError
+
+from menu.sync import DEFAULT_BATCH_SIZE, FORMATS, MenuSyncError, format_from_name, sync_menu
+
+
+class Command(BaseCommand):
+    help = 'Create, update and deactivate food items from a menu file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON lines menu file.')
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to the file extension.')
+        parser.add_argument('--dry-run', action='store_true', help='Print the changes without applying them.')
+        parser.add_argument(
+            '--keep-missing',
+            action='store_true',
+            help='Leave food items missing from the file available.',
+        )
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            file_format = options['format'] or format_from_name(options['path'])
+            with open(options['path'], newline='', encoding='utf-8') as lines:
+                plan = sync_menu(
+                    lines,
+                    file_format,
+                    dry_run=options['dry_run'],
+                    deactivate_missing=not options['keep_missing'],
+                    batch_size=options['batch_size'],
+                )
+        except MenuSyncError as exc:
+            raise CommandError(f'Invalid menu file: {exc.errors}')
+
+        if options['dry_run']:
+            for food_item in plan.create:
+                self.stdout.write(f'create {food_item.external_id}: {food_item.name}')
+            for food_item in plan.update:
+                self.stdout.write(f'update {food_item.external_id}: {food_item.name}')
+            for food_item in plan.deactivate:
+                self.stdout.write(f'deactivate {food_item.external_id}: {food_item.name}')
+
+        summary = ', '.join(f'{count} {action}' for action, count in plan.summary().items())
+        prefix = 'Dry run, nothing applied: ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(f'{prefix}{summary}.'))
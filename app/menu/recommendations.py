@@ -0,0 +1,189 @@
+"""
+Food items frequently ordered together, recommended in the cart.
+
+Placed orders are counted once into the pairings of their food items, the
+number of orders holding both food items of a pair. The pairs of a batch of
+orders are counted with NumPy array operations rather than loops over the
+lines. The food items paired most with each food item are then stored as
+its recommendations, so the cart reads them in one indexed query.
+
+Archived orders are counted like live ones, through their own paired
+flag, so orders archived before a run and full rebuilds keep their pairs.
+The counts are added up in Python, so the writes hold a lock on a
+watermark row and only one run writes at a time.
+"""
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+
+from core.models import (
+    ArchivedOrder,
+    ArchivedOrderFoodItem,
+    FoodItem,
+    FoodItemPairing,
+    Order,
+    Recommendation,
+    Watermark,
+)
+
+# Carts and cancelled orders are not counted.
+EXCLUDED_STATUSES = ['NOT_PLACED', 'CANCELLED']
+
+DEFAULT_BATCH_SIZE = 1000
+
+LOCK_NAME = 'recommendations'
+
+
+def lock_pairings():
+    """Wait for other runs to commit and keep them waiting until this transaction commits."""
+    Watermark.objects.select_for_update().get_or_create(name=LOCK_NAME)
+
+
+def co_occurrences(order_ids, food_item_ids):
+    """
+    Count the orders holding each pair of food items.
+
+    Takes the order and the food item of every line. Return arrays of the
+    food items and the other food items of the pairs, in both directions,
+    and of the number of orders holding each pair.
+    """
+    # A food item counts once per order, however many lines hold it.
+    lines = np.unique(np.column_stack([order_ids, food_item_ids]).astype(np.int64).reshape(-1, 2), axis=0)
+    orders, items = lines[:, 0], lines[:, 1]
+    _, starts, sizes = np.unique(orders, return_index=True, return_counts=True)
+
+    # Pair every line with every line of its order, itself excluded.
+    pairs_per_line = np.repeat(sizes, sizes)
+    left = np.repeat(np.arange(len(items)), pairs_per_line)
+    order_start = np.repeat(np.repeat(starts, sizes), pairs_per_line)
+    position = np.arange(len(left)) - np.repeat(np.cumsum(pairs_per_line) - pairs_per_line, pairs_per_line)
+    right = order_start + position
+    distinct = left != right
+
+    pairs, counts = np.unique(
+        np.column_stack([items[left[distinct]], items[right[distinct]]]).reshape(-1, 2), axis=0, return_counts=True,
+    )
+    return pairs[:, 0], pairs[:, 1], counts
+
+
+def top_pairings(food_items, others, counts, size):
+    """Return the indexes of the pairings with the highest counts of every food item, ties by id."""
+    ordered = np.lexsort((others, -counts, food_items))
+    grouped = food_items[ordered]
+    first = np.searchsorted(grouped, grouped)
+    return ordered[np.arange(len(ordered)) - first < size]
+
+
+def add_pairings(food_items, others, counts):
+    """Add counts to the pairings of food items, within a transaction holding lock_pairings."""
+    existing = {
+        (pairing.food_item_id, pairing.other_id): pairing
+        for pairing in FoodItemPairing.objects.filter(food_item__in=set(food_items.tolist()))
+    }
+    changed, created = [], []
+    for food_item_id, other_id, count in zip(food_items.tolist(), others.tolist(), counts.tolist()):
+        pairing = existing.get((food_item_id, other_id))
+        if pairing is None:
+            created.append(FoodItemPairing(food_item_id=food_item_id, other_id=other_id, count=count))
+        else:
+            pairing.count += count
+            changed.append(pairing)
+
+    FoodItemPairing.objects.bulk_update(changed, ['count'], batch_size=DEFAULT_BATCH_SIZE)
+    FoodItemPairing.objects.bulk_create(created, batch_size=DEFAULT_BATCH_SIZE)
+
+
+def update_recommendations(food_item_ids):
+    """Store the food items paired most with each of the food items as their recommendations."""
+    with transaction.atomic():
+        lock_pairings()
+        rows = FoodItemPairing.objects.filter(food_item__in=food_item_ids).values_list('food_item', 'other', 'count')
+        food_items, others, counts = np.array(list(rows), dtype=np.int64).reshape(-1, 3).T
+        top = top_pairings(food_items, others, counts, settings.RECOMMENDATIONS_PER_FOOD_ITEM)
+
+        Recommendation.objects.filter(food_item__in=food_item_ids).delete()
+        Recommendation.objects.bulk_create([
+            Recommendation(food_item_id=food_item_id, recommended_id=other_id, count=count)
+            for food_item_id, other_id, count in zip(
+                food_items[top].tolist(), others[top].tolist(), counts[top].tolist(),
+            )
+        ], batch_size=DEFAULT_BATCH_SIZE)
+
+
+def order_lines(order_ids):
+    """Return the order and the food item of the lines of live orders."""
+    return Order.order_items.through.objects.filter(
+        order_id__in=order_ids, orderfooditem__food_item__isnull=False,
+    ).values_list('order_id', 'orderfooditem__food_item')
+
+
+def archived_order_lines(order_ids):
+    """Return the order and the food item of the lines of archived orders."""
+    return ArchivedOrderFoodItem.objects.filter(
+        order_id__in=order_ids, food_item__isnull=False,
+    ).values_list('order_id', 'food_item')
+
+
+# Orders and their lines, live orders first.
+SOURCES = [(Order, order_lines), (ArchivedOrder, archived_order_lines)]
+
+
+def count_orders(model, lines_of, batch_size):
+    """Count the orders of a model not counted yet into the pairings, return how many and their food items."""
+    counted = 0
+    paired = set()
+    while True:
+        with transaction.atomic():
+            lock_pairings()
+            orders = model.objects.exclude(status__in=EXCLUDED_STATUSES).filter(paired=False).order_by('id')
+            ids = list(orders.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return counted, paired
+            model.objects.filter(id__in=ids).update(paired=True)
+
+            food_items, others, counts = co_occurrences(
+                *np.array(list(lines_of(ids)), dtype=np.int64).reshape(-1, 2).T,
+            )
+            add_pairings(food_items, others, counts)
+            paired.update(food_items.tolist())
+        counted += len(ids)
+
+
+def refresh_recommendations(full=False, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Count the live and archived orders placed since the last run into the
+    pairings and refresh the recommendations of their food items. Return the
+    number of orders counted.
+    """
+    if full:
+        with transaction.atomic():
+            lock_pairings()
+            for model, _ in SOURCES:
+                model.objects.filter(paired=True).update(paired=False)
+            FoodItemPairing.objects.all().delete()
+            Recommendation.objects.all().delete()
+
+    counted = 0
+    paired = set()
+    for model, lines_of in SOURCES:
+        orders, food_items = count_orders(model, lines_of, batch_size)
+        counted += orders
+        paired.update(food_items)
+
+    if paired:
+        update_recommendations(sorted(paired))
+
+    return counted
+
+
+def recommend(food_item_ids, limit):
+    """Return the available food items recommended most with the food items, not among them."""
+    return FoodItem.objects.filter(
+        recommended_with__food_item__in=food_item_ids, available=True,
+    ).exclude(
+        id__in=food_item_ids,
+    ).annotate(
+        score=Sum('recommended_with__count'),
+    ).order_by('-score', 'id')[:limit]
@@ -0,0 +1,136 @@
+"""
+Ranked menu search with prefix and typo tolerant matching.
+
+PostgreSQL searches the trigger maintained ``search_vector`` and falls back
+to trigram similarity on the name for typos. Other databases search an
+inverted index built in process and rebuilt whenever the menu version
+changes.
+"""
+
+import bisect
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection
+from django.db.models import F, Q
+
+from core.metrics import record_cache
+from core.models import FoodItem
+from menu.cache import menu_version
+
+TOKEN_RE = re.compile(r'\w+')
+
+NAME_WEIGHT = 2
+
+DESCRIPTION_WEIGHT = 1
+
+# Minimum trigram similarity of a misspelt word to an indexed word.
+FUZZY_THRESHOLD = 0.4
+
+_index = {}
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def trigrams(word):
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """Inverted index of the words of the food item names and descriptions."""
+
+    def __init__(self, rows):
+        self.postings = defaultdict(dict)
+        for food_item_id, name, description in rows:
+            for text, weight in ((name, NAME_WEIGHT), (description, DESCRIPTION_WEIGHT)):
+                for term in tokenize(text):
+                    postings = self.postings[term]
+                    postings[food_item_id] = postings.get(food_item_id, 0) + weight
+        self.size = len(rows)
+        self.terms = sorted(self.postings)
+        self.trigrams = defaultdict(set)
+        for term in self.terms:
+            for trigram in trigrams(term):
+                self.trigrams[trigram].add(term)
+
+    def matches(self, word):
+        """Return the indexed terms matching a query word and how well they match."""
+        start = bisect.bisect_left(self.terms, word)
+        matches = {}
+        for term in self.terms[start:]:
+            if not term.startswith(word):
+                break
+            # Exact matches rank above longer words sharing the prefix.
+            matches[term] = 1.0 if term == word else 0.8
+        if matches:
+            return matches
+
+        word_trigrams = trigrams(word)
+        shared = Counter(term for trigram in word_trigrams for term in self.trigrams.get(trigram, ()))
+        for term, count in shared.items():
+            similarity = count / (len(word_trigrams) + len(trigrams(term)) - count)
+            if similarity >= FUZZY_THRESHOLD:
+                matches[term] = similarity * 0.5
+
+        return matches
+
+    def search(self, query, limit):
+        """Return the ids of the food items matching every word of the query, best first."""
+        scores = None
+        for word in tokenize(query):
+            word_scores = defaultdict(float)
+            for term, quality in self.matches(word).items():
+                postings = self.postings[term]
+                idf = math.log(1 + self.size / len(postings))
+                for food_item_id, weight in postings.items():
+                    word_scores[food_item_id] = max(word_scores[food_item_id], quality * weight * idf)
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {food_item_id: score + word_scores[food_item_id]
+                          for food_item_id, score in scores.items() if food_item_id in word_scores}
+
+        ranked = sorted((scores or {}).items(), key=lambda item: (-item[1], item[0]))
+        return [food_item_id for food_item_id, _ in ranked[:limit]]
+
+
+def search_index():
+    """Return the search index of the current menu."""
+    version = menu_version()
+    record_cache('menu_search', _index.get('version') == version)
+    if _index.get('version') != version:
+        rows = list(FoodItem.objects.values_list('id', 'name', 'description'))
+        _index.update(version=version, index=SearchIndex(rows))
+
+    return _index['index']
+
+
+def _tsquery(query):
+    # Every word must match, the words being typed match as prefixes.
+    return ' & '.join(f'{word}:*' for word in tokenize(query))
+
+
+def search_food_items(query, limit=20):
+    """Return the food items matching a search query, best match first."""
+    if not tokenize(query):
+        return []
+
+    if connection.vendor != 'postgresql':
+        ids = search_index().search(query, limit)
+        food_items = FoodItem.objects.in_bulk(ids)
+        return [food_items[food_item_id] for food_item_id in ids if food_item_id in food_items]
+
+    search_query = SearchQuery(_tsquery(query), config='english', search_type='raw')
+    return list(
+        FoodItem.objects.defer('search_vector').annotate(
+            rank=SearchRank(F('search_vector'), search_query),
+            similarity=TrigramSimilarity('name', query),
+        ).filter(
+            Q(search_vector=search_query) | Q(name__trigram_similar=query)
+        ).order_by('-rank', '-similarity', 'id')[:limit]
+    )
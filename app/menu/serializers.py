@@ -1,10 +1,19 @@
+from django.db import transaction
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from core.models import (
+    ArchivedOrder,
+    ArchivedOrderFoodItem,
     FoodItem,
     Order,
     OrderFoodItem,
     )
+from menu.inventory import MAX_STOCK_SHARDS, set_stock, total_stock
+from menu.kitchen import order_eta
+from menu.sync import FORMATS
 
 
 class FoodItemSerializer(serializers.ModelSerializer):
@@ -15,10 +24,72 @@ class FoodItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
+class FoodItemSearchSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class MenuChangesQuerySerializer(serializers.Serializer):
+    since = serializers.IntegerField(
+        min_value=0, default=0, help_text='Menu version the client has, 0 for the whole menu.',
+    )
+
+
+class MenuChangesSerializer(serializers.Serializer):
+    version = serializers.IntegerField(help_text='Menu version to send as since next time.')
+    changed = FoodItemSerializer(many=True)
+    deleted = serializers.ListField(child=serializers.IntegerField())
+
+
+class RecommendationQuerySerializer(serializers.Serializer):
+    limit = serializers.IntegerField(min_value=1, max_value=20, default=5)
+
+
 class FoodItemDetailSerializer(FoodItemSerializer):
+    stock = serializers.IntegerField(min_value=0, allow_null=True, required=False)
+    stock_shards = serializers.IntegerField(min_value=1, max_value=MAX_STOCK_SHARDS, required=False)
 
     class Meta(FoodItemSerializer.Meta):
-        fields = FoodItemSerializer.Meta.fields
+        fields = FoodItemSerializer.Meta.fields + ['stock', 'stock_shards']
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if 'stock' in data:
+            data['stock'] = total_stock(instance)
+        return data
+
+    def save_stock(self, instance, stock):
+        if stock:
+            set_stock(
+                instance,
+                stock.get('stock', total_stock(instance)),
+                stock.get('stock_shards', instance.stock_shards),
+            )
+
+        return instance
+
+    def create(self, validated_data):
+        stock = {name: validated_data.pop(name) for name in ['stock', 'stock_shards'] if name in validated_data}
+        return self.save_stock(super().create(validated_data), stock)
+
+    def update(self, instance, validated_data):
+        stock = {name: validated_data.pop(name) for name in ['stock', 'stock_shards'] if name in validated_data}
+        return self.save_stock(super().update(instance, validated_data), stock)
+
+
+class MenuSyncSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(choices=FORMATS, required=False)
+    dry_run = serializers.BooleanField(default=False)
+    deactivate_missing = serializers.BooleanField(default=True)
+
+
+class MenuSyncResultSerializer(serializers.Serializer):
+    created = serializers.IntegerField()
+    updated = serializers.IntegerField()
+    deactivated = serializers.IntegerField()
+    unchanged = serializers.IntegerField()
+    dry_run = serializers.BooleanField()
 
 
 class OrderFoodItemSerializer(serializers.ModelSerializer):
@@ -29,14 +100,47 @@ class OrderFoodItemSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
+class CartLineChangeSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class CartBulkUpdateSerializer(serializers.Serializer):
+    update = CartLineChangeSerializer(many=True, required=False, default=list)
+    delete = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+
+    def validate(self, attrs):
+        ids = [change['id'] for change in attrs['update']] + attrs['delete']
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError('Each line can only be changed once.')
+        if not ids:
+            raise serializers.ValidationError('No changes given.')
+
+        return attrs
+
+
 class OrderSerializer(serializers.ModelSerializer):
     order_items = OrderFoodItemSerializer(many=True, required=False)
+    total_price = serializers.ReadOnlyField(source='cached_total_price')
+    total_items = serializers.ReadOnlyField(source='cached_total_items')
+    eta = serializers.SerializerMethodField()
 
     class Meta:
         model = Order
-        fields = ['id', 'order_items', 'status', 'payment_method', 'total_price', 'total_items', 'delivery_address']
+        fields = [
+            'id', 'order_items', 'status', 'payment_method', 'total_price', 'total_items', 'delivery_address', 'date',
+            'eta',
+        ]
         read_only_fields = ['id']
 
+    @extend_schema_field(OpenApiTypes.DATETIME)
+    def get_eta(self, order):
+        """When the order should be ready, null when it is not in the kitchen."""
+        return order_eta(order)
+
+    # Atomic so that new lines only become visible once they are added to
+    # the order, and the cleanup never mistakes them for orphans.
+    @transaction.atomic
     def create(self, validated_data):
         # query if the an order with status 'NOT_PLACED' exists for the user
         auth_user = self.context['request'].user
@@ -60,6 +164,8 @@ class OrderSerializer(serializers.ModelSerializer):
                     raise serializers.ValidationError(
                         'Food item does not exist.'
                     )
+            # Keep the cart from expiring while it is in use.
+            order.update_totals(updated=timezone.now())
         else:
             # else create a new order
             order_items = validated_data.pop('order_items', [])
@@ -79,6 +185,7 @@ class OrderSerializer(serializers.ModelSerializer):
                     raise serializers.ValidationError(
                         'Food item does not exist.'
                     )
+            order.update_totals()
 
         return order
 
@@ -97,3 +204,62 @@ class OrderDetailSerializer(OrderSerializer):
     class Meta(OrderSerializer.Meta):
         fields = OrderSerializer.Meta.fields
         read_only_fields = ['id']
+
+
+class SparseQuerySerializer(serializers.Serializer):
+    fields = serializers.CharField(
+        required=False, help_text='Comma separated fields to render, all by default.',
+    )
+    expand = serializers.CharField(
+        required=False, help_text='Comma separated nested objects to render in full, such as order_items.food_item.',
+    )
+
+
+class HistoryQuerySerializer(serializers.Serializer):
+    limit = serializers.IntegerField(min_value=1, max_value=100, required=False)
+    offset = serializers.IntegerField(min_value=0, default=0)
+
+
+class ArchivedOrderFoodItemSerializer(serializers.ModelSerializer):
+    food_item = FoodItemSerializer()
+
+    class Meta:
+        model = ArchivedOrderFoodItem
+        fields = ['id', 'food_item', 'quantity']
+        read_only_fields = fields
+
+
+class ArchivedOrderSerializer(serializers.ModelSerializer):
+    order_items = ArchivedOrderFoodItemSerializer(many=True)
+    # Rendered like the cached total_price of orders.
+    total_price = serializers.ReadOnlyField()
+    # Archived orders have left the kitchen.
+    eta = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ArchivedOrder
+        fields = OrderSerializer.Meta.fields
+        read_only_fields = fields
+
+    @extend_schema_field(OpenApiTypes.DATETIME)
+    def get_eta(self, order):
+        return None
+
+
+class BootstrapQuerySerializer(serializers.Serializer):
+    etags = serializers.CharField(
+        required=False, help_text='Comma separated section:etag pairs of the sections the client already has.',
+    )
+
+
+class BootstrapSectionSerializer(serializers.Serializer):
+    etag = serializers.CharField()
+    data = serializers.JSONField(required=False, help_text='Left out when the client sent the same ETag.')
+
+
+class BootstrapSerializer(serializers.Serializer):
+    user = BootstrapSectionSerializer()
+    addresses = BootstrapSectionSerializer()
+    menu = BootstrapSectionSerializer()
+    cart = BootstrapSectionSerializer()
+    history = BootstrapSectionSerializer()
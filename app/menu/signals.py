@@ -0,0 +1,72 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from core.models import QUEUE_SERVED, Counter, FoodItem, Order
+from menu.cache import invalidate_carts, invalidate_menu
+from menu.cart import carts_holding, refresh_carts
+from menu.changes import bury, stamp
+from menu.kitchen import invalidate_queue, record_prep_time
+
+
+@receiver(post_save, sender=FoodItem)
+@receiver(post_delete, sender=FoodItem)
+def food_item_changed(sender, **kwargs):
+    """Invalidate the cached menu when a food item changes."""
+    invalidate_menu()
+
+
+@receiver(post_save, sender=FoodItem)
+def food_item_versioned(sender, instance, raw=False, **kwargs):
+    """Stamp a saved food item with a new menu version."""
+    if not raw:
+        instance.version = stamp([instance.pk])
+
+
+@receiver(post_save, sender=FoodItem)
+def food_item_saved(sender, instance, created, raw=False, **kwargs):
+    """Refresh the open carts holding a changed food item."""
+    if not created and not raw:
+        refresh_carts(carts_holding([instance]))
+
+
+@receiver(pre_delete, sender=FoodItem)
+def food_item_deleting(sender, instance, **kwargs):
+    # Once deleted, the lines no longer point to the food item.
+    instance._carts = carts_holding([instance])
+
+
+@receiver(post_delete, sender=FoodItem)
+def food_item_deleted(sender, instance, **kwargs):
+    """Refresh the open carts that held a deleted food item and leave its tombstone."""
+    refresh_carts(getattr(instance, '_carts', []))
+    bury([instance.pk])
+
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def order_changed(sender, instance, **kwargs):
+    """Drop the cached cart of the user once a change to an order is committed."""
+    transaction.on_commit(lambda: invalidate_carts([instance.user_id]))
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, raw=False, **kwargs):
+    """Add the preparation time of an order that just became ready to the statistics."""
+    if getattr(instance, '_stamped', None) == 'ready_at' and not raw:
+        record_prep_time(instance)
+
+
+@receiver(post_save, sender=Order)
+def order_queued(sender, instance, raw=False, **kwargs):
+    """Drop the cached kitchen queue when an order entered or left it."""
+    if getattr(instance, '_queued', False) and not raw:
+        invalidate_queue()
+
+
+@receiver(pre_delete, sender=Order)
+def order_deleting(sender, instance, **kwargs):
+    """Count an order deleted while in the kitchen as served, once whatever copy is deleted."""
+    if Order.objects.filter(id=instance.id, queue_ticket__isnull=False).update(queue_ticket=None):
+        Counter.objects.next(QUEUE_SERVED)
+        invalidate_queue()
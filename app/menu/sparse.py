@@ -0,0 +1,172 @@
+"""
+Sparse fieldsets for the menu and order endpoints.
+
+``?fields=id,status`` keeps only the listed fields. ``?expand=order_items``
+renders the listed nested objects in full, nested paths being dotted as in
+``order_items.food_item``, and the other nested objects as their ids.
+Without either parameter every field is rendered in full, as before.
+
+The queries follow the serializer: only the rendered columns are loaded and
+only the rendered relations are prefetched.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import permissions, serializers
+from rest_framework.exceptions import ValidationError
+
+
+def _split(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class Sparse:
+    """Fields and expanded nested objects asked for by a request."""
+
+    def __init__(self, fields=None, expand=()):
+        self.fields = fields
+        # Expanding a nested path expands its parents.
+        self.expand = {
+            '.'.join(path.split('.')[:depth])
+            for path in expand for depth in range(1, path.count('.') + 2)
+        }
+
+    @classmethod
+    def from_request(cls, request):
+        """Return the sparse fieldset of a request, or None when it asks for every field."""
+        params = request.query_params
+        if 'fields' not in params and 'expand' not in params:
+            return None
+
+        return cls(_split(params['fields']) if 'fields' in params else None, _split(params.get('expand', '')))
+
+
+def _nested(field):
+    """Return the serializer nested in a field and whether it renders a list."""
+    if isinstance(field, serializers.ListSerializer):
+        return field.child, True
+    if isinstance(field, serializers.BaseSerializer):
+        return field, False
+    return None, False
+
+
+def _collapse(serializer, expand, prefix):
+    expanded = set()
+    for name, field in list(serializer.fields.items()):
+        nested, many = _nested(field)
+        if nested is None:
+            continue
+        path = prefix + name
+        if path in expand:
+            expanded.add(path)
+            expanded |= _collapse(nested, expand, path + '.')
+        else:
+            kwargs = {'source': field.source} if field.source != name else {}
+            serializer.fields[name] = serializers.PrimaryKeyRelatedField(many=many, read_only=True, **kwargs)
+
+    return expanded
+
+
+def trim_serializer(serializer, sparse):
+    """Drop the fields not asked for and render the nested objects not expanded as ids."""
+    root, _ = _nested(serializer)
+    if sparse.fields is not None:
+        unknown = sparse.fields - root.fields.keys()
+        if unknown:
+            raise ValidationError({'fields': [f'Unknown field {name}.' for name in sorted(unknown)]})
+        for name in list(root.fields):
+            if name not in sparse.fields:
+                del root.fields[name]
+
+    unknown = sparse.expand - _collapse(root, sparse.expand, '')
+    if unknown:
+        raise ValidationError({'expand': [f'Cannot expand {path}.' for path in sorted(unknown)]})
+
+    return serializer
+
+
+def _trim_object(data, fields, expand, prefix):
+    trimmed = {}
+    for name, value in data.items():
+        if fields is not None and name not in fields:
+            continue
+        path = prefix + name
+        if isinstance(value, dict):
+            value = _trim_object(value, None, expand, path + '.') if path in expand else value['id']
+        elif isinstance(value, list) and value and isinstance(value[0], dict):
+            if path in expand:
+                value = [_trim_object(item, None, expand, path + '.') for item in value]
+            else:
+                value = [item['id'] for item in value]
+        trimmed[name] = value
+
+    return trimmed
+
+
+def trim_data(data, sparse):
+    """Trim a rendered list of objects, such as a cached representation, like trim_serializer."""
+    return [_trim_object(item, sparse.fields, sparse.expand, '') for item in data]
+
+
+def optimize_queryset(queryset, serializer, columns=()):
+    """Load only the columns and prefetch only the relations rendered by the serializer."""
+    serializer, _ = _nested(serializer)
+    model = queryset.model
+    columns = {model._meta.pk.name, *columns}
+    prefetches = []
+    for field in serializer.fields.values():
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            # Rendered from something else than a column: load every column.
+            columns = None
+            continue
+
+        if not model_field.is_relation:
+            if columns is not None:
+                columns.add(model_field.name)
+            continue
+
+        nested, _ = _nested(field)
+        related = model_field.related_model._default_manager.all()
+        if model_field.many_to_many:
+            related = optimize_queryset(related, nested) if nested else related.only('pk')
+            prefetches.append(Prefetch(field.source, queryset=related))
+        elif model_field.one_to_many:
+            # Prefetching matches the related objects on their foreign key.
+            remote = [model_field.field.name]
+            related = optimize_queryset(related, nested, remote) if nested else related.only('pk', *remote)
+            prefetches.append(Prefetch(field.source, queryset=related))
+        else:
+            if columns is not None:
+                columns.add(model_field.name)
+            if nested:
+                prefetches.append(Prefetch(field.source, queryset=optimize_queryset(related, nested)))
+
+    if columns is not None:
+        queryset = queryset.only(*columns)
+
+    return queryset.prefetch_related(*prefetches)
+
+
+class SparseFieldsMixin:
+    """Trim the serializers and the queries of safe requests with ``?fields=`` and ``?expand=``."""
+
+    def get_sparse(self):
+        if self.request.method not in permissions.SAFE_METHODS:
+            return None
+
+        return Sparse.from_request(self.request)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        sparse = self.get_sparse()
+
+        return trim_serializer(serializer, sparse) if sparse else serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in permissions.SAFE_METHODS:
+            return queryset
+
+        return optimize_queryset(queryset, self.get_serializer())
@@ -0,0 +1,165 @@
+"""
+Synchronise the menu with an export from the point of sale system.
+"""
+
+import csv
+import json
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from rest_framework import serializers
+
+from core.models import FOOD_TYPE, FoodItem
+from menu.cache import invalidate_menu
+from menu.cart import carts_holding, refresh_carts
+from menu.changes import next_version
+
+SYNC_FIELDS = ['name', 'description', 'price', 'available', 'type']
+
+FORMATS = ['csv', 'jsonl']
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class MenuRowSerializer(serializers.Serializer):
+    external_id = serializers.CharField(max_length=64)
+    name = serializers.CharField(max_length=255)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    price = serializers.DecimalField(max_digits=5, decimal_places=2)
+    available = serializers.BooleanField(default=True)
+    type = serializers.ChoiceField(choices=FOOD_TYPE, default='MAIN_COURSE')
+
+
+class MenuSyncError(ValueError):
+    """Raised when the menu file cannot be read."""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+@dataclass
+class SyncPlan:
+    create: list = field(default_factory=list)
+    update: list = field(default_factory=list)
+    deactivate: list = field(default_factory=list)
+    unchanged: int = 0
+
+    def has_changes(self):
+        return bool(self.create or self.update or self.deactivate)
+
+    def summary(self):
+        return {
+            'created': len(self.create),
+            'updated': len(self.update),
+            'deactivated': len(self.deactivate),
+            'unchanged': self.unchanged,
+        }
+
+
+def format_from_name(filename):
+    """Guess the menu format from a file name."""
+    extension = filename.rsplit('.', 1)[-1].lower()
+    if extension == 'ndjson':
+        return 'jsonl'
+    if extension not in FORMATS:
+        raise MenuSyncError([f'Unsupported menu file "{filename}", expected .csv or .jsonl.'])
+
+    return extension
+
+
+def _decoded(lines):
+    """Yield the lines of a menu file, failing with MenuSyncError when it is not UTF-8."""
+    try:
+        yield from lines
+    except UnicodeDecodeError as exc:
+        raise MenuSyncError([f'The file is not UTF-8 encoded: {exc.reason} at byte {exc.start}.'])
+
+
+def read_menu(lines, file_format):
+    """Parse and validate the rows of a menu file."""
+    lines = _decoded(lines)
+    if file_format == 'csv':
+        # Empty cells fall back to the field defaults.
+        raw_rows = ({key: value for key, value in row.items() if value != ''} for row in csv.DictReader(lines))
+    else:
+        try:
+            raw_rows = [json.loads(line) for line in lines if line.strip()]
+        except json.JSONDecodeError as exc:
+            raise MenuSyncError([f'Invalid JSON: {exc}'])
+
+    rows, errors, seen = {}, [], set()
+    for number, raw in enumerate(raw_rows, start=1):
+        row = MenuRowSerializer(data=raw)
+        if not row.is_valid():
+            errors.append({'row': number, 'errors': row.errors})
+            continue
+        external_id = row.validated_data['external_id']
+        if external_id in seen:
+            errors.append({'row': number, 'errors': {'external_id': ['Duplicate external id.']}})
+            continue
+        seen.add(external_id)
+        rows[external_id] = row.validated_data
+
+    if errors:
+        raise MenuSyncError(errors)
+
+    return rows
+
+
+def plan_sync(rows, deactivate_missing=True):
+    """Diff the menu rows against the food items with an external id."""
+    plan = SyncPlan()
+    existing = FoodItem.objects.filter(external_id__isnull=False).only('external_id', *SYNC_FIELDS)
+
+    for food_item in existing.iterator():
+        row = rows.pop(food_item.external_id, None)
+        if row is None:
+            if deactivate_missing and food_item.available:
+                plan.deactivate.append(food_item)
+            continue
+
+        changed = False
+        for name in SYNC_FIELDS:
+            if getattr(food_item, name) != row[name]:
+                setattr(food_item, name, row[name])
+                changed = True
+        if changed:
+            plan.update.append(food_item)
+        else:
+            plan.unchanged += 1
+
+    plan.create = [FoodItem(**row) for row in rows.values()]
+
+    return plan
+
+
+def apply_sync(plan, batch_size=DEFAULT_BATCH_SIZE):
+    """Write a sync plan to the database in batches."""
+    if not plan.has_changes():
+        return
+
+    deactivate = [food_item.id for food_item in plan.deactivate]
+    with transaction.atomic():
+        version = next_version()
+        for food_item in [*plan.create, *plan.update]:
+            food_item.version = version
+        FoodItem.objects.bulk_create(plan.create, batch_size=batch_size)
+        FoodItem.objects.bulk_update(plan.update, [*SYNC_FIELDS, 'version'], batch_size=batch_size)
+        for start in range(0, len(deactivate), batch_size):
+            FoodItem.objects.filter(id__in=deactivate[start:start + batch_size]).update(
+                available=False, version=version,
+            )
+        # Bulk writes send no signals, so the cached menu is dropped once here
+        # and the carts holding changed food items are refreshed.
+        transaction.on_commit(invalidate_menu)
+        refresh_carts(carts_holding([*plan.update, *plan.deactivate]))
+
+
+def sync_menu(lines, file_format, dry_run=False, deactivate_missing=True, batch_size=DEFAULT_BATCH_SIZE):
+    """Synchronise the menu with a CSV or JSON lines file and return the plan."""
+    plan = plan_sync(read_menu(lines, file_format), deactivate_missing=deactivate_missing)
+    if not dry_run:
+        apply_sync(plan, batch_size=batch_size)
+
+    return plan
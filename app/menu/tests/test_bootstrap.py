@@ -0,0 +1,113 @@
+"""
+Tests for the bootstrap endpoint.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+
+BOOTSTRAP_URL = reverse('menu:bootstrap')
+
+
+class BootstrapTest(TestCase):
+    """Test the bootstrap endpoint returns what the app loads at launch."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('user@example.com', 'pass123', name='User')
+        self.client.force_authenticate(self.user)
+        self.food_item = models.FoodItem.objects.create(
+            name='Soup', description='Hot soup', price=Decimal('10.00'), available=True,
+        )
+        models.Address.objects.create(
+            user=self.user, city='Sao Paulo', state='SP', CEP=1000000, street='Rua A', number=1,
+        )
+
+    def create_order(self, status='NOT_PLACED'):
+        order = models.Order.objects.create(user=self.user, status=status)
+        order.order_items.add(models.OrderFoodItem.objects.create(food_item=self.food_item, quantity=2))
+        order.update_totals()
+        return order
+
+    def test_login_required(self):
+        """Test the endpoint requires authentication."""
+        res = APIClient().get(BOOTSTRAP_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_all_sections(self):
+        """Test every section is returned with its ETag."""
+        cart = self.create_order()
+        delivered = self.create_order(status='DELIVERED')
+
+        res = self.client.get(BOOTSTRAP_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['user']['data']['email'], 'user@example.com')
+        self.assertEqual(res.data['addresses']['data'][0]['city'], 'Sao Paulo')
+        self.assertEqual([item['name'] for item in res.data['menu']['data']], ['Soup'])
+        self.assertEqual(res.data['cart']['data'][0]['id'], cart.id)
+        self.assertEqual([order['id'] for order in res.data['history']['data']], [delivered.id, cart.id])
+        self.assertTrue(all(section['etag'] for section in res.data.values()))
+
+    def test_known_sections_skipped(self):
+        """Test the sections whose ETag is sent back are returned without data."""
+        etags = {name: section['etag'] for name, section in self.client.get(BOOTSTRAP_URL).data.items()}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_order()
+
+        res = self.client.get(BOOTSTRAP_URL, {'etags': ','.join(f'{name}:{etag}' for name, etag in etags.items())})
+
+        self.assertNotIn('data', res.data['user'])
+        self.assertNotIn('data', res.data['menu'])
+        self.assertIn('data', res.data['cart'])
+        self.assertNotEqual(res.data['cart']['etag'], etags['cart'])
+        self.assertIn('data', res.data['history'])
+
+    def test_etag_ignores_eta(self):
+        """Test the ETA of orders in the kitchen, computed on every request, keeps the ETag."""
+        self.create_order(status='PENDING')
+        first = self.client.get(BOOTSTRAP_URL).data['history']
+
+        with patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(seconds=30)):
+            second = self.client.get(BOOTSTRAP_URL).data['history']
+
+        self.assertNotEqual(first['data'][0]['eta'], second['data'][0]['eta'])
+        self.assertEqual(first['etag'], second['etag'])
+
+    def test_queries_bounded(self):
+        """Test a warm bootstrap runs a handful of queries however many orders there are."""
+        self.create_order()
+        for _ in range(5):
+            self.create_order(status='DELIVERED')
+        self.client.get(BOOTSTRAP_URL)
+
+        # Addresses, orders, their lines and their food items; menu and cart are cached.
+        with self.assertNumQueries(4):
+            self.client.get(BOOTSTRAP_URL)
+
+    def test_menu_shared(self):
+        """Test the menu is cached for every user and refreshed when it changes."""
+        self.client.get(BOOTSTRAP_URL)
+        other = APIClient()
+        other.force_authenticate(get_user_model().objects.create_user('other@example.com', 'pass123'))
+
+        res = other.get(BOOTSTRAP_URL)
+        self.assertEqual([item['name'] for item in res.data['menu']['data']], ['Soup'])
+
+        self.food_item.name = 'Stew'
+        self.food_item.save()
+        res = other.get(BOOTSTRAP_URL)
+
+        self.assertEqual([item['name'] for item in res.data['menu']['data']], ['Stew'])
@@ -0,0 +1,127 @@
+"""
+Tests for the cached cart.
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+from menu.cache import cached_cart
+from menu.sync import sync_menu
+
+ORDERS_URL = reverse('menu:order-list')
+CART_BULK_URL = reverse('menu:orderfooditem-bulk')
+
+
+def order_url(order_id):
+    return reverse('menu:order-detail', args=[order_id])
+
+
+def order_item_url(order_item_id):
+    return reverse('menu:orderfooditem-detail', args=[order_item_id])
+
+
+class CartCacheTest(TestCase):
+    """Test the open cart is served from the cache and kept up to date."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('user@example.com', 'pass123')
+        self.client.force_authenticate(self.user)
+        self.food_item = models.FoodItem.objects.create(name='Soup', price=Decimal('10.00'), available=True)
+
+    def add_to_cart(self, quantity=1):
+        payload = {'order_items': [{'food_item': self.food_item.id, 'quantity': quantity}]}
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(ORDERS_URL, payload, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        return res.data['id']
+
+    def test_cart_read_from_cache(self):
+        """Test a cached cart is served without querying the database."""
+        self.add_to_cart()
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ORDERS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data[0]['total_items'], 1)
+
+    def test_cart_cached_on_first_read(self):
+        """Test a cart missing from the cache is rendered and cached."""
+        models.Order.objects.create(user=self.user)
+
+        res = self.client.get(ORDERS_URL)
+
+        self.assertEqual(len(res.data), 1)
+        self.assertEqual(cached_cart(self.user.id), res.data)
+
+    def test_cart_changes_written_through(self):
+        """Test adding, changing and deleting lines update the cached cart."""
+        self.add_to_cart(quantity=2)
+        self.add_to_cart(quantity=1)
+        self.assertEqual(cached_cart(self.user.id)[0]['total_items'], 3)
+
+        line_ids = [line['id'] for line in cached_cart(self.user.id)[0]['order_items']]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(order_item_url(line_ids[0]), {'quantity': 5})
+        self.assertEqual(cached_cart(self.user.id)[0]['total_items'], 6)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(order_item_url(line_ids[1]))
+        self.assertEqual(cached_cart(self.user.id)[0]['total_items'], 5)
+
+        self.client.post(CART_BULK_URL, {'update': [{'id': line_ids[0], 'quantity': 2}]}, format='json')
+        self.assertEqual(cached_cart(self.user.id)[0]['total_items'], 2)
+
+    def test_placed_cart_leaves_cache(self):
+        """Test placing the order empties the cached cart."""
+        order_id = self.add_to_cart()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(order_url(order_id), {'status': 'PENDING'})
+
+        self.assertEqual(cached_cart(self.user.id), [])
+        self.assertEqual(self.client.get(ORDERS_URL).data, [])
+
+    def test_food_item_change_invalidates_cart(self):
+        """Test changing the price of a food item in the cart drops the cached cart."""
+        self.add_to_cart(quantity=2)
+
+        self.food_item.price = Decimal('12.50')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.food_item.save()
+
+        self.assertIsNone(cached_cart(self.user.id))
+        res = self.client.get(ORDERS_URL)
+        self.assertEqual(res.data[0]['total_price'], Decimal('25.00'))
+
+    def test_menu_sync_invalidates_cart(self):
+        """Test a menu sync making a food item of the cart unavailable drops the cached cart."""
+        models.FoodItem.objects.filter(id=self.food_item.id).update(external_id='pos-1')
+        self.add_to_cart()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sync_menu(['external_id,name,price,type', 'pos-2,Bread,2.00,STARTER'], 'csv')
+
+        self.assertIsNone(cached_cart(self.user.id))
+        self.assertFalse(self.client.get(ORDERS_URL).data[0]['order_items'][0]['food_item']['available'])
+
+    def test_carts_of_other_food_items_kept(self):
+        """Test changing a food item outside the cart keeps the cached cart."""
+        self.add_to_cart()
+        other = models.FoodItem.objects.create(name='Bread', price=Decimal('2.00'))
+
+        other.price = Decimal('3.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            other.save()
+
+        self.assertIsNotNone(cached_cart(self.user.id))
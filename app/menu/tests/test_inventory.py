@@ -0,0 +1,186 @@
+"""
+Tests for the stock of food items.
+"""
+
+import threading
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+from menu.inventory import OutOfStock, place_cart, reserve_stock, set_stock, total_stock
+
+
+def order_url(order_id):
+    return reverse('menu:order-detail', args=[order_id])
+
+
+def food_item_url(food_item_id):
+    return reverse('menu:fooditem-detail', args=[food_item_id])
+
+
+class StockTest(TestCase):
+    """Test stock is taken when orders are placed."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('user@example.com', 'pass123')
+        self.client.force_authenticate(self.user)
+        self.food_item = models.FoodItem.objects.create(
+            name='Soup', price=Decimal('10.00'), available=True, stock=5,
+        )
+
+    def create_cart(self, quantity):
+        cart = models.Order.objects.create(user=self.user)
+        cart.order_items.add(models.OrderFoodItem.objects.create(food_item=self.food_item, quantity=quantity))
+        return cart
+
+    def test_placing_order_takes_stock(self):
+        """Test placing an order takes its quantities out of stock."""
+        cart = self.create_cart(quantity=2)
+
+        res = self.client.patch(order_url(cart.id), {'status': 'PENDING'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.food_item.refresh_from_db()
+        self.assertEqual(self.food_item.stock, 3)
+        self.assertTrue(self.food_item.available)
+
+    def test_order_short_of_stock_rejected(self):
+        """Test an order asking for more than the stock left is not placed."""
+        cart = self.create_cart(quantity=6)
+
+        res = self.client.patch(order_url(cart.id), {'status': 'PENDING'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['order_items'], ['Soup is sold out.'])
+        cart.refresh_from_db()
+        self.food_item.refresh_from_db()
+        self.assertEqual(cart.status, 'NOT_PLACED')
+        self.assertEqual(self.food_item.stock, 5)
+
+    def test_sold_out_food_item_unavailable(self):
+        """Test a food item becomes unavailable when its last units are ordered."""
+        cart = self.create_cart(quantity=5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(order_url(cart.id), {'status': 'PENDING'})
+
+        self.food_item.refresh_from_db()
+        self.assertEqual(self.food_item.stock, 0)
+        self.assertFalse(self.food_item.available)
+
+    def test_placing_keeps_line_changes(self):
+        """Test a line change stored while the order was being placed is kept in its totals."""
+        cart = self.create_cart(quantity=1)
+
+        def change_line(order):
+            # Stored after the view loaded the order, before the order is locked.
+            order.order_items.update(quantity=3)
+            models.Order.objects.filter(id=order.id).update_totals()
+            return place_cart(order)
+
+        with patch('menu.views.place_cart', side_effect=change_line):
+            res = self.client.patch(order_url(cart.id), {'status': 'PENDING'})
+
+        self.assertEqual(res.data['total_price'], Decimal('30.00'))
+        cart.refresh_from_db()
+        self.assertEqual((cart.cached_total_price, cart.cached_total_items), (Decimal('30.00'), 3))
+
+    def test_untracked_stock_unchanged(self):
+        """Test food items without stock tracking can always be ordered."""
+        models.FoodItem.objects.filter(id=self.food_item.id).update(stock=None)
+        cart = self.create_cart(quantity=50)
+
+        res = self.client.patch(order_url(cart.id), {'status': 'PENDING'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.food_item.refresh_from_db()
+        self.assertIsNone(self.food_item.stock)
+
+    def test_sharded_stock(self):
+        """Test stock spread over shards is taken from one or several shards."""
+        set_stock(self.food_item, 7, shards=4)
+        self.assertEqual(sorted(self.food_item.shards.values_list('stock', flat=True)), [1, 2, 2, 2])
+
+        reserve_stock({self.food_item.id: 2})
+        self.assertEqual(total_stock(self.food_item), 5)
+
+        # More than any single shard holds.
+        reserve_stock({self.food_item.id: 4})
+        self.assertEqual(total_stock(self.food_item), 1)
+
+        with self.assertRaises(OutOfStock):
+            reserve_stock({self.food_item.id: 2})
+        self.assertEqual(total_stock(self.food_item), 1)
+
+    def test_set_stock_through_api(self):
+        """Test the stock and the number of shards of a food item are set through the API."""
+        res = self.client.patch(food_item_url(self.food_item.id), {'stock': 40, 'stock_shards': 8})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['stock'], 40)
+        self.assertEqual(res.data['stock_shards'], 8)
+        self.assertEqual(self.food_item.shards.count(), 8)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Needs row level locking.')
+class ConcurrentCheckoutTest(TransactionTestCase):
+    """Test parallel checkouts never oversell nor deadlock."""
+
+    CHECKOUTS = 40
+
+    def checkout_in_parallel(self, food_item):
+        barrier = threading.Barrier(self.CHECKOUTS)
+        results = []
+
+        def checkout():
+            try:
+                barrier.wait()
+                with transaction.atomic():
+                    reserve_stock({food_item.id: 1})
+                results.append(True)
+            except OutOfStock:
+                results.append(False)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=checkout) for _ in range(self.CHECKOUTS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+            self.assertFalse(thread.is_alive())
+
+        return results
+
+    def test_no_overselling(self):
+        """Test only as many checkouts succeed as there are units."""
+        food_item = models.FoodItem.objects.create(name='Soup', price=Decimal('10.00'), stock=25)
+
+        results = self.checkout_in_parallel(food_item)
+
+        self.assertEqual(results.count(True), 25)
+        self.assertEqual(len(results), self.CHECKOUTS)
+        food_item.refresh_from_db()
+        self.assertEqual(food_item.stock, 0)
+
+    def test_no_overselling_sharded(self):
+        """Test sharded stock is not oversold either."""
+        food_item = models.FoodItem.objects.create(name='Soup', price=Decimal('10.00'))
+        set_stock(food_item, 25, shards=8)
+
+        results = self.checkout_in_parallel(food_item)
+
+        self.assertEqual(results.count(True), 25)
+        self.assertEqual(len(results), self.CHECKOUTS)
+        self.assertEqual(total_stock(food_item), 0)
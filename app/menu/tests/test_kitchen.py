@@ -0,0 +1,203 @@
+"""
+Tests for the preparation time statistics and the ETA of orders.
+"""
+
+import random
+import statistics
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+from menu.kitchen import P2Quantile, order_eta
+
+
+def order_url(order_id):
+    return reverse('menu:order-detail', args=[order_id])
+
+
+class P2QuantileTest(TestCase):
+    """Test the streaming median estimate."""
+
+    def test_exact_for_few_observations(self):
+        """Test the median of up to five observations is exact."""
+        sketch = P2Quantile(0.5)
+        for value in [5, 1, 3]:
+            sketch.add(value)
+
+        self.assertEqual(sketch.value(), 3)
+
+    def test_close_to_median(self):
+        """Test the estimate of a long stream is close to its median, through the stored state."""
+        rng = random.Random(1)
+        values = [rng.expovariate(1 / 600) for _ in range(2000)]
+        sketch = P2Quantile(0.5)
+        for value in values:
+            sketch = P2Quantile(0.5, sketch.state())
+            sketch.add(value)
+
+        median = statistics.median(values)
+        self.assertLess(abs(sketch.value() - median), median * 0.05)
+        self.assertEqual(len(sketch.heights), 5)
+
+
+class KitchenTest(TestCase):
+    """Test orders record their transitions and get an ETA."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('user@example.com', 'pass123')
+        self.client.force_authenticate(self.user)
+        self.soup = models.FoodItem.objects.create(name='Soup', price=Decimal('10.00'), available=True)
+        self.cake = models.FoodItem.objects.create(
+            name='Cake', price=Decimal('5.00'), available=True, type='DESSERT',
+        )
+
+    def create_order(self, food_items, status='CONFIRMED'):
+        order = models.Order.objects.create(user=self.user, status=status)
+        for food_item in food_items:
+            order.order_items.add(models.OrderFoodItem.objects.create(food_item=food_item))
+        return order
+
+    def prepare(self, order, seconds):
+        """Move an order through PREPARING to READY, taking the given seconds."""
+        order.status = 'PREPARING'
+        order.save()
+        order.preparing_at -= timedelta(seconds=seconds)
+        order.save()
+        order.status = 'READY'
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+
+    def test_transitions_stamped_once(self):
+        """Test each kitchen status stamps its time the first time it is reached."""
+        order = self.create_order([self.soup])
+        confirmed_at = order.confirmed_at
+        order.save()
+
+        order.status = 'PREPARING'
+        order.save(update_fields=['status'])
+        order.refresh_from_db()
+
+        self.assertEqual(order.confirmed_at, confirmed_at)
+        self.assertIsNotNone(order.preparing_at)
+        self.assertIsNone(order.ready_at)
+
+    def test_prep_times_recorded(self):
+        """Test ready orders add their preparation time to their food items, types and the kitchen."""
+        self.prepare(self.create_order([self.soup]), 600)
+        self.prepare(self.create_order([self.soup, self.cake]), 1200)
+
+        medians = dict(((stats.scope, stats.key), stats.median) for stats in models.PrepTimeStats.objects.all())
+
+        self.assertAlmostEqual(medians['food_item', str(self.cake.id)], 1200, delta=5)
+        self.assertAlmostEqual(medians['type', 'DESSERT'], 1200, delta=5)
+        self.assertAlmostEqual(medians['type', 'MAIN_COURSE'], 600, delta=5)
+        self.assertEqual(medians.keys(), {
+            ('kitchen', ''), ('food_item', str(self.soup.id)), ('food_item', str(self.cake.id)),
+            ('type', 'MAIN_COURSE'), ('type', 'DESSERT'),
+        })
+
+    @override_settings(PREP_TIME_WINDOW=3)
+    def test_windows_roll(self):
+        """Test a full window starts a new sketch and keeps the last median until the new one has enough."""
+        for _ in range(3):
+            self.prepare(self.create_order([self.soup]), 600)
+        self.prepare(self.create_order([self.soup]), 1800)
+
+        stats = models.PrepTimeStats.objects.get(scope='kitchen')
+        self.assertEqual(stats.sketch['count'], 1)
+        self.assertAlmostEqual(stats.median, 600, delta=5)
+
+    def test_placed_order_eta(self):
+        """Test placing an order estimates its preparation time from its slowest food item."""
+        self.prepare(self.create_order([self.cake]), 1200)
+        cart = self.create_order([self.soup, self.cake], status='NOT_PLACED')
+
+        res = self.client.patch(order_url(cart.id), {'status': 'PENDING'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        cart.refresh_from_db()
+        self.assertAlmostEqual(cart.prep_seconds, 1200, delta=5)
+        self.assertIsNotNone(res.data['eta'])
+
+    @override_settings(KITCHEN_CAPACITY=2, PREP_TIME_DEFAULT=600)
+    def test_eta_without_queries(self):
+        """Test the ETA adds the turns of the orders ahead only and runs no query once cached."""
+        orders = [self.create_order([self.soup]) for _ in range(5)]
+        orders[4].prep_seconds = 300
+        order_eta(orders[4])
+
+        with self.assertNumQueries(0):
+            first, last = order_eta(orders[0]), order_eta(orders[4])
+
+        # The first order is prepared right away, the last waits for the two turns of the four ahead.
+        now = timezone.now().timestamp()
+        self.assertAlmostEqual(first.timestamp(), now + 600, delta=5)
+        self.assertAlmostEqual(last.timestamp(), now + 2 * 600 + 300, delta=5)
+
+    @override_settings(KITCHEN_CAPACITY=1, PREP_TIME_DEFAULT=600)
+    def test_eta_follows_queue(self):
+        """Test orders leaving the kitchen, cancelled or deleted, move the orders behind them forward."""
+        orders = [self.create_order([self.soup]) for _ in range(4)]
+        self.assertEqual([order.queue_ticket for order in orders], [1, 2, 3, 4])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            orders[0].status = 'CANCELLED'
+            orders[0].save()
+            orders[1].delete()
+        pending = self.create_order([self.soup], status='PENDING')
+
+        self.assertIsNone(orders[0].queue_ticket)
+        waiting = [(order_eta(order) - timezone.now()).total_seconds() for order in [orders[2], orders[3], pending]]
+        for seconds, expected in zip(waiting, [600, 2 * 600, 3 * 600]):
+            self.assertAlmostEqual(seconds, expected, delta=5)
+
+    def test_stale_copies_queued_once(self):
+        """Test copies of an order loaded before it entered or left the kitchen change the queue once."""
+        order = self.create_order([self.soup], status='PENDING')
+        copies = [models.Order.objects.get(id=order.id) for _ in range(2)]
+        for copy in copies:
+            copy.status = 'CONFIRMED'
+            copy.save()
+
+        self.assertEqual([copy.queue_ticket for copy in copies], [1, 1])
+        for copy in copies:
+            copy.status = 'DELIVERED'
+            copy.save()
+        copies[0].save()
+
+        counters = dict(models.Counter.objects.filter(name__startswith='kitchen:').values_list('name', 'value'))
+        self.assertEqual(counters, {'kitchen:tickets': 1, 'kitchen:served': 1})
+        order.refresh_from_db()
+        self.assertIsNone(order.queue_ticket)
+
+    def test_customer_changes_not_timed(self):
+        """Test customers moving their orders along feed no preparation time."""
+        cart = self.create_order([self.soup], status='NOT_PLACED')
+
+        res = self.client.patch(order_url(cart.id), {'status': 'PREPARING'})
+        cart.refresh_from_db()
+        cart.status = 'READY'
+        with self.captureOnCommitCallbacks(execute=True):
+            cart.save()
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNone(cart.preparing_at)
+        self.assertFalse(models.PrepTimeStats.objects.exists())
+
+    def test_eta_while_preparing_and_after(self):
+        """Test preparing orders are due after their own time, and orders out of the kitchen have no ETA."""
+        order = self.create_order([self.soup], status='PREPARING')
+        order.prep_seconds = 900
+
+        self.assertEqual(order_eta(order), order.preparing_at + timedelta(seconds=900))
+        self.assertIsNone(order_eta(self.create_order([self.soup], status='NOT_PLACED')))
@@ -0,0 +1,92 @@
+"""
+Tests for the delta sync of the menu.
+"""
+
+import io
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+from menu.sync import sync_menu
+
+CHANGES_URL = reverse('menu:fooditem-changes')
+
+
+def create_food_item(name='Soup', **params):
+    return models.FoodItem.objects.create(name=name, price=Decimal('10.00'), available=True, **params)
+
+
+class MenuChangesTest(TestCase):
+    """Test clients get only the food items changed since their menu version."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.soup = create_food_item('Soup')
+        self.salad = create_food_item('Salad')
+
+    def sync(self, since):
+        res = self.client.get(CHANGES_URL, {'since': since})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_whole_menu(self):
+        """Test syncing from 0 returns every food item in change order."""
+        data = self.sync(0)
+
+        self.assertEqual([item['name'] for item in data['changed']], ['Soup', 'Salad'])
+        self.assertEqual(data['deleted'], [])
+        self.assertEqual(data['version'], models.FoodItem.objects.get(id=self.salad.id).version)
+
+    def test_changes_only(self):
+        """Test only the food items saved after the version are returned."""
+        version = self.sync(0)['version']
+        self.soup.price = Decimal('12.00')
+        self.soup.save()
+
+        data = self.sync(version)
+
+        self.assertEqual([item['id'] for item in data['changed']], [self.soup.id])
+        self.assertEqual(data['changed'][0]['price'], '12.00')
+        self.assertGreater(data['version'], version)
+        self.assertEqual(self.sync(data['version'])['changed'], [])
+
+    def test_deleted(self):
+        """Test deleted food items are returned as tombstones."""
+        version = self.sync(0)['version']
+        salad_id = self.salad.id
+        self.salad.delete()
+
+        data = self.sync(version)
+
+        self.assertEqual(data['changed'], [])
+        self.assertEqual(data['deleted'], [salad_id])
+
+    def test_bulk_writes_versioned(self):
+        """Test food items written by the menu sync get new versions."""
+        self.soup.external_id = 'soup'
+        self.soup.save()
+        version = self.sync(0)['version']
+
+        sync_menu(io.StringIO('external_id,name,price\nsoup,Soup,11.00\nstew,Stew,9.00\n'), 'csv')
+
+        data = self.sync(version)
+        self.assertEqual({item['name'] for item in data['changed']}, {'Soup', 'Stew'})
+
+    def test_range_scan(self):
+        """Test a sync runs the same few queries however big the menu is."""
+        for index in range(10):
+            create_food_item(f'Dish {index}')
+        version = self.sync(0)['version']
+        self.soup.save()
+
+        # The version, the changed food items and the tombstones.
+        with self.assertNumQueries(3):
+            data = self.sync(version)
+
+        self.assertEqual(len(data['changed']), 1)
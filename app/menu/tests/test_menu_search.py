@@ -0,0 +1,88 @@
+"""
+Tests for the menu search.
+"""
+
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+from menu.search import SearchIndex, search_food_items
+
+SEARCH_URL = reverse('menu:fooditem-search')
+
+
+def create_food_item(name, description=''):
+    return models.FoodItem.objects.create(name=name, description=description, price=Decimal('10.00'), available=True)
+
+
+class SearchIndexTests(TestCase):
+    """Test the in-process search index."""
+
+    def setUp(self):
+        self.index = SearchIndex([
+            (1, 'Tomato Soup', 'Fresh tomatoes and basil'),
+            (2, 'Garlic Bread', 'Served with tomato dip'),
+            (3, 'Mushroom Risotto', 'Creamy arborio rice'),
+        ])
+
+    def test_name_ranks_above_description(self):
+        """Test matches in the name rank above matches in the description."""
+        self.assertEqual(self.index.search('tomato', 10), [1, 2])
+
+    def test_every_word_must_match(self):
+        """Test items must match every word of the query."""
+        self.assertEqual(self.index.search('tomato bread', 10), [2])
+
+    def test_prefix(self):
+        """Test words being typed match as prefixes."""
+        self.assertEqual(self.index.search('mushr', 10), [3])
+
+    def test_typo(self):
+        """Test misspelt words match similar words."""
+        self.assertEqual(self.index.search('risoto', 10), [3])
+        self.assertEqual(self.index.search('xyzzy', 10), [])
+
+
+class SearchApiTests(TestCase):
+    """Test the food item search endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.soup = create_food_item('Tomato Soup', 'Fresh tomatoes and basil')
+        self.bread = create_food_item('Garlic Bread', 'Served with tomato dip')
+
+    def test_search(self):
+        """Test the matching food items are returned best first."""
+        res = self.client.get(SEARCH_URL, {'q': 'Tomato'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['name'] for item in res.data], ['Tomato Soup', 'Garlic Bread'])
+
+    def test_search_limit(self):
+        """Test the number of results is limited."""
+        res = self.client.get(SEARCH_URL, {'q': 'tomato', 'limit': 1})
+
+        self.assertEqual([item['id'] for item in res.data], [self.soup.id])
+
+    def test_query_required(self):
+        """Test a search without a query is rejected."""
+        res = self.client.get(SEARCH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_index_follows_menu_changes(self):
+        """Test the index is reused until the menu changes."""
+        search_food_items('soup')
+        with self.assertNumQueries(1):
+            search_food_items('soup')
+
+        self.soup.name = 'Pumpkin Soup'
+        self.soup.save()
+
+        self.assertEqual(search_food_items('pumpkin'), [self.soup])
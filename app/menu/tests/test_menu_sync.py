@@ -0,0 +1,161 @@
+"""
+Tests for synchronising the menu from a file.
+"""
+
+import json
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+from menu.cache import menu_key
+
+SYNC_URL = reverse('menu:fooditem-sync')
+
+MENU_CSV = (
+    'external_id,name,description,price,available,type\n'
+    'pos-1,Soup,Hot soup,12.00,true,STARTER\n'
+    'pos-2,Steak,,30.00,,\n'
+    'pos-3,Cake,Chocolate,8.50,false,DESSERT\n'
+)
+
+
+def write_menu(content, suffix='.csv'):
+    menu = tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False)
+    menu.write(content)
+    menu.close()
+
+    return menu.name
+
+
+class SyncMenuCommandTests(TestCase):
+    """Test the sync_menu command."""
+
+    def setUp(self):
+        self.soup = models.FoodItem.objects.create(
+            external_id='pos-1', name='Soup', description='Hot soup', price=Decimal('10.00'),
+            available=True, type='STARTER',
+        )
+        self.gone = models.FoodItem.objects.create(
+            external_id='pos-9', name='Gone', price=Decimal('5.00'), available=True,
+        )
+        self.manual = models.FoodItem.objects.create(name='Special', price=Decimal('5.00'), available=True)
+
+    def test_sync_menu(self):
+        """Test items are created, updated and deactivated."""
+        call_command('sync_menu', write_menu(MENU_CSV), stdout=StringIO())
+
+        self.soup.refresh_from_db()
+        self.assertEqual(self.soup.price, Decimal('12.00'))
+        steak = models.FoodItem.objects.get(external_id='pos-2')
+        self.assertTrue(steak.available)
+        self.assertEqual(steak.type, 'MAIN_COURSE')
+        self.assertFalse(models.FoodItem.objects.get(external_id='pos-3').available)
+        self.gone.refresh_from_db()
+        self.assertFalse(self.gone.available)
+        self.manual.refresh_from_db()
+        self.assertTrue(self.manual.available)
+
+    def test_sync_menu_jsonl_keep_missing(self):
+        rows = [
+            {'external_id': 'pos-1', 'name': 'Soup', 'description': 'Hot soup', 'price': '10.00',
+             'type': 'STARTER'},
+        ]
+        path = write_menu('\n'.join(json.dumps(row) for row in rows), suffix='.jsonl')
+
+        with self.assertNumQueries(1):
+            call_command('sync_menu', path, '--keep-missing', stdout=StringIO())
+
+        self.gone.refresh_from_db()
+        self.assertTrue(self.gone.available)
+
+    def test_dry_run(self):
+        """Test a dry run does not change the menu."""
+        call_command('sync_menu', write_menu(MENU_CSV), '--dry-run', stdout=StringIO())
+
+        self.assertEqual(models.FoodItem.objects.count(), 3)
+        self.soup.refresh_from_db()
+        self.assertEqual(self.soup.price, Decimal('10.00'))
+        self.assertTrue(models.FoodItem.objects.get(id=self.gone.id).available)
+
+    def test_invalid_rows(self):
+        """Test nothing is applied when a row is invalid."""
+        path = write_menu(MENU_CSV + 'pos-4,Bad,,not-a-price,,\n')
+
+        with self.assertRaises(CommandError):
+            call_command('sync_menu', path, stdout=StringIO())
+
+        self.assertFalse(models.FoodItem.objects.filter(external_id='pos-2').exists())
+
+    def test_not_utf8(self):
+        """Test a file that is not UTF-8 is reported as invalid."""
+        with tempfile.NamedTemporaryFile('wb', suffix='.csv', delete=False) as menu:
+            menu.write(MENU_CSV.replace('Hot soup', 'Sopa quente à moda').encode('latin-1'))
+
+        with self.assertRaisesMessage(CommandError, 'not UTF-8'):
+            call_command('sync_menu', menu.name, stdout=StringIO())
+
+    def test_menu_invalidated_once(self):
+        """Test the cached menu is invalidated once per import."""
+        key = menu_key('list')
+
+        with patch('menu.sync.invalidate_menu') as invalidate, self.captureOnCommitCallbacks(execute=True):
+            call_command('sync_menu', write_menu(MENU_CSV), stdout=StringIO())
+
+        invalidate.assert_called_once_with()
+        self.assertEqual(menu_key('list'), key)
+
+
+class SyncMenuApiTests(TestCase):
+    """Test the menu sync API."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_staff_required(self):
+        user = get_user_model().objects.create_user(email='user@example.com', password='pass123')
+        self.client.force_authenticate(user)
+
+        res = self.client.post(SYNC_URL, {'file': SimpleUploadedFile('menu.csv', MENU_CSV.encode())})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_sync_menu(self):
+        admin = get_user_model().objects.create_superuser('admin@example.com', 'pass123')
+        self.client.force_authenticate(admin)
+
+        res = self.client.post(SYNC_URL, {'file': SimpleUploadedFile('menu.csv', MENU_CSV.encode())})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['created'], 3)
+        self.assertFalse(res.data['dry_run'])
+        self.assertEqual(models.FoodItem.objects.count(), 3)
+
+    def test_sync_menu_invalid_file(self):
+        admin = get_user_model().objects.create_superuser('admin@example.com', 'pass123')
+        self.client.force_authenticate(admin)
+
+        res = self.client.post(SYNC_URL, {'file': SimpleUploadedFile('menu.txt', b'hello')})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sync_menu_not_utf8(self):
+        """Test a Latin-1 upload is rejected as invalid."""
+        admin = get_user_model().objects.create_superuser('admin@example.com', 'pass123')
+        self.client.force_authenticate(admin)
+        content = MENU_CSV.replace('Hot soup', 'Sopa quente à moda').encode('latin-1')
+
+        res = self.client.post(SYNC_URL, {'file': SimpleUploadedFile('menu.csv', content)})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('not UTF-8', str(res.data['file']))
+        self.assertFalse(models.FoodItem.objects.exists())
@@ -0,0 +1,141 @@
+"""
+Tests for archiving old orders.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from analytics.rollups import refresh_sales_rollups
+from core import models
+from menu.archive import archive_orders
+
+ORDERS_HISTORY_URL = reverse('menu:order-history')
+
+
+class OrderArchiveTests(TestCase):
+    """Test old finished orders are archived and still listed in the history."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('user@example.com', 'pass123')
+        self.food_item = models.FoodItem.objects.create(name='Soup', price=Decimal('10.00'), available=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_order(self, status, days_ago, quantity=2):
+        order = models.Order.objects.create(user=self.user, status=status)
+        line = models.OrderFoodItem.objects.create(food_item=self.food_item, quantity=quantity)
+        order.order_items.add(line)
+        models.Order.objects.filter(id=order.id).update_totals(date=timezone.now() - timedelta(days=days_ago))
+
+        return order
+
+    def test_archive_orders(self):
+        """Test only finished orders older than the cutoff are archived."""
+        old = self.create_order('DELIVERED', 400)
+        cancelled = self.create_order('CANCELLED', 300)
+        stuck = self.create_order('PENDING', 400)
+        recent = self.create_order('DELIVERED', 10)
+
+        call_command('archive_orders', '--older-than-days', '180', '--batch-size', '1', stdout=StringIO())
+
+        self.assertEqual(
+            set(models.Order.objects.values_list('id', flat=True)),
+            {stuck.id, recent.id},
+        )
+        archived = models.ArchivedOrder.objects.get(id=old.id)
+        self.assertEqual(archived.total_price, Decimal('20.00'))
+        self.assertEqual(archived.total_items, 2)
+        self.assertEqual(archived.month, timezone.localtime(archived.date).date().replace(day=1))
+        self.assertEqual(archived.order_items.get().price, Decimal('10.00'))
+        self.assertTrue(models.ArchivedOrder.objects.filter(id=cancelled.id).exists())
+        self.assertEqual(models.OrderFoodItem.objects.count(), 2)
+
+    def test_archive_resumes(self):
+        """Test a run stopped after some batches is resumed by the next one."""
+        for _ in range(3):
+            self.create_order('DELIVERED', 400)
+
+        call_command('archive_orders', '--batch-size', '2', '--max-batches', '1', stdout=StringIO())
+        self.assertEqual(models.ArchivedOrder.objects.count(), 2)
+
+        call_command('archive_orders', '--batch-size', '2', stdout=StringIO())
+        self.assertEqual(models.ArchivedOrder.objects.count(), 3)
+        self.assertFalse(models.Order.objects.exists())
+
+    def test_rollups_kept_for_archived_days(self):
+        """Test rebuilding the rollups keeps the sales of archived orders."""
+        self.create_order('DELIVERED', 400)
+
+        call_command('archive_orders', stdout=StringIO())
+        refresh_sales_rollups(full=True)
+
+        self.assertEqual(models.DailySales.objects.get().revenue, Decimal('20.00'))
+
+    def test_rollups_rebuilt_with_live_orders_left(self):
+        """Test days holding live orders are still rebuilt, with the sales of their archived orders."""
+        noon = timezone.localtime(timezone.now() - timedelta(days=10)).replace(hour=12, minute=0)
+        archived = self.create_order('DELIVERED', 0)
+        late = self.create_order('DELIVERED', 0)
+        models.Order.objects.filter(id=archived.id).update(date=noon - timedelta(hours=1))
+        models.Order.objects.filter(id=late.id).update(date=noon + timedelta(hours=1))
+        stuck = self.create_order('PENDING', 400)
+        self.create_order('DELIVERED', 400)
+        refresh_sales_rollups()
+        list(archive_orders(noon))
+
+        for order, order_status in [(late, 'CANCELLED'), (stuck, 'DELIVERED')]:
+            order.refresh_from_db()
+            order.status = order_status
+            order.save()
+        days = refresh_sales_rollups()
+
+        self.assertEqual(days, sorted({noon.date(), timezone.localtime(stuck.date).date()}))
+        revenue = dict(models.DailySales.objects.values_list('day', 'revenue'))
+        self.assertEqual(revenue[noon.date()], Decimal('20.00'))
+        self.assertEqual(revenue[timezone.localtime(stuck.date).date()], Decimal('40.00'))
+        self.assertEqual(refresh_sales_rollups(full=True), days)
+        self.assertEqual(dict(models.DailySales.objects.values_list('day', 'revenue')), revenue)
+
+    def test_history_includes_archived_orders(self):
+        """Test the history lists the orders first and the archived orders after them."""
+        old = self.create_order('DELIVERED', 400)
+        recent = self.create_order('DELIVERED', 10)
+        cart = self.create_order('NOT_PLACED', 0)
+        call_command('archive_orders', stdout=StringIO())
+
+        res = self.client.get(ORDERS_HISTORY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([order['id'] for order in res.data], [cart.id, recent.id, old.id])
+        self.assertEqual(res.data[2]['total_price'], Decimal('20.00'))
+        self.assertEqual(res.data[2]['order_items'][0]['food_item']['name'], 'Soup')
+
+    def test_history_pages_into_archive(self):
+        """Test the archive is only read when a page reaches past the orders."""
+        old = self.create_order('DELIVERED', 400)
+        recent = self.create_order('DELIVERED', 10)
+        cart = self.create_order('NOT_PLACED', 0)
+        call_command('archive_orders', stdout=StringIO())
+
+        with CaptureQueriesContext(connection) as queries:
+            first = self.client.get(ORDERS_HISTORY_URL, {'limit': 1})
+        second = self.client.get(ORDERS_HISTORY_URL, {'limit': 2, 'offset': 1})
+        last = self.client.get(ORDERS_HISTORY_URL, {'limit': 2, 'offset': 2})
+
+        self.assertEqual([order['id'] for order in first.data], [cart.id])
+        self.assertIn('offset=1', first['Link'])
+        self.assertFalse(any('core_archivedorder' in query['sql'] for query in queries))
+        self.assertEqual([order['id'] for order in second.data], [recent.id, old.id])
+        self.assertEqual([order['id'] for order in last.data], [old.id])
+        self.assertNotIn('Link', last)
@@ -0,0 +1,72 @@
+"""
+Tests for cleaning up abandoned carts and orphaned order lines.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core import models
+
+ORDERS_URL = reverse('menu:order-list')
+
+
+class CleanupOrdersTests(TestCase):
+    """Test the cleanup_orders command."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('user@example.com', 'pass123')
+        self.food_item = models.FoodItem.objects.create(name='Soup', price=Decimal('10.00'), available=True)
+
+    def create_order(self, status='NOT_PLACED', idle_days=0, user=None):
+        order = models.Order.objects.create(user=user or self.user, status=status)
+        order.order_items.add(models.OrderFoodItem.objects.create(food_item=self.food_item))
+        models.Order.objects.filter(id=order.id).update(updated=timezone.now() - timedelta(days=idle_days))
+
+        return order
+
+    def test_expire_idle_carts(self):
+        """Test only carts idle for longer than the cutoff are deleted with their lines."""
+        other = get_user_model().objects.create_user('other@example.com', 'pass123')
+        idle = self.create_order(idle_days=40)
+        active = self.create_order(idle_days=1, user=other)
+        delivered = self.create_order('DELIVERED', idle_days=40)
+        out = StringIO()
+
+        call_command('cleanup_orders', '--cart-idle-days', '30', '--batch-size', '1', '--sleep', '0', stdout=out)
+
+        self.assertFalse(models.Order.objects.filter(id=idle.id).exists())
+        self.assertEqual(set(models.Order.objects.values_list('id', flat=True)), {active.id, delivered.id})
+        self.assertEqual(models.OrderFoodItem.objects.count(), 2)
+        self.assertIn('Deleted 1 abandoned cart(s) with 1 line(s)', out.getvalue())
+
+    def test_delete_orphaned_lines(self):
+        """Test lines that belong to no order are deleted in batches."""
+        order = self.create_order()
+        for _ in range(3):
+            models.OrderFoodItem.objects.create(food_item=self.food_item)
+        out = StringIO()
+
+        call_command('cleanup_orders', '--batch-size', '2', '--sleep', '0', stdout=out)
+
+        self.assertEqual(list(models.OrderFoodItem.objects.all()), list(order.order_items.all()))
+        self.assertIn('3 orphaned line(s)', out.getvalue())
+
+    def test_adding_to_cart_keeps_it_active(self):
+        """Test adding to a cart counts as activity."""
+        cart = self.create_order(idle_days=40)
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        client.post(ORDERS_URL, {'order_items': [{'food_item': self.food_item.id, 'quantity': 1}]}, format='json')
+        call_command('cleanup_orders', '--sleep', '0', stdout=StringIO())
+
+        self.assertEqual(models.Order.objects.get().id, cart.id)
+        self.assertEqual(models.OrderFoodItem.objects.count(), 2)
@@ -2,6 +2,7 @@
 Tests for the orders API.
 """
 
+from django.core.cache import cache
 from django.test import TestCase
 from decimal import Decimal
 
@@ -17,6 +18,7 @@ from menu.serializers import (
 
 ORDERS_URL = reverse('menu:order-list')
 ORDERS_HISTORY_URL = reverse('menu:order-history')
+CART_BULK_URL = reverse('menu:orderfooditem-bulk')
 
 
 def detail_url(order_id):
@@ -48,6 +50,7 @@ class PrivateOrdersApiTest(TestCase):
     """Test authenticated API requests."""
 
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = create_user()
         self.client.force_authenticate(self.user)
@@ -174,11 +177,13 @@ class PrivateOrdersApiTest(TestCase):
         self.assertEqual(res_order_detail['food_item']['available'], food_item.available)
 
     def test_update_order_item(self):
-        """Test updating an order item."""
+        """Test updating an order item updates the totals of the cart."""
+        order = models.Order.objects.create(user=self.user)
         order_item = models.OrderFoodItem.objects.create(
             food_item=models.FoodItem.objects.create(name='Food name', price=Decimal('30.00')),
             quantity=1,
         )
+        order.order_items.add(order_item)
         payload = {'quantity': 2}
 
         url = order_item_url(order_item.id)
@@ -187,15 +192,124 @@ class PrivateOrdersApiTest(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         order_item.refresh_from_db()
         self.assertEqual(order_item.quantity, payload['quantity'])
+        order.refresh_from_db()
+        self.assertEqual(order.cached_total_items, 2)
+        self.assertEqual(order.cached_total_price, Decimal('60.00'))
 
     def test_delete_order_item(self):
         '''Test deleting a order item'''
+        order = models.Order.objects.create(user=self.user)
         order_item = models.OrderFoodItem.objects.create(
             food_item=models.FoodItem.objects.create(name='Food name', price=Decimal('30.00')),
             quantity=1,
         )
+        order.order_items.add(order_item)
+        order.update_totals()
         url = order_item_url(order_item.id)
         res = self.client.delete(url)
 
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(models.OrderFoodItem.objects.filter(id=order_item.id).exists())
+        order.refresh_from_db()
+        self.assertEqual(order.cached_total_items, 0)
+        self.assertEqual(order.cached_total_price, Decimal('0'))
+
+    def test_order_items_of_placed_orders_not_editable(self):
+        """Test lines of placed orders and of other users cannot be changed."""
+        food_item = models.FoodItem.objects.create(name='Food name', price=Decimal('30.00'))
+        placed = models.Order.objects.create(user=self.user, status='PENDING')
+        other = models.Order.objects.create(user=create_user(email='other@example.com'))
+        for order in (placed, other):
+            order_item = models.OrderFoodItem.objects.create(food_item=food_item, quantity=1)
+            order.order_items.add(order_item)
+
+            res = self.client.patch(order_item_url(order_item.id), {'quantity': 5})
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+            order_item.refresh_from_db()
+            self.assertEqual(order_item.quantity, 1)
+
+    def test_order_item_query_count(self):
+        """Test changing a line runs the same queries whatever the size of the cart."""
+        food_item = models.FoodItem.objects.create(name='Food name', price=Decimal('30.00'))
+        order = models.Order.objects.create(user=self.user)
+        lines = [models.OrderFoodItem.objects.create(food_item=food_item, quantity=1) for _ in range(20)]
+        order.order_items.add(*lines)
+
+        # Fetch, lock the cart, save the line and store the totals.
+        with self.assertNumQueries(6):
+            self.client.patch(order_item_url(lines[0].id), {'quantity': 2})
+        with self.assertNumQueries(7):
+            self.client.delete(order_item_url(lines[1].id))
+
+
+class CartBulkUpdateApiTest(TestCase):
+    """Test changing several cart lines in one request."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        self.cart = models.Order.objects.create(user=self.user)
+        food_item = models.FoodItem.objects.create(name='Soup', price=Decimal('10.00'))
+        self.lines = [models.OrderFoodItem.objects.create(food_item=food_item, quantity=1) for _ in range(3)]
+        self.cart.order_items.add(*self.lines)
+
+    def test_bulk_update(self):
+        """Test quantities are changed and lines deleted, and the cart is returned."""
+        payload = {
+            'update': [{'id': self.lines[0].id, 'quantity': 3}, {'id': self.lines[1].id, 'quantity': 2}],
+            'delete': [self.lines[2].id],
+        }
+
+        res = self.client.post(CART_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['id'], self.cart.id)
+        self.assertEqual(res.data['total_items'], 5)
+        self.assertEqual(res.data['total_price'], Decimal('50.00'))
+        self.assertEqual(
+            sorted(self.cart.order_items.values_list('id', 'quantity')),
+            [(self.lines[0].id, 3), (self.lines[1].id, 2)],
+        )
+        self.assertFalse(models.OrderFoodItem.objects.filter(id=self.lines[2].id).exists())
+
+    def test_bulk_update_query_count(self):
+        """Test the number of queries does not grow with the number of lines."""
+        payload = {'update': [{'id': line.id, 'quantity': 4} for line in self.lines]}
+
+        with self.assertNumQueries(9):
+            res = self.client.post(CART_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_lines_of_other_users_rejected(self):
+        """Test nothing is changed when a line is not in the user's cart."""
+        other_cart = models.Order.objects.create(user=create_user(email='other@example.com'))
+        other_line = models.OrderFoodItem.objects.create(food_item=self.lines[0].food_item, quantity=1)
+        other_cart.order_items.add(other_line)
+        payload = {'update': [{'id': self.lines[0].id, 'quantity': 5}], 'delete': [other_line.id]}
+
+        res = self.client.post(CART_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(models.OrderFoodItem.objects.filter(id=other_line.id).exists())
+        self.lines[0].refresh_from_db()
+        self.assertEqual(self.lines[0].quantity, 1)
+
+    def test_same_line_twice_rejected(self):
+        """Test a line cannot be both updated and deleted."""
+        payload = {'update': [{'id': self.lines[0].id, 'quantity': 5}], 'delete': [self.lines[0].id]}
+
+        res = self.client.post(CART_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_no_cart(self):
+        """Test a user without an open cart gets a 404."""
+        self.cart.delete()
+
+        res = self.client.post(CART_BULK_URL, {'delete': [self.lines[0].id]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
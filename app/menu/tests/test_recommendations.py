@@ -0,0 +1,175 @@
+"""
+Tests for the food items recommended in the cart.
+"""
+
+import threading
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+from menu.archive import archive_batch
+from menu.recommendations import co_occurrences, refresh_recommendations
+
+RECOMMENDATIONS_URL = reverse('menu:order-recommendations')
+
+
+class CoOccurrencesTest(TestCase):
+    """Test the pairs of food items are counted per order."""
+
+    def test_pairs_counted_once_per_order(self):
+        """Test pairs are counted in both directions and lines of the same food item once."""
+        food_items, others, counts = co_occurrences(
+            np.array([1, 1, 1, 1, 2, 2, 3]), np.array([10, 11, 12, 10, 10, 11, 10]),
+        )
+
+        self.assertEqual(list(zip(food_items.tolist(), others.tolist(), counts.tolist())), [
+            (10, 11, 2), (10, 12, 1), (11, 10, 2), (11, 12, 1), (12, 10, 1), (12, 11, 1),
+        ])
+
+    def test_no_lines(self):
+        """Test no lines give no pairs."""
+        food_items, _, _ = co_occurrences(np.array([], dtype=np.int64), np.array([], dtype=np.int64))
+
+        self.assertEqual(len(food_items), 0)
+
+
+class RecommendationsTest(TestCase):
+    """Test the cart recommends food items ordered together with its own."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('user@example.com', 'pass123')
+        self.client.force_authenticate(self.user)
+        self.soup, self.bread, self.wine, self.cake = [
+            models.FoodItem.objects.create(name=name, price=Decimal('5.00'), available=True)
+            for name in ['Soup', 'Bread', 'Wine', 'Cake']
+        ]
+
+    def create_order(self, food_items, status='PENDING'):
+        order = models.Order.objects.create(user=self.user, status=status)
+        for food_item in food_items:
+            order.order_items.add(models.OrderFoodItem.objects.create(food_item=food_item))
+        return order
+
+    def test_recommended_by_count(self):
+        """Test the food items ordered most with the cart come first, the cart's own left out."""
+        for _ in range(3):
+            self.create_order([self.soup, self.bread])
+        self.create_order([self.soup, self.wine])
+        self.create_order([self.cake, self.wine], status='CANCELLED')
+        refresh_recommendations()
+        self.create_order([self.soup], status='NOT_PLACED')
+
+        res = self.client.get(RECOMMENDATIONS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['name'] for item in res.data], ['Bread', 'Wine'])
+
+    def test_incremental(self):
+        """Test orders are counted once and new orders are added on the next run."""
+        self.create_order([self.soup, self.bread])
+        self.assertEqual(refresh_recommendations(), 1)
+        self.create_order([self.soup, self.wine])
+        self.create_order([self.soup, self.wine])
+
+        self.assertEqual(refresh_recommendations(), 2)
+        self.assertEqual(refresh_recommendations(), 0)
+
+        pairings = models.FoodItemPairing.objects.filter(food_item=self.soup)
+        self.assertEqual(dict(pairings.values_list('other__name', 'count')), {'Bread': 1, 'Wine': 2})
+        self.assertEqual(refresh_recommendations(full=True), 3)
+        self.assertEqual(dict(pairings.values_list('other__name', 'count')), {'Bread': 1, 'Wine': 2})
+
+    def test_archived_orders_counted(self):
+        """Test orders archived before or after they were counted are counted once, also by full runs."""
+        self.create_order([self.soup, self.bread], status='DELIVERED')
+        refresh_recommendations()
+        self.create_order([self.soup, self.wine], status='DELIVERED')
+        archive_batch(timezone.now() + timedelta(days=1))
+
+        self.assertEqual(refresh_recommendations(), 1)
+        self.assertEqual(refresh_recommendations(), 0)
+        pairings = models.FoodItemPairing.objects.filter(food_item=self.soup)
+        self.assertEqual(dict(pairings.values_list('other__name', 'count')), {'Bread': 1, 'Wine': 1})
+        self.assertEqual(refresh_recommendations(full=True), 2)
+        self.assertEqual(dict(pairings.values_list('other__name', 'count')), {'Bread': 1, 'Wine': 1})
+
+    @override_settings(RECOMMENDATIONS_PER_FOOD_ITEM=1)
+    def test_top_recommendations_stored(self):
+        """Test only the food items paired most are stored for each food item."""
+        self.create_order([self.soup, self.bread])
+        self.create_order([self.soup, self.bread, self.wine])
+        refresh_recommendations()
+
+        self.assertEqual(
+            list(models.Recommendation.objects.filter(food_item=self.soup).values_list('recommended__name', 'count')),
+            [('Bread', 2)],
+        )
+
+    def test_one_query(self):
+        """Test a cached cart gets its recommendations in one query."""
+        self.create_order([self.soup, self.bread])
+        refresh_recommendations()
+        self.create_order([self.soup], status='NOT_PLACED')
+        self.client.get(RECOMMENDATIONS_URL)
+
+        with self.assertNumQueries(1):
+            res = self.client.get(RECOMMENDATIONS_URL)
+
+        self.assertEqual([item['name'] for item in res.data], ['Bread'])
+
+    def test_empty_cart(self):
+        """Test an empty cart gets no recommendations."""
+        res = self.client.get(RECOMMENDATIONS_URL)
+
+        self.assertEqual(res.data, [])
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Needs row level locking.')
+class ConcurrentRefreshTest(TransactionTestCase):
+    """Test parallel runs count every order once."""
+
+    RUNS = 4
+
+    def test_no_lost_counts(self):
+        """Test the pairings add up to the orders whatever run counted them."""
+        user = get_user_model().objects.create_user('user@example.com', 'pass123')
+        soup, bread = [
+            models.FoodItem.objects.create(name=name, price=Decimal('5.00'), available=True)
+            for name in ['Soup', 'Bread']
+        ]
+        for _ in range(40):
+            order = models.Order.objects.create(user=user, status='PENDING')
+            for food_item in [soup, bread]:
+                order.order_items.add(models.OrderFoodItem.objects.create(food_item=food_item))
+        barrier = threading.Barrier(self.RUNS)
+        counted = []
+
+        def run():
+            try:
+                barrier.wait()
+                counted.append(refresh_recommendations(batch_size=5))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run) for _ in range(self.RUNS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=30)
+            self.assertFalse(thread.is_alive())
+
+        self.assertEqual(sum(counted), 40)
+        self.assertEqual(models.FoodItemPairing.objects.get(food_item=soup, other=bread).count, 40)
@@ -0,0 +1,103 @@
+"""
+Tests for sparse fieldsets of the menu and order APIs.
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+
+FOOD_ITEM_URL = reverse('menu:fooditem-list')
+ORDERS_URL = reverse('menu:order-list')
+ORDERS_HISTORY_URL = reverse('menu:order-history')
+
+
+class SparseFieldsTest(TestCase):
+    """Test ?fields= and ?expand= trim the responses and the queries."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('user@example.com', 'pass123')
+        self.client.force_authenticate(self.user)
+        self.food_item = models.FoodItem.objects.create(
+            name='Soup', description='Hot soup', price=Decimal('10.00'), available=True,
+        )
+
+    def create_order(self, status='NOT_PLACED', quantity=2):
+        order = models.Order.objects.create(user=self.user, status=status)
+        order.order_items.add(models.OrderFoodItem.objects.create(food_item=self.food_item, quantity=quantity))
+        order.update_totals()
+        return order
+
+    def test_food_item_fields(self):
+        """Test only the fields asked for are rendered and loaded."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(FOOD_ITEM_URL, {'fields': 'id,name'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, [{'id': self.food_item.id, 'name': 'Soup'}])
+        self.assertFalse(any('description' in query['sql'] for query in queries))
+
+    def test_unknown_field_rejected(self):
+        """Test asking for an unknown field is an error."""
+        res = self.client.get(FOOD_ITEM_URL, {'fields': 'id,secret'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('fields', res.data)
+
+    def test_cart_badge_from_cache(self):
+        """Test the cart can be trimmed to its item count without a query."""
+        self.create_order()
+        self.client.get(ORDERS_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ORDERS_URL, {'fields': 'total_items'})
+
+        self.assertEqual(res.data, [{'total_items': 2}])
+
+    def test_cart_expand(self):
+        """Test nested objects are rendered as ids unless expanded."""
+        order = self.create_order()
+        line_id = order.order_items.get().id
+
+        res = self.client.get(ORDERS_URL, {'fields': 'id,order_items', 'expand': 'order_items'})
+
+        self.assertEqual(res.data, [{
+            'id': order.id,
+            'order_items': [{'id': line_id, 'food_item': self.food_item.id, 'quantity': 2}],
+        }])
+
+        res = self.client.get(ORDERS_URL, {'fields': 'order_items', 'expand': 'order_items.food_item'})
+
+        self.assertEqual(res.data[0]['order_items'][0]['food_item']['name'], 'Soup')
+
+    def test_history_fields(self):
+        """Test the history trimmed to a few fields skips the order lines."""
+        orders = [self.create_order(status='DELIVERED') for _ in range(3)]
+
+        with self.assertNumQueries(1):
+            res = self.client.get(ORDERS_HISTORY_URL, {'fields': 'id,date,status,total_price', 'limit': 3})
+
+        self.assertEqual([order['id'] for order in res.data], [order.id for order in reversed(orders)])
+        self.assertEqual(set(res.data[0]), {'id', 'date', 'status', 'total_price'})
+        self.assertEqual(res.data[0]['total_price'], Decimal('20.00'))
+
+    def test_history_queries_constant(self):
+        """Test the full history loads the lines and food items with prefetches."""
+        for _ in range(5):
+            self.create_order(status='DELIVERED')
+
+        # Orders, their lines, their food items and the empty archive.
+        with self.assertNumQueries(4):
+            res = self.client.get(ORDERS_HISTORY_URL)
+
+        self.assertEqual(res.data[0]['order_items'][0]['food_item']['name'], 'Soup')
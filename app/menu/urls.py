@@ -10,5 +10,6 @@ router.register('order-items', views.OrderFoodItemViewSet)
 app_name = 'menu'
 
 urlpatterns = [
+    path('bootstrap/', views.BootstrapView.as_view(), name='bootstrap'),
     path('', include(router.urls))
 ]
@@ -1,16 +1,40 @@
-from rest_framework import viewsets, permissions, authentication, mixins
+import io
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema, extend_schema_view
+from rest_framework import viewsets, permissions, authentication, mixins, parsers, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
 
 from core.models import (
+    Address,
+    ArchivedOrder,
     FoodItem,
     Order,
     OrderFoodItem,
     )
+from core.replicas import ReplicaReadMixin
 from menu import (
     serializers,
 
 )
+from menu.archive import history_page
+from menu.bootstrap import menu_section, parse_etags, section
+from menu.cache import cache_cart, cached_cart
+from menu.cart import bulk_update_cart
+from menu.changes import changes_since, current_version
+from menu.inventory import place_cart
+from menu.recommendations import recommend
+from menu.search import search_food_items
+from menu.sparse import SparseFieldsMixin, optimize_queryset, trim_data, trim_serializer
+from menu.sync import MenuSyncError, format_from_name, sync_menu
+from user.serializers import AddressSerializer, UserSerializer
 
 
 class AuthenticatedForWriteMethods(permissions.BasePermission):
@@ -26,29 +50,117 @@ class AuthenticatedForWriteMethods(permissions.BasePermission):
         return request.user and request.user.is_authenticated
 
 
-class FoodItemViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(parameters=[serializers.SparseQuerySerializer]),
+    retrieve=extend_schema(parameters=[serializers.SparseQuerySerializer]),
+)
+class FoodItemViewSet(SparseFieldsMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     serializer_class = serializers.FoodItemDetailSerializer
     queryset = FoodItem.objects.all()
     authentication_classes = [authentication.TokenAuthentication]
     permission_classes = [AuthenticatedForWriteMethods]
 
     def get_serializer_class(self):
-        if self.action == 'list':
+        if self.action in ['list', 'search', 'changes']:
             return serializers.FoodItemSerializer
+        if self.action == 'sync':
+            return serializers.MenuSyncSerializer
 
         return self.serializer_class
 
+    @extend_schema(parameters=[serializers.FoodItemSearchSerializer, serializers.SparseQuerySerializer])
+    @action(detail=False, methods=['GET'])
+    def search(self, request):
+        """Return the food items matching the words of a search, best match first."""
+        query = serializers.FoodItemSearchSerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        food_items = search_food_items(query.validated_data['q'], query.validated_data['limit'])
+
+        return Response(self.get_serializer(food_items, many=True).data)
+
+    @extend_schema(
+        parameters=[serializers.MenuChangesQuerySerializer, serializers.SparseQuerySerializer],
+        responses=serializers.MenuChangesSerializer,
+    )
+    @action(detail=False, methods=['GET'])
+    def changes(self, request):
+        """Return the food items changed and the ids of those deleted since a menu version."""
+        query = serializers.MenuChangesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        # Read first: changes committed meanwhile are sent again next time rather than missed.
+        version = current_version()
+        changed, deleted = changes_since(query.validated_data['since'])
+
+        return Response({
+            'version': version,
+            'changed': self.get_serializer(self.filter_queryset(changed), many=True).data,
+            'deleted': deleted,
+        })
+
+    @extend_schema(responses=serializers.MenuSyncResultSerializer)
+    @action(
+        detail=False,
+        methods=['POST'],
+        permission_classes=[permissions.IsAdminUser],
+        parser_classes=[parsers.MultiPartParser],
+    )
+    def sync(self, request):
+        """Create, update and deactivate food items from a menu file."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        upload = data['file']
+
+        try:
+            file_format = data.get('file_format') or format_from_name(upload.name)
+            plan = sync_menu(
+                io.TextIOWrapper(upload, encoding='utf-8', newline=''),
+                file_format,
+                dry_run=data['dry_run'],
+                deactivate_missing=data['deactivate_missing'],
+            )
+        except MenuSyncError as exc:
+            raise ValidationError({'file': exc.errors})
+
+        result = serializers.MenuSyncResultSerializer({**plan.summary(), 'dry_run': data['dry_run']})
+        return Response(result.data, status=status.HTTP_200_OK)
+
 
-class OrderViewSet(viewsets.ModelViewSet):
+def render_cart(request):
+    """Render the open cart of the requesting user as listed by the API, and cache it."""
+    carts = Order.objects.filter(
+        user=request.user, status='NOT_PLACED',
+    ).order_by('-id').prefetch_related('order_items__food_item')
+    data = serializers.OrderDetailSerializer(carts, many=True, context={'request': request}).data
+    cache_cart(request.user.id, data)
+
+    return data
+
+
+def write_through_cart(request):
+    """Cache the open cart of the requesting user once the current transaction commits."""
+    transaction.on_commit(lambda: render_cart(request))
+
+
+@extend_schema_view(
+    list=extend_schema(parameters=[serializers.SparseQuerySerializer]),
+    retrieve=extend_schema(parameters=[serializers.SparseQuerySerializer]),
+)
+class OrderViewSet(SparseFieldsMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     serializer_class = serializers.OrderDetailSerializer
     queryset = Order.objects.all()
     authentication_classes = [authentication.TokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'orders'
+    # The cart is read right after every change, so only history uses a replica.
+    replica_actions = ['history']
 
     def get_serializer_class(self):
         """Return appropriate serializer class when POST request is made."""
         if self.action == 'create':
             return serializers.OrderSerializer
+        if self.action == 'recommendations':
+            return serializers.FoodItemSerializer
 
         return self.serializer_class
 
@@ -56,12 +168,84 @@ class OrderViewSet(viewsets.ModelViewSet):
         """Filter queryset to authenticated user."""
         return self.queryset.filter(user=self.request.user, status="NOT_PLACED").order_by('-id')
 
+    def get_archived_serializer(self, *args, **kwargs):
+        serializer = serializers.ArchivedOrderSerializer(*args, **kwargs)
+        sparse = self.get_sparse()
+
+        return trim_serializer(serializer, sparse) if sparse else serializer
+
+    def list(self, request, *args, **kwargs):
+        """Return the open cart, from the cache unless it changed."""
+        sparse = self.get_sparse()
+        if sparse:
+            # Rejects unknown fields before the cached cart is trimmed.
+            self.get_serializer()
+        data = cached_cart(request.user.id)
+        if data is None:
+            data = render_cart(request)
+
+        return Response(trim_data(data, sparse) if sparse else data)
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        write_through_cart(self.request)
+
+    def perform_update(self, serializer):
+        # Customers may move their own orders along, but only the kitchen feeds the preparation times.
+        serializer.instance.timed = self.request.user.is_staff
+        with transaction.atomic():
+            if serializer.validated_data.get('status', 'NOT_PLACED') not in ['NOT_PLACED', 'CANCELLED']:
+                place_cart(serializer.instance)
+            else:
+                Order.objects.select_for_update().filter(id=serializer.instance.id).exists()
+            # Cart line changes store the totals under the same lock, reload them so the save keeps them.
+            serializer.instance.refresh_from_db(fields=['cached_total_price', 'cached_total_items'])
+            super().perform_update(serializer)
+        write_through_cart(self.request)
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        write_through_cart(self.request)
+
+    @extend_schema(parameters=[serializers.RecommendationQuerySerializer, serializers.SparseQuerySerializer])
+    @action(detail=False, methods=['GET'])
+    def recommendations(self, request):
+        """Return food items frequently ordered together with those in the cart."""
+        query = serializers.RecommendationQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        carts = cached_cart(request.user.id)
+        if carts is None:
+            carts = render_cart(request)
+        food_item_ids = {
+            line['food_item']['id'] for cart in carts for line in cart['order_items'] if line['food_item']
+        }
+        if not food_item_ids:
+            return Response([])
+
+        food_items = recommend(food_item_ids, query.validated_data['limit'])
+        return Response(self.get_serializer(food_items, many=True).data)
+
+    @extend_schema(parameters=[serializers.HistoryQuerySerializer, serializers.SparseQuerySerializer])
     @action(detail=False, methods=['GET'])
     def history(self, request):
-        """Return orders history."""
-        orders = self.queryset.filter(user=request.user).order_by('-id')
-        serializer = self.get_serializer(orders, many=True)
-        return Response(serializer.data)
+        """Return orders history, archived orders last."""
+        query = serializers.HistoryQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        limit, offset = query.validated_data.get('limit'), query.validated_data['offset']
+
+        orders = optimize_queryset(self.queryset.filter(user=request.user).order_by('-id'), self.get_serializer())
+        archived_serializer = self.get_archived_serializer()
+        archived = optimize_queryset(ArchivedOrder.objects.filter(user=request.user), archived_serializer)
+        orders, archived = history_page(request.user, orders, offset, limit, archived)
+        data = self.get_serializer(orders, many=True).data
+        data += self.get_archived_serializer(archived, many=True).data
+
+        headers = {}
+        if limit is not None and len(data) == limit:
+            next_url = replace_query_param(request.build_absolute_uri(), 'offset', offset + limit)
+            headers['Link'] = f'<{next_url}>; rel="next"'
+
+        return Response(data, headers=headers)
 
 
 class OrderFoodItemViewSet(mixins.UpdateModelMixin, mixins.DestroyModelMixin, viewsets.GenericViewSet):
@@ -69,3 +253,79 @@ class OrderFoodItemViewSet(mixins.UpdateModelMixin, mixins.DestroyModelMixin, vi
     queryset = OrderFoodItem.objects.all()
     authentication_classes = [authentication.TokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'orders'
+
+    def get_serializer_class(self):
+        if self.action == 'bulk':
+            return serializers.CartBulkUpdateSerializer
+
+        return self.serializer_class
+
+    def get_queryset(self):
+        """Lines of the open cart of the authenticated user, with the id of the cart."""
+        return self.queryset.filter(
+            order__user=self.request.user, order__status='NOT_PLACED',
+        ).annotate(cart_id=F('order__id'))
+
+    def lock_cart(self, line):
+        # Serializes the changes to the cart, so each one stores correct totals.
+        if not Order.objects.select_for_update().filter(id=line.cart_id, status='NOT_PLACED').exists():
+            raise PermissionDenied('The order has already been placed.')
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            self.lock_cart(serializer.instance)
+            serializer.save()
+            Order.objects.filter(id=serializer.instance.cart_id).update_totals(updated=timezone.now())
+            write_through_cart(self.request)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            self.lock_cart(instance)
+            instance.delete()
+            Order.objects.filter(id=instance.cart_id).update_totals(updated=timezone.now())
+            write_through_cart(self.request)
+
+    @extend_schema(responses=serializers.OrderDetailSerializer)
+    @action(detail=False, methods=['POST'])
+    def bulk(self, request):
+        """Change quantities of and delete several lines of the cart at once."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        cart = bulk_update_cart(request.user, serializer.validated_data['update'], serializer.validated_data['delete'])
+
+        # The changes are committed, so the cart is rendered once for the response and the cache.
+        carts = render_cart(request)
+        return Response(next(data for data in carts if data['id'] == cart.id))
+
+
+class BootstrapView(APIView):
+    """Return what the app loads at launch: user, addresses, menu, cart and recent orders."""
+    authentication_classes = [authentication.TokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(parameters=[serializers.BootstrapQuerySerializer], responses=serializers.BootstrapSerializer)
+    def get(self, request):
+        """Return every section, without the data of those whose ETag was sent."""
+        query = serializers.BootstrapQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        etags = parse_etags(query.validated_data.get('etags', ''))
+        context = {'request': request}
+
+        addresses = AddressSerializer(Address.objects.filter(user=request.user), many=True).data
+        menu_etag, menu = menu_section(request)
+        cart = cached_cart(request.user.id)
+        if cart is None:
+            cart = render_cart(request)
+        orders = optimize_queryset(
+            Order.objects.filter(user=request.user).order_by('-id'), serializers.OrderDetailSerializer(),
+        )[:settings.BOOTSTRAP_HISTORY_LENGTH]
+        history = serializers.OrderDetailSerializer(orders, many=True, context=context).data
+
+        return Response({
+            'user': section(UserSerializer(request.user).data, etags.get('user')),
+            'addresses': section(addresses, etags.get('addresses')),
+            'menu': section(menu, etags.get('menu'), menu_etag),
+            'cart': section(cart, etags.get('cart')),
+            'history': section(history, etags.get('history')),
+        })
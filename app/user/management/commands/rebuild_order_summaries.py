@@ -0,0 +1,15 @@
+'''
+Rebuild the order summaries of every user from their delivered orders.
+'''
+
+from django.core.management.base import BaseCommand
+
+from user.summary import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the lifetime order summaries of the users.'
+
+    def handle(self, *args, **options):
+        count = rebuild_summaries()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt the order summaries of {count} user(s).'))
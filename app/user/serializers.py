@@ -3,6 +3,7 @@ from rest_framework import serializers
 from django.utils.translation import gettext as _
 from core.models import (
     Address,
+    OrderSummary,
 )
 
 
@@ -61,3 +62,18 @@ class AddressSerializer(serializers.ModelSerializer):
         auth_user = self.context['request'].user
         address = Address.objects.create(user=auth_user, **validated_data)
         return address
+
+
+class FavouriteSerializer(serializers.Serializer):
+    food_item = serializers.IntegerField()
+    name = serializers.CharField()
+    quantity = serializers.IntegerField()
+
+
+class OrderSummarySerializer(serializers.ModelSerializer):
+    favourites = FavouriteSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = OrderSummary
+        fields = ['order_count', 'total_spent', 'favourites']
+        read_only_fields = fields
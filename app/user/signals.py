@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from core.models import Order
+from user.summary import record_delivery
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, raw=False, **kwargs):
+    """Add an order saved as delivered to the order summary of its user."""
+    if instance.status == 'DELIVERED' and not instance.summarized and not raw:
+        record_delivery(instance)
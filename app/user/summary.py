@@ -0,0 +1,106 @@
+"""
+Lifetime order summaries of users, for the profile screen.
+
+A summary is updated once per order, when the order is saved as DELIVERED.
+Orders delivered by bulk updates are only counted by rebuild_summaries.
+"""
+
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Sum
+
+from core.models import (
+    ArchivedOrder,
+    ArchivedOrderFoodItem,
+    FoodItem,
+    Order,
+    OrderSummary,
+    UserFoodItemCount,
+)
+
+
+def favourites(user_id):
+    """Return the food items the user ordered most, most ordered first."""
+    counts = UserFoodItemCount.objects.filter(user_id=user_id).order_by('-quantity', 'food_item_id')
+    return [
+        {'food_item': row['food_item'], 'name': row['food_item__name'], 'quantity': row['quantity']}
+        for row in counts.values('food_item', 'food_item__name', 'quantity')[:settings.ORDER_SUMMARY_FAVOURITES]
+    ]
+
+
+def record_delivery(order):
+    """Add a delivered order to the summary of its user, once."""
+    with transaction.atomic():
+        # Conditional, so an order saved twice or concurrently is counted once.
+        if not Order.objects.filter(id=order.id, status='DELIVERED', summarized=False).update(summarized=True):
+            return
+        order.summarized = True
+
+        summary = OrderSummary.objects.filter(user_id=order.user_id)
+        OrderSummary.objects.get_or_create(user_id=order.user_id)
+        # Locks the summary, so deliveries of the same user are counted one after the other.
+        summary.update(order_count=F('order_count') + 1, total_spent=F('total_spent') + order.cached_total_price)
+
+        lines = order.order_items.filter(food_item__isnull=False).values('food_item').annotate(total=Sum('quantity'))
+        quantities = {line['food_item']: line['total'] for line in lines}
+        UserFoodItemCount.objects.bulk_create([
+            UserFoodItemCount(user_id=order.user_id, food_item_id=food_item_id) for food_item_id in quantities
+        ], ignore_conflicts=True)
+        for food_item_id, quantity in quantities.items():
+            UserFoodItemCount.objects.filter(user_id=order.user_id, food_item_id=food_item_id).update(
+                quantity=F('quantity') + quantity,
+            )
+
+        summary.update(favourites=favourites(order.user_id))
+
+
+def rebuild_summaries():
+    """Recompute every summary from the delivered and archived orders, return how many there are."""
+    totals = defaultdict(lambda: [0, Decimal(0)])
+    quantities = Counter()
+    with transaction.atomic():
+        Order.objects.filter(status='DELIVERED', summarized=False).update(summarized=True)
+
+        for orders, price in [
+            (Order.objects.filter(status='DELIVERED'), 'cached_total_price'),
+            (ArchivedOrder.objects.filter(status='DELIVERED'), 'total_price'),
+        ]:
+            for row in orders.values('user').annotate(count=Count('id'), spent=Sum(price)).order_by():
+                totals[row['user']][0] += row['count']
+                totals[row['user']][1] += row['spent']
+
+        lines = [
+            Order.order_items.through.objects.filter(order__status='DELIVERED').values(
+                user=F('order__user'), food_item=F('orderfooditem__food_item'),
+            ).annotate(total=Sum('orderfooditem__quantity')),
+            ArchivedOrderFoodItem.objects.filter(order__status='DELIVERED').values(
+                'food_item', user=F('order__user'),
+            ).annotate(total=Sum('quantity')),
+        ]
+        for rows in lines:
+            for row in rows.order_by():
+                if row['food_item'] is not None:
+                    quantities[row['user'], row['food_item']] += row['total']
+
+        food_item_ids = {food_item_id for _, food_item_id in quantities}
+        names = dict(FoodItem.objects.filter(id__in=food_item_ids).values_list('id', 'name'))
+        top = defaultdict(list)
+        for (user_id, food_item_id), quantity in sorted(quantities.items(), key=lambda item: (-item[1], item[0][1])):
+            if len(top[user_id]) < settings.ORDER_SUMMARY_FAVOURITES:
+                top[user_id].append({'food_item': food_item_id, 'name': names[food_item_id], 'quantity': quantity})
+
+        OrderSummary.objects.all().delete()
+        UserFoodItemCount.objects.all().delete()
+        UserFoodItemCount.objects.bulk_create([
+            UserFoodItemCount(user_id=user_id, food_item_id=food_item_id, quantity=quantity)
+            for (user_id, food_item_id), quantity in quantities.items()
+        ], batch_size=1000)
+        OrderSummary.objects.bulk_create([
+            OrderSummary(user_id=user_id, order_count=count, total_spent=spent, favourites=top[user_id])
+            for user_id, (count, spent) in totals.items()
+        ], batch_size=1000)
+
+    return len(totals)
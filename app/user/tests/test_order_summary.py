@@ -0,0 +1,101 @@
+import io
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import models
+
+SUMMARY_URL = reverse('user:summary')
+
+
+class OrderSummaryTests(TestCase):
+    """Test the order summary is kept up to date as orders are delivered."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user('user@example.com', 'pass123')
+        self.client.force_authenticate(self.user)
+        self.soup = models.FoodItem.objects.create(name='Soup', price=Decimal('10.00'), available=True)
+        self.salad = models.FoodItem.objects.create(name='Salad', price=Decimal('4.00'), available=True)
+
+    def create_order(self, quantities, status='PENDING'):
+        order = models.Order.objects.create(user=self.user, status=status)
+        for food_item, quantity in quantities.items():
+            order.order_items.add(models.OrderFoodItem.objects.create(food_item=food_item, quantity=quantity))
+        order.update_totals()
+        return order
+
+    def deliver(self, order):
+        order.status = 'DELIVERED'
+        order.save()
+
+    def test_empty_summary(self):
+        """Test users without delivered orders get an empty summary."""
+        self.create_order({self.soup: 1})
+
+        res = self.client.get(SUMMARY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'order_count': 0, 'total_spent': '0.00', 'favourites': []})
+
+    def test_delivered_orders_counted_once(self):
+        """Test delivered orders are added to the summary once, however often they are saved."""
+        first = self.create_order({self.soup: 1, self.salad: 3})
+        second = self.create_order({self.salad: 1})
+        self.deliver(first)
+        self.deliver(second)
+        first.save()
+        models.Order.objects.get(id=second.id).save()
+
+        with self.assertNumQueries(1):
+            res = self.client.get(SUMMARY_URL)
+
+        self.assertEqual(res.data['order_count'], 2)
+        self.assertEqual(res.data['total_spent'], '26.00')
+        self.assertEqual(res.data['favourites'], [
+            {'food_item': self.salad.id, 'name': 'Salad', 'quantity': 4},
+            {'food_item': self.soup.id, 'name': 'Soup', 'quantity': 1},
+        ])
+
+    def test_stale_orders_counted_once(self):
+        """Test two copies of an order loaded before it was delivered only count it once."""
+        order = self.create_order({self.soup: 1}, status='PREPARING')
+        first, second = models.Order.objects.get(id=order.id), models.Order.objects.get(id=order.id)
+        self.deliver(first)
+        self.deliver(second)
+
+        summary = models.OrderSummary.objects.get(user=self.user)
+        self.assertEqual(summary.order_count, 1)
+        self.assertEqual(summary.total_spent, Decimal('10.00'))
+
+    @override_settings(ORDER_SUMMARY_FAVOURITES=1)
+    def test_favourites_limited(self):
+        """Test only the most ordered food items are kept as favourites."""
+        self.deliver(self.create_order({self.soup: 2, self.salad: 1}))
+
+        res = self.client.get(SUMMARY_URL)
+
+        self.assertEqual([item['name'] for item in res.data['favourites']], ['Soup'])
+
+    def test_rebuild(self):
+        """Test rebuilding counts orders delivered by bulk updates and matches the incremental summary."""
+        self.deliver(self.create_order({self.soup: 1}))
+        bulk = self.create_order({self.salad: 2})
+        models.Order.objects.filter(id=bulk.id).update(status='DELIVERED')
+
+        call_command('rebuild_order_summaries', stdout=io.StringIO())
+
+        summary = models.OrderSummary.objects.get(user=self.user)
+        self.assertEqual(summary.order_count, 2)
+        self.assertEqual(summary.total_spent, Decimal('18.00'))
+        self.assertEqual([item['quantity'] for item in summary.favourites], [2, 1])
+
+        # Already counted by the rebuild.
+        bulk.refresh_from_db()
+        bulk.save()
+        self.assertEqual(models.OrderSummary.objects.get(user=self.user).order_count, 2)
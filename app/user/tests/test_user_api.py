@@ -1,5 +1,6 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
 
 from rest_framework.test import APIClient
@@ -16,6 +17,8 @@ def create_user(**params):
 
 class PublicUserAPITests(TestCase):
     def setUp(self):
+        # Reset the throttle counters of the auth endpoints.
+        cache.clear()
         self.client = APIClient()
 
     def test_create_user_success(self):
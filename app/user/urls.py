@@ -7,6 +7,7 @@ urlpatterns = [
     path('create/', views.CreateUserView.as_view(), name='create'),
     path('token/', views.CreateTokenView.as_view(), name='token'),
     path('me/', views.ManageUserView.as_view(), name='me'),
+    path('me/summary/', views.OrderSummaryView.as_view(), name='summary'),
     path('address/', views.AddressViewSet.as_view({
         'get': 'list',
         'post': 'create',
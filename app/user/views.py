@@ -1,19 +1,27 @@
 from rest_framework import generics, authentication, permissions, viewsets
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
-from user.serializers import UserSerializer, AuthTokenSerializer, AddressSerializer
+from user.serializers import UserSerializer, AuthTokenSerializer, AddressSerializer, OrderSummarySerializer
 from core.models import (
     Address,
+    OrderSummary,
 )
 
 
 class CreateUserView(generics.CreateAPIView):
     serializer_class = UserSerializer
+    # No authentication so that credentials are never hashed before throttling.
+    authentication_classes = []
+    throttle_scope = 'auth'
 
 
 class CreateTokenView(ObtainAuthToken):
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    authentication_classes = []
+    # ObtainAuthToken disables throttling, restore the defaults.
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    throttle_scope = 'auth'
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
@@ -28,6 +36,17 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
         return self.request.user
 
 
+class OrderSummaryView(generics.RetrieveAPIView):
+    """Lifetime order count, spend and favourite food items of the authenticated user."""
+    serializer_class = OrderSummarySerializer
+    authentication_classes = [authentication.TokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_object(self):
+        """Retrieve the summary, empty until the first order is delivered."""
+        return OrderSummary.objects.filter(user=self.request.user).first() or OrderSummary(user=self.request.user)
+
+
 class AddressViewSet(viewsets.ModelViewSet):
     serializer_class = AddressSerializer
     queryset = Address.objects.all()
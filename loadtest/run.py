@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+"""
+Load test the Sherpa API.
+
+Seeds load test accounts and menu items through the API, then runs a mix of
+customer scenarios from concurrent workers and reports throughput and
+latency percentiles per endpoint as JSON.
+
+Only the standard library is used so it runs from any machine:
+
+    python loadtest/run.py --base-url http://localhost:8000 --concurrency 20 --duration 60
+
+Raise the throttling limits (THROTTLE_RATE_*) of the server under test,
+otherwise most requests are answered with 429.
+"""
+
+import argparse
+import http.client
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+PASSWORD = 'loadtest-pass-123'
+
+FOOD_TYPES = ['STARTER', 'MAIN_COURSE', 'DESSERT', 'DRINK']
+
+# Relative frequency of each scenario in the mix.
+DEFAULT_MIX = {
+    'browse': 50,
+    'add_to_cart': 25,
+    'history': 15,
+    'login': 10,
+}
+
+
+class Client:
+    """Keep-alive HTTP client recording the latency of every request."""
+
+    def __init__(self, base_url, stats, timeout=30):
+        url = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.connect = lambda: connection_class(url.hostname, url.port, timeout=timeout)
+        self.prefix = url.path.rstrip('/')
+        self.connection = self.connect()
+        self.stats = stats
+
+    def request(self, name, method, path, body=None, token=None):
+        headers = {'Accept': 'application/json'}
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        if token:
+            headers['Authorization'] = f'Token {token}'
+
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            payload = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = self.connect()
+            payload, status = b'', 0
+        if self.stats is not None:
+            self.stats.record(name, status, time.perf_counter() - started)
+
+        try:
+            return status, json.loads(payload) if payload else None
+        except ValueError:
+            return status, None
+
+
+class Stats:
+    """Thread safe latency and status collector."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, name, status, seconds):
+        with self.lock:
+            self.latencies[name].append(seconds)
+            self.statuses[name][status] += 1
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of a sorted list."""
+    if not ordered:
+        return None
+    rank = max(0, min(len(ordered) - 1, round(fraction * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def seed(base_url, users, menu_items, rng):
+    """Create load test accounts and menu items, return the user tokens and food item ids."""
+    client = Client(base_url, stats=None)
+    accounts = []
+    for index in range(users):
+        email = f'loadtest-{index}@example.com'
+        client.request('seed', 'POST', '/api/user/create/', {
+            'email': email, 'password': PASSWORD, 'name': f'Load Test {index}',
+        })
+        status, data = client.request('seed', 'POST', '/api/user/token/', {'email': email, 'password': PASSWORD})
+        if status != 200:
+            raise SystemExit(f'Could not log in as {email} ({status}), are the auth endpoints throttled?')
+        accounts.append({'email': email, 'token': data['token']})
+
+    _, menu = client.request('seed', 'GET', '/api/menu/food-item/')
+    menu = menu or []
+    for index in range(len(menu), menu_items):
+        status, item = client.request('seed', 'POST', '/api/menu/food-item/', {
+            'name': f'Load test dish {index}',
+            'description': 'Seeded by the load test harness. ' * rng.randint(1, 6),
+            'price': f'{rng.uniform(3, 60):.2f}',
+            'available': True,
+            'type': rng.choice(FOOD_TYPES),
+        }, token=accounts[0]['token'])
+        if status != 201:
+            raise SystemExit(f'Could not create menu items ({status}).')
+        menu.append(item)
+
+    return accounts, [item['id'] for item in menu]
+
+
+def browse(client, rng, account, food_items):
+    client.request('menu:list', 'GET', '/api/menu/food-item/')
+    client.request('menu:detail', 'GET', f'/api/menu/food-item/{rng.choice(food_items)}/')
+
+
+def login(client, rng, account, food_items):
+    client.request('user:token', 'POST', '/api/user/token/', {'email': account['email'], 'password': PASSWORD})
+    client.request('user:me', 'GET', '/api/user/me/', token=account['token'])
+
+
+def add_to_cart(client, rng, account, food_items):
+    # Basket sizes skew small, like real carts.
+    size = min(len(food_items), 1 + int(rng.expovariate(0.7)))
+    order_items = [
+        {'food_item': food_item, 'quantity': rng.randint(1, 3)}
+        for food_item in rng.sample(food_items, size)
+    ]
+    client.request('orders:create', 'POST', '/api/menu/orders/', {'order_items': order_items},
+                   token=account['token'])
+    client.request('orders:cart', 'GET', '/api/menu/orders/', token=account['token'])
+
+
+def history(client, rng, account, food_items):
+    client.request('orders:history', 'GET', '/api/menu/orders/history/', token=account['token'])
+
+
+SCENARIOS = {
+    'browse': browse,
+    'login': login,
+    'add_to_cart': add_to_cart,
+    'history': history,
+}
+
+
+def worker(number, args, accounts, food_items, mix, stats, deadline):
+    rng = random.Random(f'{args.seed}-{number}')
+    client = Client(args.base_url, stats)
+    names, weights = zip(*mix.items())
+    iterations = 0
+    while time.monotonic() < deadline and (not args.iterations or iterations < args.iterations):
+        scenario = rng.choices(names, weights)[0]
+        SCENARIOS[scenario](client, rng, rng.choice(accounts), food_items)
+        iterations += 1
+
+
+def report(stats, elapsed, args):
+    endpoints = {}
+    for name, latencies in sorted(stats.latencies.items()):
+        ordered = sorted(latencies)
+        statuses = stats.statuses[name]
+        endpoints[name] = {
+            'requests': len(ordered),
+            'errors': sum(count for status, count in statuses.items() if status == 0 or status >= 500),
+            'throttled': statuses.get(429, 0),
+            'statuses': {str(status): count for status, count in sorted(statuses.items())},
+            'rps': round(len(ordered) / elapsed, 2),
+            'mean_ms': round(1000 * sum(ordered) / len(ordered), 2),
+            'p50_ms': round(1000 * percentile(ordered, 0.50), 2),
+            'p95_ms': round(1000 * percentile(ordered, 0.95), 2),
+            'p99_ms': round(1000 * percentile(ordered, 0.99), 2),
+            'max_ms': round(1000 * ordered[-1], 2),
+        }
+
+    total = sum(endpoint['requests'] for endpoint in endpoints.values())
+    return {
+        'label': args.label or git_commit(),
+        'base_url': args.base_url,
+        'concurrency': args.concurrency,
+        'seed': args.seed,
+        'mix': parse_mix(args.mix),
+        'elapsed_s': round(elapsed, 2),
+        'requests': total,
+        'rps': round(total / elapsed, 2),
+        'endpoints': endpoints,
+    }
+
+
+def compare(result, baseline):
+    """Print the change of throughput and p95 latency against a baseline report."""
+    for name, current in result['endpoints'].items():
+        before = baseline['endpoints'].get(name)
+        if not before:
+            continue
+        print(
+            f"{name:20} rps {before['rps']:>9} -> {current['rps']:>9}  "
+            f"p95 {before['p95_ms']:>8}ms -> {current['p95_ms']:>8}ms",
+            file=sys.stderr,
+        )
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_mix(value):
+    if not value:
+        return DEFAULT_MIX
+    mix = {}
+    for part in value.split(','):
+        name, weight = part.split('=')
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f'Unknown scenario {name}')
+        mix[name] = int(weight)
+
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run for.')
+    parser.add_argument('--iterations', type=int, default=0, help='Scenarios per worker, 0 for no limit.')
+    parser.add_argument('--users', type=int, default=20, help='Accounts to seed and spread load over.')
+    parser.add_argument('--menu-items', type=int, default=50, help='Minimum size of the menu.')
+    parser.add_argument('--mix', help='Scenario weights, e.g. browse=50,add_to_cart=25,history=15,login=10.')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--label', help='Name of the run in the report, defaults to the git commit.')
+    parser.add_argument('--output', help='Write the JSON report to this file instead of stdout.')
+    parser.add_argument('--compare', help='Baseline JSON report to compare against.')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    accounts, food_items = seed(args.base_url, args.users, args.menu_items, random.Random(args.seed))
+
+    stats = Stats()
+    started = time.monotonic()
+    deadline = started + args.duration
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [
+            pool.submit(worker, number, args, accounts, food_items, mix, stats, deadline)
+            for number in range(args.concurrency)
+        ]
+        for future in futures:
+            future.result()
+    result = report(stats, time.monotonic() - started, args)
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            report_file.write(output + '\n')
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(result, json.load(baseline))
+
+
+if __name__ == '__main__':
+    main()
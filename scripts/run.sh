@@ -9,7 +9,17 @@ export DJANGO_SECRET_KEY="changeme"
 export DJANGO_ALLOWED_HOSTS="127.0.0.1"
 
 python manage.py wait_for_db
-python manage.py collectstatic --noinput
-python manage.py migrate
+# Skips collectstatic and migrate when nothing changed, FULL_STARTUP=1 always runs them.
+if [ "$FULL_STARTUP" = "1" ] ; then
+    python manage.py prepare_startup --force
+else
+    python manage.py prepare_startup
+fi
+
+# Workers record metrics into this directory, emptied so dead workers from a
+# previous run are not counted.
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/vol/metrics}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
 
 uwsgi --socket :9000 --workers 4 --master --master --enable-threads --module app.wsgi
\ No newline at end of file